@@ -0,0 +1,105 @@
+"""Recall@k and query latency of approximate FAISS indexes against the exact flat index.
+
+Vectors come from the real chunk set in vector_store/ (reconstructed from a flat index,
+otherwise re-embedded through the embedding cache). Use --replicate to simulate the
+larger manuals corpus with jittered copies.
+
+Run from the repository root:
+    python benchmarks/bench_ann_recall.py --k 3 --replicate 10
+"""
+import os
+import sys
+import time
+import argparse
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from ircc_rag.index_factory import build_index, configure_search  # noqa: E402
+from ircc_rag.shared_store import resolve_store  # noqa: E402
+
+
+def load_vectors(vector_dir: str, embed_model: str) -> np.ndarray:
+    index = faiss.read_index(os.path.join(vector_dir, "index.faiss"))
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(inner, faiss.IndexFlat):
+        return inner.reconstruct_n(0, inner.ntotal)
+
+    from sentence_transformers import SentenceTransformer
+    from ircc_rag.chunk_store import open_chunks
+    from ircc_rag.embedding_cache import EmbeddingCache
+
+    texts = [c["text"] for c in open_chunks(vector_dir).values()]
+    model = SentenceTransformer(embed_model)
+    return EmbeddingCache(embed_model).encode(texts, lambda t: model.encode(t, normalize_embeddings=True))
+
+
+def jitter(vectors: np.ndarray, sigma: float, rng) -> np.ndarray:
+    noisy = vectors + rng.normal(0, sigma, vectors.shape).astype("float32")
+    return noisy / np.linalg.norm(noisy, axis=1, keepdims=True)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def latency_ms(index, queries: np.ndarray, k: int):
+    """Per-query latency, one query at a time like the chat UI."""
+    times = []
+    for q in queries:
+        start = time.perf_counter()
+        index.search(q[None, :], k)
+        times.append((time.perf_counter() - start) * 1000)
+    return np.percentile(times, 50), np.percentile(times, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vector-dir", default="vector_store")
+    parser.add_argument("--embed-model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--replicate", type=int, default=1, help="Jittered copies of the corpus to add.")
+    parser.add_argument("--nprobe", default="1,4,16,64")
+    parser.add_argument("--ef-search", default="16,32,64,128")
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+    args.vector_dir = resolve_store(args.vector_dir)
+
+    faiss.omp_set_num_threads(args.threads)
+    rng = np.random.default_rng(0)
+    base = np.ascontiguousarray(load_vectors(args.vector_dir, args.embed_model), dtype="float32")
+    corpus = np.vstack([base] + [jitter(base, 0.02, rng) for _ in range(args.replicate - 1)])
+    queries = jitter(corpus[rng.choice(len(corpus), args.queries, replace=False)], 0.05, rng)
+    ids = np.arange(len(corpus), dtype="int64")
+    print(f"[INFO] Corpus: {len(corpus)} vectors x {corpus.shape[1]} dims, {len(queries)} queries, k={args.k}")
+
+    flat = build_index(corpus, ids, "flat")
+    _, truth = flat.search(queries, args.k)
+
+    configs = [("flat", "-", None)]
+    configs += [("ivf_flat", f"nprobe={n}", int(n)) for n in args.nprobe.split(",")]
+    configs += [("ivf_pq", f"nprobe={n}", int(n)) for n in args.nprobe.split(",")]
+    configs += [("hnsw", f"efSearch={e}", int(e)) for e in args.ef_search.split(",")]
+
+    built = {}
+    print("\n| Index    | Search param  | Build (s) | Size (MB) | Recall@k | p50 (ms) | p99 (ms) |")
+    print("|----------|---------------|-----------|-----------|----------|----------|----------|")
+    for index_type, label, value in configs:
+        if index_type not in built:
+            start = time.perf_counter()
+            index = build_index(corpus, ids, index_type)
+            built[index_type] = (index, time.perf_counter() - start, faiss.serialize_index(index).nbytes / 1e6)
+        index, build_s, size_mb = built[index_type]
+        if value is not None:
+            configure_search(index, nprobe=value, ef_search=value)
+        _, found = index.search(queries, args.k)
+        p50, p99 = latency_ms(index, queries, args.k)
+        print(f"| {index_type:<8} | {label:<13} | {build_s:9.2f} | {size_mb:9.1f} | "
+              f"{recall_at_k(found, truth):8.3f} | {p50:8.3f} | {p99:8.3f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Questions/sec of RAGEngine.answer_batch() against the app's one-question-at-a-time path.
+
+The one-at-a-time loop is what the Streamlit form does per question: route, retrieve_context()
+(one encode, one search, rerank) and generate_answer(). Batch mode routes everything, embeds
+the rest in one encode() call, runs one index.search, and generates length-sorted prompts in
+padded batches of --batch-sizes. Both answer the same questions with an empty history.
+
+Batch runs go first on a cold embedding cache (a temporary IRCC_CACHE_DIR), so the loop that
+follows reuses their query embeddings: the reported speed-up is a lower bound. "Same answer"
+compares each batch run's answers with the loop's (padding can change greedy decoding slightly).
+
+Run from the repository root:
+    python benchmarks/bench_batch_qa.py --llm google/flan-t5-base --replicate 4 --batch-sizes 1,8,16
+"""
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+
+os.environ.setdefault("IRCC_CACHE_DIR", tempfile.mkdtemp(prefix="bench_batch_qa_"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from ircc_rag import engine as rag  # noqa: E402
+
+QUESTIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "eval_questions_v1.jsonl")
+VARIANTS = ("{}", "Please tell me: {}", "{} Thanks.", "Question: {}")  # --replicate: distinct texts, same intent
+
+
+def one_at_a_time(engine: rag.RAGEngine, questions):
+    answers = []
+    for question in questions:
+        routed = engine.router.route(question) if engine.use_structured_lookup else None
+        if routed is not None:
+            answers.append(routed.answer)
+            continue
+        _, sources = engine.retrieve_context(question)
+        answers.append(engine.generate_answer(sources, question, []))
+    return answers
+
+
+def batched(engine: rag.RAGEngine, questions, batch_size: int):
+    answers = [None] * len(questions)
+    for i, record in engine.answer_batch(questions, batch_size):
+        answers[i] = record["bot"]
+    return answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vector-dir", default="vector_store")
+    parser.add_argument("--questions", default=QUESTIONS_FILE)
+    parser.add_argument("--llm", default=rag.LOCAL_LLM_MODEL)
+    parser.add_argument("--backend", default=rag.GENERATOR_BACKEND)
+    parser.add_argument("--batch-sizes", default="1,4,8,16")
+    parser.add_argument("--replicate", type=int, default=1, help="Phrasings per question (up to 4).")
+    parser.add_argument("--no-rerank", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.questions, "r", encoding="utf-8") as f:
+        base = [json.loads(line)["question"] for line in f if line.strip()]
+    questions = [v.format(q) for v in VARIANTS[:max(1, args.replicate)] for q in base]
+    engine = rag.RAGEngine(args.vector_dir, args.llm, args.backend, use_reranker=not args.no_rerank)
+    engine.warm_up(background=False)
+    print(f"[INFO] {len(questions)} questions, generator {args.llm} ({args.backend}), "
+          f"{'no rerank' if args.no_rerank else 'reranked'}")
+
+    rows = []
+    with contextlib.redirect_stdout(io.StringIO()):  # Per-prompt [INFO] packing lines
+        for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+            start = time.perf_counter()
+            answers = batched(engine, questions, batch_size)
+            rows.append((f"Batch, {batch_size} per generate()", time.perf_counter() - start, answers))
+        start = time.perf_counter()
+        reference = one_at_a_time(engine, questions)
+        loop_s = time.perf_counter() - start
+
+    print("\n| Mode                        | Seconds | Questions/s | Speed-up | Same answer |")
+    print("|-----------------------------|---------|-------------|----------|-------------|")
+    print(f"| {'One at a time':<27} | {loop_s:7.1f} | {len(questions) / loop_s:11.2f} | {1:7.1f}x | {'-':>11} |")
+    for name, seconds, answers in rows:
+        same = sum(a == b for a, b in zip(answers, reference)) / len(questions)
+        print(f"| {name:<27} | {seconds:7.1f} | {len(questions) / seconds:11.2f} | {loop_s / seconds:7.1f}x "
+              f"| {same:11.0%} |")
+
+
+if __name__ == "__main__":
+    main()
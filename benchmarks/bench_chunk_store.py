@@ -0,0 +1,88 @@
+"""Cold-start time and resident memory: chunks_metadata.json vs the memory-mapped chunk store.
+
+Each variant runs in a fresh interpreter that opens the metadata and then decodes the
+top-k rows of --lookups random queries, the same access pattern as retrieve_context().
+
+Run from the repository root (needs chunks_metadata.json or chunks.bin in --vector-dir):
+    python benchmarks/bench_chunk_store.py --replicate 20
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+from ircc_rag.chunk_store import STORE_FILE, LEGACY_METADATA_FILE, open_chunks, write_chunk_store  # noqa: E402
+from ircc_rag.shared_store import resolve_store  # noqa: E402
+
+# Runs in the child interpreter; prints one JSON line.
+CHILD = r"""
+import json, os, random, resource, sys, time
+sys.path.insert(0, {src!r})
+import numpy as np
+from ircc_rag.chunk_store import ChunkStore
+base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if {mode!r} == "json":
+    with open({path!r}, "r", encoding="utf-8") as f:
+        chunks = {{c["id"]: c for c in json.load(f)}}
+else:
+    chunks = ChunkStore({path!r})
+load_s = time.perf_counter() - start
+ids = list(chunks)
+rng = random.Random(0)
+start = time.perf_counter()
+for _ in range({lookups}):
+    top = [chunks[i] for i in rng.sample(ids, {k})]
+lookup_us = (time.perf_counter() - start) / {lookups} * 1e6
+peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"load_s": load_s, "lookup_us": lookup_us, "rss_mb": (peak_rss - base_rss) / 1024}}))
+"""
+
+
+def run(mode: str, path: str, lookups: int, k: int) -> dict:
+    code = CHILD.format(src=SRC_DIR, mode=mode, path=path, lookups=lookups, k=k)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def replicated(chunks: list, times: int) -> list:
+    """Copies with fresh ids, standing in for the full manuals corpus."""
+    out = []
+    for r in range(times):
+        for pos, c in enumerate(chunks):
+            out.append(dict(c, id=r * len(chunks) + pos))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vector-dir", default="vector_store")
+    parser.add_argument("--replicate", type=int, default=1)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+    args.vector_dir = resolve_store(args.vector_dir)
+
+    chunks = replicated(list(open_chunks(args.vector_dir).values()), args.replicate)
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, LEGACY_METADATA_FILE)
+        store_path = os.path.join(tmp, STORE_FILE)
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(chunks, f, indent=2, ensure_ascii=False)
+        write_chunk_store(chunks, store_path)
+
+        print(f"[INFO] {len(chunks)} chunks, top-{args.k} x {args.lookups} lookups")
+        print("\n| Format       | Size (MB) | Load (ms) | Lookup (us) | RSS delta (MB) |")
+        print("|--------------|-----------|-----------|-------------|----------------|")
+        for name, mode, path in [("JSON", "json", json_path), ("Chunk store", "store", store_path)]:
+            r = run(mode, path, args.lookups, args.k)
+            print(f"| {name:<12} | {os.path.getsize(path) / 1e6:9.1f} | {r['load_s'] * 1000:9.1f} | "
+                  f"{r['lookup_us']:11.1f} | {r['rss_mb']:14.1f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Wall-clock time to fetch N manuals: serial requests vs the async downloader.
+
+Runs against benchmarks/pdf_stand_in_server.py on localhost with simulated latency and
+per-connection bandwidth. The rows are:
+  - the original serial `requests.get(...).content` loop;
+  - a cold async run;
+  - a warm async re-run, where every file answers 304 Not Modified;
+  - a cold async run with a share of 503 responses that must be retried.
+
+Run from the repository root:
+    python benchmarks/bench_downloader.py --files 40 --size-kb 1024
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "scraping_code"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from download_ircc_manuals import download_all, pdf_filenames  # noqa: E402
+from pdf_stand_in_server import start_server  # noqa: E402
+
+
+def serial_download(items, folder: str):
+    """The pre-async loop: one request at a time, whole body buffered in memory."""
+    os.makedirs(folder, exist_ok=True)
+    for item, filename in zip(items, pdf_filenames(items)):
+        response = requests.get(item["url"], timeout=20)
+        response.raise_for_status()
+        with open(os.path.join(folder, filename), "wb") as f:
+            f.write(response.content)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--size-kb", type=int, default=1024)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--bandwidth-kbps", type=float, default=4096, help="Per connection.")
+    parser.add_argument("--per-host", type=int, default=4)
+    parser.add_argument("--fail-rate", type=float, default=0.2)
+    args = parser.parse_args()
+
+    kwargs = dict(latency_ms=args.latency_ms, bandwidth_kbps=args.bandwidth_kbps)
+    server, _ = start_server(args.files, args.size_kb * 1024, **kwargs)
+    flaky, _ = start_server(args.files, args.size_kb * 1024, fail_rate=args.fail_rate, **kwargs)
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            items = server.links()
+            t, _ = timed(serial_download, items, os.path.join(tmp, "serial"))
+            rows.append(("Serial requests", t, {"downloaded": args.files, "unchanged": 0, "failed": 0}))
+
+            folder = os.path.join(tmp, "async")
+            for name in ("Async, cold", "Async, warm (304)"):
+                t, counts = timed(asyncio.run, download_all(items, folder, None, 16, args.per_host))
+                rows.append((name, t, counts))
+
+            t, counts = timed(asyncio.run, download_all(flaky.links(), os.path.join(tmp, "flaky"), None, 16,
+                                                        args.per_host))
+            rows.append((f"Async, {args.fail_rate:.0%} 503s", t, counts))
+    finally:
+        server.shutdown()
+        flaky.shutdown()
+
+    print(f"\n[INFO] {args.files} files x {args.size_kb} KB, {args.latency_ms:.0f} ms latency, "
+          f"{args.bandwidth_kbps:.0f} KB/s per connection, {args.per_host} connections per host")
+    print("\n| Run                  | Wall (s) | Downloaded | 304 | Failed |")
+    print("|----------------------|----------|------------|-----|--------|")
+    for name, t, c in rows:
+        print(f"| {name:<20} | {t:8.2f} | {c['downloaded']:10d} | {c['unchanged']:3d} | {c['failed']:6d} |")
+    print(f"\n[INFO] Retried 503s served by the flaky stand-in: {flaky.counters.get('503', 0)}")
+
+
+if __name__ == "__main__":
+    main()
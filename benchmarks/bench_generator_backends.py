@@ -0,0 +1,127 @@
+"""Memory, load time, decode speed and answer agreement of the generator backends.
+
+Each backend (fp32, int8, onnx) runs in a fresh interpreter so peak RSS is its own. Prompts
+use the app's template with the BM25 top-3 chunks for each question in
+benchmarks/data/hybrid_queries.jsonl as context; decoding is greedy so agreement with the
+fp32 answers measures quantization drift, not sampling noise. Missing int8/onnx artefacts
+are converted before timing starts.
+
+Run from the repository root:
+    python benchmarks/bench_generator_backends.py --limit 10 --max-new-tokens 64
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+from collections import Counter
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+from ircc_rag.bm25 import BM25_FILE, BM25Index  # noqa: E402
+from ircc_rag.chunk_store import open_chunks  # noqa: E402
+from ircc_rag.context_packer import render_prompt  # noqa: E402
+from ircc_rag.llm_backend import BACKENDS  # noqa: E402
+from ircc_rag.shared_store import resolve_store  # noqa: E402
+
+QUERIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "hybrid_queries.jsonl")
+
+# Runs in the child interpreter; prints one JSON line.
+CHILD = r"""
+import json, resource, sys, time
+sys.path.insert(0, {src!r})
+from ircc_rag.llm_backend import ensure_artefact, load_seq2seq
+if {backend!r} != "fp32":
+    ensure_artefact({model!r}, {backend!r})
+    if {prepare!r}:
+        sys.exit(0)
+import torch
+base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+tokenizer, model = load_seq2seq({model!r}, {backend!r})
+load_s = time.perf_counter() - start
+with open({prompts!r}, "r", encoding="utf-8") as f:
+    prompts = json.load(f)
+answers, new_tokens, gen_s = [], 0, 0.0
+for prompt in prompts:
+    inputs = tokenizer(prompt, return_tensors="pt", truncation=True, max_length=512).to(model.device)
+    start = time.perf_counter()
+    with torch.inference_mode():
+        out = model.generate(**inputs, max_new_tokens={max_new_tokens}, do_sample=False)
+    gen_s += time.perf_counter() - start
+    new_tokens += out.shape[1] - 1  # minus the decoder start token
+    answers.append(tokenizer.decode(out[0], skip_special_tokens=True).strip())
+peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"load_s": load_s, "rss_mb": (peak_rss - base_rss) / 1024, "tokens_per_s": new_tokens / gen_s,
+                  "answers": answers}}))
+"""
+
+
+def build_prompts(vector_dir: str, queries_path: str, limit: int):
+    chunks = open_chunks(vector_dir)
+    bm25 = BM25Index.load(os.path.join(vector_dir, BM25_FILE))
+    with open(queries_path, "r", encoding="utf-8") as f:
+        questions = [json.loads(line)["query"] for line in f if line.strip()][:limit]
+    prompts = []
+    for question in questions:
+        _, ids = bm25.search(question, 3)
+        context = "\n\n".join(f"Source: {chunks[i]['source']}\n{chunks[i]['text']}" for i in ids)
+        prompts.append(render_prompt(context, "", question))
+    return prompts
+
+
+def token_f1(a: str, b: str) -> float:
+    ta, tb = a.lower().split(), b.lower().split()
+    common = sum((Counter(ta) & Counter(tb)).values())
+    if not ta or not tb or not common:
+        return float(ta == tb)
+    precision, recall = common / len(ta), common / len(tb)
+    return 2 * precision * recall / (precision + recall)
+
+
+def run(backend: str, model: str, prompts_path: str, max_new_tokens: int, prepare: bool = False):
+    code = CHILD.format(src=SRC_DIR, backend=backend, model=model, prompts=prompts_path,
+                        max_new_tokens=max_new_tokens, prepare=prepare)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=not prepare, text=True).stdout
+    return None if prepare else json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vector-dir", default="vector_store")
+    parser.add_argument("--queries", default=QUERIES_FILE)
+    parser.add_argument("--model", default="google/flan-t5-xl")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--limit", type=int, default=10, help="Number of questions.")
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    args = parser.parse_args()
+    args.vector_dir = resolve_store(args.vector_dir)
+
+    backends = args.backends.split(",")
+    if "fp32" not in backends:
+        backends.insert(0, "fp32")  # Agreement is measured against fp32
+    prompts = build_prompts(args.vector_dir, args.queries, args.limit)
+    with tempfile.TemporaryDirectory() as tmp:
+        prompts_path = os.path.join(tmp, "prompts.json")
+        with open(prompts_path, "w", encoding="utf-8") as f:
+            json.dump(prompts, f)
+        for backend in backends:
+            if backend != "fp32":
+                run(backend, args.model, prompts_path, args.max_new_tokens, prepare=True)
+        results = {b: run(b, args.model, prompts_path, args.max_new_tokens) for b in backends}
+
+    base = results["fp32"]["answers"]
+    print(f"[INFO] {args.model}, {len(prompts)} prompts, greedy, max_new_tokens={args.max_new_tokens}")
+    print("\n| Backend | Load (s) | RSS (MB) | Tokens/s | Exact match vs fp32 | Token F1 vs fp32 |")
+    print("|---------|----------|----------|----------|---------------------|------------------|")
+    for backend in backends:
+        r = results[backend]
+        exact = sum(a == b for a, b in zip(r["answers"], base)) / len(base)
+        f1 = sum(token_f1(a, b) for a, b in zip(r["answers"], base)) / len(base)
+        print(f"| {backend:<7} | {r['load_s']:8.1f} | {r['rss_mb']:8.0f} | {r['tokens_per_s']:8.2f} | "
+              f"{exact:19.2f} | {f1:16.2f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Hit@k of dense, BM25 and hybrid (RRF) retrieval on labelled IRCC queries.
+
+A query counts as a hit when any of its expected source files appears among the top-k
+retrieved chunks. Queries are grouped by kind (form numbers, fees, sections, semantic...)
+so the effect of the lexical retriever on exact-match questions is visible separately.
+
+Run from the repository root (after scripts/embed_documents.py has written bm25.npz):
+    python benchmarks/bench_hybrid_retrieval.py --k 3
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from collections import defaultdict
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from ircc_rag.bm25 import BM25_FILE, BM25Index, hybrid_search  # noqa: E402
+from ircc_rag.chunk_store import open_chunks  # noqa: E402
+from ircc_rag.embedding_cache import EmbeddingCache  # noqa: E402
+from ircc_rag.index_factory import configure_search  # noqa: E402
+from ircc_rag.shared_store import resolve_store  # noqa: E402
+
+QUERIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "hybrid_queries.jsonl")
+MODES = ("dense", "bm25", "hybrid")
+
+
+def load_queries(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def embed_queries(texts, embed_model: str) -> np.ndarray:
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(embed_model)
+    emb = EmbeddingCache(embed_model).encode(texts, lambda t: model.encode(t, normalize_embeddings=True))
+    emb = np.ascontiguousarray(emb, dtype="float32")
+    faiss.normalize_L2(emb)
+    return emb
+
+
+def retrieve(mode: str, index, bm25: BM25Index, query: str, query_emb: np.ndarray, k: int, candidates: int):
+    if mode == "dense":
+        _, ids = index.search(query_emb, k)
+        return [i for i in ids[0] if i >= 0]
+    if mode == "bm25":
+        return list(bm25.search(query, k)[1])
+    return hybrid_search(index, bm25, query, query_emb, k, candidates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vector-dir", default="vector_store")
+    parser.add_argument("--queries", default=QUERIES_FILE)
+    parser.add_argument("--embed-model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--candidates", type=int, default=20, help="Per-retriever depth fed into fusion.")
+    args = parser.parse_args()
+    args.vector_dir = resolve_store(args.vector_dir)
+
+    bm25_path = os.path.join(args.vector_dir, BM25_FILE)
+    if not os.path.exists(bm25_path):
+        raise SystemExit(f"[ERROR] {bm25_path} not found; rebuild with scripts/embed_documents.py --full")
+    index = faiss.read_index(os.path.join(args.vector_dir, "index.faiss"))
+    configure_search(index)
+    chunks = open_chunks(args.vector_dir)
+    bm25 = BM25Index.load(bm25_path)
+    queries = load_queries(args.queries)
+    embeddings = embed_queries([q["query"] for q in queries], args.embed_model)
+    print(f"[INFO] {len(queries)} queries over {index.ntotal} chunks, k={args.k}")
+
+    hits = {mode: defaultdict(list) for mode in MODES}
+    times_ms = {mode: [] for mode in MODES}
+    for q, emb in zip(queries, embeddings):
+        expected = set(q["expected_sources"])
+        for mode in MODES:
+            start = time.perf_counter()
+            ids = retrieve(mode, index, bm25, q["query"], emb[None, :], args.k, args.candidates)
+            times_ms[mode].append((time.perf_counter() - start) * 1000)
+            hit = any(chunks[i]["source"] in expected for i in ids if i in chunks)
+            hits[mode][q["kind"]].append(hit)
+            hits[mode]["all"].append(hit)
+
+    kinds = sorted(k for k in hits["dense"] if k != "all") + ["all"]
+    print(f"\n| Kind | Queries | " + " | ".join(f"{m} hit@{args.k}" for m in MODES) + " |")
+    print("|------|---------|" + "|".join("-" * (len(m) + 8) for m in MODES) + "|")
+    for kind in kinds:
+        row = " | ".join(f"{np.mean(hits[m][kind]):.2f}" for m in MODES)
+        print(f"| {kind} | {len(hits['dense'][kind])} | {row} |")
+
+    print("\n| Mode | p50 (ms) | p99 (ms) |")
+    print("|------|----------|----------|")
+    for mode in MODES:
+        p50, p99 = np.percentile(times_ms[mode], [50, 99])
+        print(f"| {mode} | {p50:.2f} | {p99:.2f} |")
+    added = np.median(times_ms["hybrid"]) - np.median(times_ms["dense"])
+    print(f"\n[INFO] Hybrid adds {added:.2f} ms per query (median) over dense-only retrieval.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Compare a full vector store rebuild against an incremental rebuild after a 1-file change.
+
+Run from the repository root:
+    python benchmarks/bench_incremental_embed.py
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+import embed_documents as ed  # noqa: E402
+
+CHANGED_FILE = "ircc_fees_text.json"
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    stats = fn(*args)
+    return time.perf_counter() - start, stats
+
+
+def touch_one_file(source_dir: str):
+    """Simulate a fee page update by appending a new fee line."""
+    path = os.path.join(source_dir, CHANGED_FILE)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    data["text"] += "\n\nService: Benchmark fee added by bench_incremental_embed\nFee: $1.00 CAD"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        source_dir = os.path.join(tmp, "english")
+        vector_dir = os.path.join(tmp, "vector_store")
+        shutil.copytree(ed.SOURCE_DIR, source_dir)
+        os.makedirs(vector_dir)
+
+        # The embedding cache is bypassed so the numbers reflect the incremental build alone.
+        full_time, full_stats = timed(ed.full_build, source_dir, vector_dir, False)
+        noop_time, noop_stats = timed(ed.incremental_build, source_dir, vector_dir, False)
+        touch_one_file(source_dir)
+        inc_time, inc_stats = timed(ed.incremental_build, source_dir, vector_dir, False)
+
+    print("\n| Build                  | Time (s) | Files | Added | Removed | Total |")
+    print("|------------------------|----------|-------|-------|---------|-------|")
+    for name, t, s in [
+        ("Full rebuild", full_time, full_stats),
+        ("Incremental, no change", noop_time, noop_stats),
+        ("Incremental, 1 file", inc_time, inc_stats),
+    ]:
+        print(f"| {name:<22} | {t:8.2f} | {s['files_changed']:5d} | {s['chunks_added']:5d} "
+              f"| {s['chunks_removed']:7d} | {s['total']:5d} |")
+    print(f"\nSpeed-up for a 1-file change: {full_time / inc_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
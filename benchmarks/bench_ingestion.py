@@ -0,0 +1,86 @@
+"""Throughput (chunks/sec) and peak RSS of a full vector store build.
+
+knowledge_base/english is replicated --replicate times into a temp dir. Each copy gets a
+marker after every sentence, so its chunks are unique and are neither deduplicated away
+nor served from a cache. Each configuration runs in a fresh interpreter with the embedding
+cache off, and reports its own peak RSS.
+
+Run from the repository root:
+    python benchmarks/bench_ingestion.py --replicate 20 --workers 1,4 --batch-sizes 256
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts")
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SCRIPTS_DIR)
+import embed_documents as ed  # noqa: E402
+
+# Runs in the child interpreter; prints one JSON line.
+CHILD = r"""
+import json, resource, sys, time
+sys.path.insert(0, {scripts!r})
+import embed_documents as ed
+start = time.perf_counter()
+stats = ed.full_build({source!r}, {vector!r}, False, {index_type!r}, {workers}, {batch_size})
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+workers_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+print(json.dumps({{"chunks": stats["total"], "seconds": elapsed, "rss_mb": rss, "worker_rss_mb": workers_rss}}))
+"""
+
+
+def replicate_corpus(source_dir: str, out_dir: str, times: int) -> int:
+    os.makedirs(out_dir, exist_ok=True)
+    n = 0
+    for file in sorted(os.listdir(source_dir)):
+        if not file.endswith(".json"):
+            continue
+        with open(os.path.join(source_dir, file), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        entries = data if isinstance(data, list) else [data]
+        for r in range(times):
+            copy = [dict(e, text=re.sub(r"\. ", f". (copy {r}) ", e.get("text", ""))) for e in entries]
+            with open(os.path.join(out_dir, f"r{r:02d}_{file}"), "w", encoding="utf-8") as f:
+                json.dump(copy if isinstance(data, list) else copy[0], f, ensure_ascii=False)
+            n += 1
+    return n
+
+
+def run(source_dir: str, vector_dir: str, index_type: str, workers: int, batch_size: int) -> dict:
+    os.makedirs(vector_dir, exist_ok=True)
+    code = CHILD.format(scripts=SCRIPTS_DIR, source=source_dir, vector=vector_dir, index_type=index_type,
+                        workers=workers, batch_size=batch_size)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--replicate", type=int, default=20)
+    parser.add_argument("--workers", default=f"1,{ed.WORKERS}")
+    parser.add_argument("--batch-sizes", default=str(ed.EMBED_BATCH_SIZE))
+    parser.add_argument("--index-type", default="flat")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source_dir = os.path.join(tmp, "english")
+        files = replicate_corpus(ed.SOURCE_DIR, source_dir, args.replicate)
+        print(f"[INFO] {files} files ({args.replicate}x knowledge_base/english), index {args.index_type}")
+        print("\n| Workers | Batch | Chunks | Time (s) | Chunks/s | Peak RSS (MB) | Worker peak RSS (MB) |")
+        print("|---------|-------|--------|----------|----------|---------------|----------------------|")
+        for workers in [int(w) for w in args.workers.split(",")]:
+            for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+                vector_dir = os.path.join(tmp, f"vs_{workers}_{batch_size}")
+                r = run(source_dir, vector_dir, args.index_type, workers, batch_size)
+                print(f"| {workers:7d} | {batch_size:5d} | {r['chunks']:6d} | {r['seconds']:8.1f} | "
+                      f"{r['chunks'] / r['seconds']:8.0f} | {r['rss_mb']:13.0f} | {r['worker_rss_mb']:20.0f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Index size saved and build time spent by near-duplicate removal on the real corpus.
+
+Chunks knowledge_base/english the way scripts/embed_documents.py does (exact repeats dropped
+by id), then runs the MinHash-LSH filter from src/ircc_rag/near_dedup.py over them in build
+order. Reported per chunking: chunks before/after, merged chunks and how many were merged
+across files, vector index size (vectors x dimension x 4 bytes, flat), and time for chunking,
+the filter, and an estimate of embedding (--embed-sample chunks are embedded with the real
+model and extrapolated; 0 skips it). The largest clusters are listed with their files to
+check what gets merged.
+
+Run from the repository root:
+    python benchmarks/bench_near_dedup.py
+    python benchmarks/bench_near_dedup.py --chunking flat --threshold 0.9 --embed-sample 0
+"""
+import os
+import sys
+import time
+import argparse
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import embed_documents as ed  # noqa: E402
+from ircc_rag.near_dedup import NEAR_DUP_THRESHOLD, NearDuplicateFilter  # noqa: E402
+
+EMBED_DIM = 384  # all-MiniLM-L6-v2
+
+
+def measure(files, source_dir, chunking, workers, threshold, same_numbers, embed_rate):
+    start = time.perf_counter()
+    per_file, _ = ed.chunk_files(files, source_dir, workers, chunking)
+    chunk_s = time.perf_counter() - start
+    chunks = list({c["id"]: c for c in per_file}.values())
+
+    dedup = NearDuplicateFilter(threshold, same_numbers=same_numbers)
+    start = time.perf_counter()
+    kept = dedup.filter(chunks)
+    dedup_s = time.perf_counter() - start
+
+    by_id = {c["id"]: c for c in chunks}
+    clusters = defaultdict(list)
+    for dup, rep in dedup.replaced.items():
+        clusters[rep].append(dup)
+    cross = sum(by_id[d]["source"] != by_id[r]["source"] for d, r in dedup.replaced.items())
+    return {
+        "chunking": chunking, "before": len(chunks), "after": len(kept), "cross": cross,
+        "chunk_s": chunk_s, "dedup_s": dedup_s,
+        "embed_s": len(chunks) / embed_rate if embed_rate else None,
+        "clusters": sorted(clusters.items(), key=lambda kv: -len(kv[1])), "by_id": by_id,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source-dir", default=ed.SOURCE_DIR)
+    parser.add_argument("--chunking", choices=ed.CHUNKINGS + ("both",), default="both")
+    parser.add_argument("--threshold", type=float, default=NEAR_DUP_THRESHOLD)
+    parser.add_argument("--any-numbers", action="store_true", help="Also merge chunks whose numbers differ.")
+    parser.add_argument("--workers", type=int, default=ed.WORKERS)
+    parser.add_argument("--embed-sample", type=int, default=512, help="Chunks embedded to estimate embed time.")
+    parser.add_argument("--show", type=int, default=5, help="Largest clusters to print.")
+    args = parser.parse_args()
+
+    files = sorted(f for f in os.listdir(args.source_dir) if f.endswith(".json"))
+    chunkings = ed.CHUNKINGS if args.chunking == "both" else (args.chunking,)
+    embed_rate = None
+    if args.embed_sample:
+        sample, _ = ed.chunk_files(files[:10], args.source_dir, 1, "flat")
+        texts = [c["text"] for c in sample[:args.embed_sample]]
+        ed.encode_texts(texts[:8], show_progress_bar=False)  # Model load
+        start = time.perf_counter()
+        ed.encode_texts(texts, show_progress_bar=False)
+        embed_rate = len(texts) / (time.perf_counter() - start)
+        print(f"[INFO] Embedding: {embed_rate:.0f} chunks/s ({ed.EMBED_MODEL}, {len(texts)} chunk sample)")
+    print(f"[INFO] {len(files)} files, threshold {args.threshold}, "
+          f"{'any numbers' if args.any_numbers else 'same numbers only'}")
+
+    rows = [measure(files, args.source_dir, c, args.workers, args.threshold, not args.any_numbers, embed_rate)
+            for c in chunkings]
+
+    print("\n| Chunking     | Chunks | After | Merged (cross-file) | Index MB | Saved | Chunking (s) | Filter (s) "
+          "| Embed est. (s) | Overhead |")
+    print("|--------------|--------|-------|---------------------|----------|-------|--------------|------------"
+          "|----------------|----------|")
+    for r in rows:
+        merged = r["before"] - r["after"]
+        mb = r["after"] * EMBED_DIM * 4 / 2**20
+        saved = merged / r["before"] if r["before"] else 0.0
+        build_s = r["chunk_s"] + (r["embed_s"] or 0.0)
+        embed = f"{r['embed_s']:.1f}" if r["embed_s"] is not None else "-"
+        overhead = f"{r['dedup_s'] / build_s:.1%}" if r["embed_s"] is not None else "-"
+        merged_label = f"{merged} ({r['cross']})"
+        print(f"| {r['chunking']:<12} | {r['before']:6d} | {r['after']:5d} | {merged_label:>19} "
+              f"| {mb:8.1f} | {saved:5.1%} | {r['chunk_s']:12.1f} | {r['dedup_s']:10.2f} | {embed:>14} | {overhead:>8} |")
+    if embed_rate:
+        print("\n[INFO] Overhead: filter time over chunking + estimated embedding of all chunks; "
+              "the merged chunks' embedding time is saved in return.")
+
+    for r in rows:
+        print(f"\n[INFO] Largest {r['chunking']} clusters:")
+        for rep, dups in r["clusters"][:args.show]:
+            sources = sorted({r["by_id"][i]["source"] for i in [rep] + dups})
+            print(f"  - {len(dups) + 1} chunks from {len(sources)} file(s): {r['by_id'][rep]['text'][:90]!r}")
+            for source in sources[:3]:
+                print(f"      {source}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Quality gained per millisecond by cross-encoder reranking of the first-stage candidates.
+
+For each candidate depth N, the first stage (hybrid BM25 + dense when bm25.npz exists,
+otherwise dense) fetches N chunks, and the cross-encoder reorders them in one batched pass.
+hit@k and MRR@k (by expected source file, benchmarks/data/hybrid_queries.jsonl) are compared
+with the first-stage top-k, next to the rerank latency the gain costs.
+
+Run from the repository root:
+    python benchmarks/bench_rerank.py --k 3 --candidates 10,20,30
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from ircc_rag.bm25 import BM25_FILE, BM25Index, hybrid_search  # noqa: E402
+from ircc_rag.chunk_store import open_chunks  # noqa: E402
+from ircc_rag.embedding_cache import EmbeddingCache  # noqa: E402
+from ircc_rag.index_factory import configure_search  # noqa: E402
+from ircc_rag.reranker import RERANK_MODEL, Reranker  # noqa: E402
+from ircc_rag.shared_store import resolve_store  # noqa: E402
+
+QUERIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "hybrid_queries.jsonl")
+
+
+def reciprocal_rank(sources, expected, k: int) -> float:
+    for rank, source in enumerate(sources[:k], start=1):
+        if source in expected:
+            return 1.0 / rank
+    return 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vector-dir", default="vector_store")
+    parser.add_argument("--queries", default=QUERIES_FILE)
+    parser.add_argument("--embed-model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--rerank-model", default=RERANK_MODEL)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--candidates", default="10,20,30")
+    args = parser.parse_args()
+    args.vector_dir = resolve_store(args.vector_dir)
+
+    from sentence_transformers import SentenceTransformer
+
+    index = faiss.read_index(os.path.join(args.vector_dir, "index.faiss"))
+    configure_search(index)
+    chunks = open_chunks(args.vector_dir)
+    bm25_path = os.path.join(args.vector_dir, BM25_FILE)
+    bm25 = BM25Index.load(bm25_path) if os.path.exists(bm25_path) else None
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = [json.loads(line) for line in f if line.strip()]
+
+    model = SentenceTransformer(args.embed_model)
+    emb = EmbeddingCache(args.embed_model).encode([q["query"] for q in queries],
+                                                  lambda t: model.encode(t, normalize_embeddings=True))
+    emb = np.ascontiguousarray(emb, dtype="float32")
+    faiss.normalize_L2(emb)
+    reranker = Reranker(args.rerank_model)
+    reranker.scores("warm up", ["warm up"])
+    stage = "hybrid" if bm25 is not None else "dense"
+    print(f"[INFO] {len(queries)} queries, first stage: {stage}, k={args.k}")
+
+    print(f"\n| N | First-stage hit@{args.k} | Reranked hit@{args.k} | First-stage MRR | Reranked MRR | "
+          "Rerank p50 (ms) | Rerank p95 (ms) | hit@k gain per 100 ms |")
+    print("|---|------|------|------|------|------|------|------|")
+    for depth in [int(n) for n in args.candidates.split(",")]:
+        base_hits, rr_hits, base_mrr, rr_mrr, times_ms = [], [], [], [], []
+        for q, e in zip(queries, emb):
+            expected = set(q["expected_sources"])
+            if bm25 is not None:
+                ids = hybrid_search(index, bm25, q["query"], e[None, :], depth, max(20, depth))
+            else:
+                ids = index.search(e[None, :], depth)[1][0]
+            candidates = [chunks[i] for i in ids if i in chunks]
+            start = time.perf_counter()
+            scores = reranker.scores(q["query"], [c["text"] for c in candidates])
+            times_ms.append((time.perf_counter() - start) * 1000)
+            reranked = [candidates[i] for i in np.argsort(-scores, kind="stable")]
+
+            base_sources = [c["source"] for c in candidates]
+            rr_sources = [c["source"] for c in reranked]
+            base_mrr.append(reciprocal_rank(base_sources, expected, args.k))
+            rr_mrr.append(reciprocal_rank(rr_sources, expected, args.k))
+            base_hits.append(base_mrr[-1] > 0)
+            rr_hits.append(rr_mrr[-1] > 0)
+
+        p50, p95 = np.percentile(times_ms, [50, 95])
+        gain = (np.mean(rr_hits) - np.mean(base_hits)) / max(p50, 1e-9) * 100
+        print(f"| {depth} | {np.mean(base_hits):.2f} | {np.mean(rr_hits):.2f} | {np.mean(base_mrr):.3f} | "
+              f"{np.mean(rr_mrr):.3f} | {p50:.1f} | {p95:.1f} | {gain:+.3f} |")
+
+
+if __name__ == "__main__":
+    main()
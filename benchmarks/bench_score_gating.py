@@ -0,0 +1,94 @@
+"""Generation time saved by score gating and adaptive top-k on a mixed in-domain / out-of-domain query log.
+
+Every question goes through the app's path without the answer cache: route, retrieve_context()
+and generate_answer(). It runs three times, with:
+  - fixed k, no gating: every retrieved question is generated from TOP_K_RETRIEVAL chunks;
+  - gating: questions whose best score is under the thresholds in src/ircc_rag/relevance.py get
+    the "couldn't find" answer without generation;
+  - gating + adaptive k: kept questions also forward fewer chunks when the scores drop off.
+Reported per mode: generations run, generation seconds and the share saved, mean prompt tokens,
+and how many in-domain questions were answered vs out-of-domain ones gated (kind "out_of_domain"
+in the log; unlabelled questions count as in-domain). Calibrate the thresholds with
+benchmarks/eval_rag.py first; this shows what they buy.
+
+Run from the repository root:
+    python benchmarks/bench_score_gating.py --llm google/flan-t5-base
+    python benchmarks/bench_score_gating.py --queries query_log.jsonl --no-rerank
+"""
+import os
+import io
+import sys
+import json
+import argparse
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from ircc_rag import engine as rag  # noqa: E402
+from ircc_rag.tracing import Trace  # noqa: E402
+
+QUESTIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "eval_questions_v2.jsonl")
+OUT_OF_DOMAIN = "out_of_domain"
+MODES = (("Fixed k, no gating", False, False), ("Gating", True, False), ("Gating + adaptive k", True, True))
+
+
+def run(engine: rag.RAGEngine, queries):
+    """Per question: (kind, generated, gated, generate seconds, prompt tokens)."""
+    results = []
+    for q in queries:
+        routed = engine.router.route(q["question"]) if engine.use_structured_lookup else None
+        if routed is not None:
+            results.append((q["kind"], False, False, 0.0, 0))
+            continue
+        trace = Trace()
+        _, sources = engine.retrieve_context(q["question"], trace=trace)
+        engine.generate_answer(sources, q["question"], [], trace)
+        gated = bool(trace.timings["scores"]["gate"]) if "scores" in trace.timings else False
+        results.append((q["kind"], "generate_ms" in trace.timings, gated,
+                        trace.timings.get("generate_ms", 0.0) / 1000, trace.timings.get("prompt_tokens", 0)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vector-dir", default="vector_store")
+    parser.add_argument("--queries", default=QUESTIONS_FILE, help='JSONL with "question" and optional "kind".')
+    parser.add_argument("--llm", default=rag.LOCAL_LLM_MODEL)
+    parser.add_argument("--backend", default=rag.GENERATOR_BACKEND)
+    parser.add_argument("--no-rerank", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = [json.loads(line) for line in f if line.strip()]
+    queries = [{"question": q.get("question") or q["query"], "kind": q.get("kind", "")} for q in queries]
+    n_out = sum(q["kind"] == OUT_OF_DOMAIN for q in queries)
+    engine = rag.RAGEngine(args.vector_dir, args.llm, args.backend, use_reranker=not args.no_rerank)
+    engine.warm_up(background=False)
+    print(f"[INFO] {len(queries)} questions ({len(queries) - n_out} in-domain, {n_out} out-of-domain), "
+          f"generator {args.llm} ({args.backend}), {'no rerank' if args.no_rerank else 'reranked'}")
+
+    rows = []
+    with contextlib.redirect_stdout(io.StringIO()):  # Per-question [INFO] score and packing lines
+        engine.llm_pipe("warm up", max_new_tokens=4)
+        for name, gating, adaptive in MODES:
+            engine.score_gating, engine.adaptive_top_k = gating, adaptive
+            rows.append((name, run(engine, queries)))
+
+    base_s = sum(r[3] for r in rows[0][1])
+    rag_in = sum(1 for r in rows[0][1] if r[0] != OUT_OF_DOMAIN and r[1])  # In-domain questions that reach generation
+    print("\n| Mode                | Generations | Generate (s) | Saved | Prompt tokens | In-domain answered "
+          "| Out-of-domain gated |")
+    print("|---------------------|-------------|--------------|-------|---------------|--------------------"
+          "|---------------------|")
+    for name, results in rows:
+        generated = [r for r in results if r[1]]
+        seconds = sum(r[3] for r in results)
+        tokens = sum(r[4] for r in generated) / max(len(generated), 1)
+        answered = sum(r[1] for r in results if r[0] != OUT_OF_DOMAIN)
+        gated = sum(r[2] for r in results if r[0] == OUT_OF_DOMAIN)
+        saved = 1 - seconds / base_s if base_s else 0.0
+        print(f"| {name:<19} | {len(generated):11d} | {seconds:12.1f} | {saved:5.0%} | {tokens:13.0f} "
+              f"| {f'{answered}/{rag_in}':>18} | {f'{gated}/{n_out}':>19} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Load test for the batched generation server at 1/4/16 concurrent users.
+
+Prompts use the app's template with three real chunks from the vector store as context.
+Start the server yourself, or pass --spawn to launch scripts/run_generation_server.py.
+
+Run from the repository root:
+    python benchmarks/bench_server_load.py --spawn --requests-per-user 4
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+from ircc_rag.chunk_store import open_chunks  # noqa: E402
+from ircc_rag.client import GenerationClient  # noqa: E402
+from ircc_rag.shared_store import resolve_store  # noqa: E402
+
+QUESTIONS = [
+    "What is the fee for a study permit?",
+    "How long are biometrics valid?",
+    "What documents do I need for Express Entry?",
+    "Can I work while I study in Canada?",
+    "How do I apply for a PR card?",
+    "What is proof of funds for Express Entry?",
+    "Who needs to give biometrics?",
+    "How do I restore my status as a visitor?",
+]
+
+
+def build_prompts(vector_dir: str, n: int, seed: int = 0):
+    chunks = open_chunks(vector_dir)
+    ids = list(chunks)
+    rng = random.Random(seed)
+    prompts = []
+    for i in range(n):
+        context = "\n\n".join(f"Source: {c['source']}\n{c['text']}" for c in (chunks[j] for j in rng.sample(ids, 3)))
+        prompts.append(
+            "You are an AI assistant specializing in answering questions about IRCC guidelines. "
+            "Base your answers only on the provided context. If the context does not contain the answer, say so clearly.\n\n"
+            f"Context:\n{context}\n\nConversation History:\n\n\nUser: {QUESTIONS[i % len(QUESTIONS)]}\nBot:"
+        )
+    return prompts
+
+
+def run_level(client: GenerationClient, prompts, users: int, per_user: int, max_new_tokens: int):
+    def user(u):
+        latencies = []
+        for r in range(per_user):
+            start = time.perf_counter()
+            client.generate(prompts[(u * per_user + r) % len(prompts)], max_new_tokens)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        latencies = [t for ts in pool.map(user, range(users)) for t in ts]
+    wall = time.perf_counter() - start
+    return len(latencies) / wall, np.percentile(latencies, [50, 95, 99])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--spawn", action="store_true", help="Start the server for the duration of the test.")
+    parser.add_argument("--vector-dir", default="vector_store")
+    parser.add_argument("--users", default="1,4,16")
+    parser.add_argument("--requests-per-user", type=int, default=4)
+    parser.add_argument("--max-new-tokens", type=int, default=300)
+    args = parser.parse_args()
+    args.vector_dir = resolve_store(args.vector_dir)
+
+    server = None
+    client = GenerationClient(args.url)
+    if args.spawn:
+        port = client.url.port or 8765
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, "scripts", "run_generation_server.py"),
+                                   "--port", str(port)])
+    try:
+        while not client.health():
+            if server is not None and server.poll() is not None:
+                raise SystemExit("[ERROR] Generation server exited during startup")
+            time.sleep(1)
+
+        levels = [int(u) for u in args.users.split(",")]
+        prompts = build_prompts(args.vector_dir, max(levels) * args.requests_per_user)
+        print("\n| Users | Throughput (req/s) | p50 (s) | p95 (s) | p99 (s) |")
+        print("|-------|--------------------|---------|---------|---------|")
+        for users in levels:
+            throughput, (p50, p95, p99) = run_level(client, prompts, users, args.requests_per_user, args.max_new_tokens)
+            print(f"| {users:5d} | {throughput:18.3f} | {p50:7.2f} | {p95:7.2f} | {p99:7.2f} |")
+        stats = client.stats()["generate"]
+        print(f"\n[INFO] Server formed {stats['batches']} batches for {stats['requests']} requests "
+              f"({stats['requests'] / max(stats['batches'], 1):.1f} avg batch size).")
+    finally:
+        if server is not None:
+            server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Memory of N app workers sharing one memory-mapped vector store, and the pause of a hot reload.
+
+1. Memory: --workers processes each open the store the way the engine does, either with
+   private copies (faiss.read_index, BM25 arrays loaded) or memory-mapped (MMAP_STORE), then run
+   searches that touch every vector. Reported per mode: total RSS, which counts shared pages
+   once per process, and total PSS/USS, which do not. "Imports only" is the interpreter, numpy
+   and faiss without a store.
+2. Reload: client threads run hybrid searches against RAGEngine.store while a new snapshot is
+   published and picked up via the snapshot watcher. Reported: snapshot open time, the switch,
+   search latency before vs across the switch, and failed requests.
+
+The store is the live snapshot in --vector-dir, or with --replicate N a synthetic one built in
+a temp dir from jittered copies of its vectors (needs a flat index) to stand in for the full
+manuals corpus.
+
+Run from the repository root:
+    python benchmarks/bench_shared_store.py --workers 4 --replicate 20
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import multiprocessing as mp
+
+import numpy as np
+import psutil
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from ircc_rag.bm25 import BM25_FILE, hybrid_search  # noqa: E402
+from ircc_rag.chunk_store import PARENTS_FILE, STORE_FILE  # noqa: E402
+from ircc_rag.shared_store import INDEX_FILE, new_build_dir, open_index, publish, resolve_store  # noqa: E402
+from ircc_rag.shared_store import write_flat_sidecar  # noqa: E402
+
+QUERIES = ["study permit fee", "biometrics appointment", "express entry draw", "IMM 5257", "proof of funds"]
+
+
+def worker(store_dir, mode, ready, done):
+    import faiss  # noqa: F401  Same imports as an app worker in every mode
+
+    if mode != "imports":
+        from ircc_rag.engine import open_store
+
+        store = open_store(store_dir, mmap=mode == "mmap")
+        rng = np.random.default_rng(os.getpid())
+        for text in QUERIES:
+            q = rng.standard_normal((1, store.index.d)).astype("float32")
+            ids = hybrid_search(store.index, store.bm25, text, q, 3) if store.bm25 else store.index.search(q, 3)[1][0]
+            [store.chunks[i]["text"] for i in ids if i in store.chunks]
+    ready.set()
+    done.wait()
+
+
+def measure_workers(store_dir: str, mode: str, n: int):
+    ctx = mp.get_context("spawn")
+    done = ctx.Event()
+    procs, events = [], []
+    for _ in range(n):
+        ready = ctx.Event()
+        proc = ctx.Process(target=worker, args=(store_dir, mode, ready, done), daemon=True)
+        proc.start()
+        procs.append(proc)
+        events.append(ready)
+    for ready in events:
+        ready.wait(600)
+    rss = pss = uss = 0
+    for proc in procs:
+        info = psutil.Process(proc.pid).memory_full_info()
+        rss += info.rss
+        pss += getattr(info, "pss", info.uss)
+        uss += info.uss
+    done.set()
+    for proc in procs:
+        proc.join()
+    return rss / 2**20, pss / 2**20, uss / 2**20
+
+
+def synthetic_store(store_dir: str, replicate: int, tmp: str) -> str:
+    """Publish a snapshot with `replicate` jittered copies of the store's vectors under `tmp`."""
+    import faiss
+    from ircc_rag.index_factory import build_index
+
+    index = faiss.read_index(os.path.join(store_dir, INDEX_FILE))
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if not isinstance(inner, faiss.IndexFlat):
+        raise SystemExit("--replicate needs a flat index to reconstruct vectors from")
+    base = inner.reconstruct_n(0, inner.ntotal)
+    ids = faiss.vector_to_array(index.id_map) if isinstance(index, faiss.IndexIDMap) else np.arange(len(base))
+    rng = np.random.default_rng(0)
+    copies = [base]
+    for _ in range(replicate - 1):
+        noisy = base + rng.normal(0, 0.02, base.shape).astype("float32")
+        copies.append(noisy / np.linalg.norm(noisy, axis=1, keepdims=True))
+    # Copies reuse the real ids so retrieved chunks still resolve.
+    big = build_index(np.vstack(copies), np.concatenate([ids] * replicate).astype("int64"), "flat")
+    build_dir = new_build_dir(tmp)
+    faiss.write_index(big, os.path.join(build_dir, INDEX_FILE))
+    write_flat_sidecar(big, build_dir)
+    for name in (STORE_FILE, PARENTS_FILE, BM25_FILE):
+        if os.path.exists(os.path.join(store_dir, name)):
+            shutil.copy(os.path.join(store_dir, name), build_dir)
+    return publish(tmp, build_dir)
+
+
+def measure_reload(vector_dir: str, clients: int, seconds: float):
+    from ircc_rag.engine import RAGEngine
+
+    engine = RAGEngine(vector_dir, use_reranker=False, use_structured_lookup=False)
+    store = engine.store
+    store.index.search(np.zeros((1, store.index.d), dtype="float32"), 3)  # Fault the mapped vectors in
+    watcher = engine.watch(interval_s=3600)  # Polled by hand below
+    samples, errors, stop = [], [], threading.Event()
+    lock = threading.Lock()
+
+    def client(seed):
+        rng = np.random.default_rng(seed)
+        while not stop.is_set():
+            q = rng.standard_normal((1, store.index.d)).astype("float32")
+            start = time.perf_counter()
+            try:
+                current = engine.store  # One snapshot per request, as the engine's retrieval does
+                if current.bm25 is not None:
+                    ids = hybrid_search(current.index, current.bm25, QUERIES[seed % len(QUERIES)], q, 3)
+                else:
+                    ids = current.index.search(q, 3)[1][0]
+                [current.chunks[i]["text"] for i in ids if i in current.chunks]
+            except Exception as e:
+                errors.append(repr(e))
+                continue
+            with lock:
+                samples.append((start, time.perf_counter() - start))
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(clients)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    build_dir = new_build_dir(vector_dir)
+    for name in os.listdir(store.path):
+        shutil.copy(os.path.join(store.path, name), build_dir)
+    publish(vector_dir, build_dir)
+    reload_start = time.perf_counter()
+    watcher.check()
+    reload_end = time.perf_counter()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    before = [d for s, d in samples if s < reload_start]
+    during = [d for s, d in samples if s <= reload_end and s + d >= reload_start]  # In flight across the swap
+    return {
+        "open_ms": (engine.last_reload_s or 0) * 1000,
+        "window_ms": (reload_end - reload_start) * 1000,
+        "p50_ms": float(np.percentile(before, 50)) * 1000,
+        "p99_ms": float(np.percentile(before, 99)) * 1000,
+        "max_during_ms": max(during, default=0.0) * 1000,
+        "during": len(during),
+        "errors": len(errors),
+        "switched": engine.store.path != store.path,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vector-dir", default="vector_store")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--replicate", type=int, default=1, help="Jittered copies of the vectors (flat stores).")
+    parser.add_argument("--clients", type=int, default=4, help="Search threads during the reload test.")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Load before and after the reload.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.replicate > 1:
+            store_dir = synthetic_store(resolve_store(args.vector_dir), args.replicate, tmp)
+            vector_dir = tmp
+        else:
+            # The reload test publishes into the vector dir, so it runs on a copy.
+            vector_dir = tmp
+            build_dir = new_build_dir(tmp)
+            source = resolve_store(args.vector_dir)
+            for name in os.listdir(source):
+                if os.path.isfile(os.path.join(source, name)):
+                    shutil.copy(os.path.join(source, name), build_dir)
+            if not os.path.exists(os.path.join(build_dir, "flat.npz")):
+                import faiss
+
+                write_flat_sidecar(faiss.read_index(os.path.join(build_dir, INDEX_FILE)), build_dir)
+            store_dir = publish(tmp, build_dir)
+        index = open_index(store_dir, mmap=False)
+        size_mb = sum(os.path.getsize(os.path.join(store_dir, n)) for n in os.listdir(store_dir)) / 2**20
+        print(f"[INFO] Store: {index.ntotal} vectors, {size_mb:.0f} MB on disk; {args.workers} workers")
+        del index
+
+        rows = [(name, *measure_workers(store_dir, mode, args.workers))
+                for name, mode in (("Imports only", "imports"), ("Private copies", "private"),
+                                   ("Memory-mapped", "mmap"))]
+        reload = measure_reload(vector_dir, args.clients, args.seconds)
+
+    print(f"\n| {f'{args.workers} workers':<19} | Total RSS (MB) | Total PSS (MB) | Total USS (MB) |")
+    print("|---------------------|----------------|----------------|----------------|")
+    for name, rss, pss, uss in rows:
+        print(f"| {name:<19} | {rss:14.0f} | {pss:14.0f} | {uss:14.0f} |")
+    print(f"\n[INFO] PSS saved by memory-mapping: {rows[1][2] - rows[2][2]:.0f} MB "
+          f"({(rows[1][2] - rows[2][2]) / max(rows[1][2] - rows[0][2], 1e-9):.0%} of the store's share)")
+
+    print("\n| Hot reload                            |                Value |")
+    print("|---------------------------------------|----------------------|")
+    for name, value in (
+        ("Open new snapshot (old keeps serving)", f"{reload['open_ms']:.1f} ms"),
+        ("Watcher check + switch, total", f"{reload['window_ms']:.1f} ms"),
+        ("Search p50 / p99 before", f"{reload['p50_ms']:.2f} / {reload['p99_ms']:.2f} ms"),
+        ("Slowest search overlapping the reload", f"{reload['max_during_ms']:.2f} ms"),
+        ("Searches overlapping / failed", f"{reload['during']} / {reload['errors']}"),
+        ("Switched to new snapshot", "yes" if reload["switched"] else "no"),
+    ):
+        print(f"| {name:<37} | {value:>20} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Speculative (draft-assisted) decoding vs plain greedy decoding of the generator on CPU.
+
+A fixed prompt set is built the way the app builds prompts (retrieve_context() + the context
+packer) from the first --limit in-domain questions of the eval set, or read from --prompts
+(JSONL with "prompt"). Each prompt is decoded greedily by --llm alone, then with each --drafts
+model proposing tokens that --llm verifies (transformers assisted generation, without the
+automatic fallback so the raw rate shows). Reported per mode: decode tokens/sec and speedup,
+acceptance rate (accepted / proposed draft tokens), exact agreement of the output tokens with
+plain greedy, and mean new tokens. Modes whose acceptance is under MIN_ACCEPTANCE_RATE would
+fall back to plain decoding in the app.
+
+Run from the repository root:
+    python benchmarks/bench_speculative.py --drafts google/flan-t5-small,google/flan-t5-base
+    python benchmarks/bench_speculative.py --llm google/flan-t5-large --backend int8 --limit 10
+"""
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from ircc_rag import engine as rag  # noqa: E402
+from ircc_rag.llm_backend import load_seq2seq  # noqa: E402
+from ircc_rag.speculative import MIN_ACCEPTANCE_RATE, AssistedGenerator  # noqa: E402
+from ircc_rag.tracing import Trace  # noqa: E402
+
+QUESTIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "eval_questions_v2.jsonl")
+
+
+def build_prompts(engine: rag.RAGEngine, path: str, limit: int):
+    with open(path, "r", encoding="utf-8") as f:
+        questions = [json.loads(line) for line in f if line.strip()]
+    prompts = []
+    with contextlib.redirect_stdout(io.StringIO()):  # Per-question [INFO] score and packing lines
+        for q in questions:
+            if q.get("kind") == "out_of_domain":
+                continue
+            _, sources = engine.retrieve_context(q["question"])
+            if sources:
+                prompts.append(engine.build_prompt(sources, q["question"], [], Trace()))
+            if len(prompts) == limit:
+                break
+    return prompts
+
+
+def decode(generate, tokenizer, device, prompts, max_new_tokens):
+    """(outputs, new tokens, seconds) with `generate` run on each prompt alone."""
+    outputs, tokens, seconds = [], 0, 0.0
+    for prompt in prompts:
+        inputs = tokenizer(prompt, return_tensors="pt").to(device)
+        start = time.perf_counter()
+        out = generate(**inputs, max_new_tokens=max_new_tokens)
+        seconds += time.perf_counter() - start
+        outputs.append(out[0].tolist())
+        tokens += out.shape[1] - 1
+    return outputs, tokens, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vector-dir", default="vector_store")
+    parser.add_argument("--llm", default=rag.LOCAL_LLM_MODEL)
+    parser.add_argument("--drafts", default="google/flan-t5-small,google/flan-t5-base")
+    parser.add_argument("--backend", default=rag.GENERATOR_BACKEND, choices=["fp32", "int8"],
+                        help="Assisted generation needs a transformers model, so not onnx.")
+    parser.add_argument("--questions", default=QUESTIONS_FILE)
+    parser.add_argument("--prompts", help='JSONL with "prompt" per line instead of building them.')
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--max-new-tokens", type=int, default=128)
+    args = parser.parse_args()
+
+    engine = rag.RAGEngine(args.vector_dir, args.llm, args.backend, use_reranker=False, use_structured_lookup=False,
+                           score_gating=False, draft_model=None)
+    if args.prompts:
+        with open(args.prompts, "r", encoding="utf-8") as f:
+            prompts = [json.loads(line)["prompt"] for line in f if line.strip()][:args.limit]
+    else:
+        prompts = build_prompts(engine, args.questions, args.limit)
+    pipe = engine.llm_pipe
+    model, tokenizer = pipe.model, pipe.tokenizer
+    print(f"[INFO] {len(prompts)} prompts, generator {args.llm} ({args.backend}), "
+          f"up to {args.max_new_tokens} new tokens, greedy")
+
+    decode(model.generate, tokenizer, model.device, prompts[:1], 8)  # Warm up
+    plain, plain_tokens, plain_s = decode(model.generate, tokenizer, model.device, prompts, args.max_new_tokens)
+    rows = [("Plain greedy", plain_tokens / plain_s, 1.0, None, 1.0, plain_tokens / len(prompts))]
+
+    for name in filter(None, args.drafts.split(",")):
+        _, draft = load_seq2seq(name, args.backend)
+        draft = draft.to(model.device)
+        decode(draft.generate, tokenizer, model.device, prompts[:1], 8)  # Warm up
+        assisted = AssistedGenerator(pipe, draft, min_acceptance=0.0)
+        outputs, tokens, seconds = decode(assisted.generate, tokenizer, model.device, prompts, args.max_new_tokens)
+        agree = sum(a == b for a, b in zip(outputs, plain)) / len(prompts)
+        rows.append((f"Draft {name.split('/')[-1]}", tokens / seconds, plain_s / seconds * tokens / plain_tokens,
+                     assisted.stats()["acceptance_rate"], agree, tokens / len(prompts)))
+
+    print("\n| Decoding                | Tokens/s | Speedup | Acceptance | Exact match | New tokens |")
+    print("|-------------------------|----------|---------|------------|-------------|------------|")
+    for name, rate, speedup, acceptance, agree, new in rows:
+        accepted = f"{acceptance:.0%}" if acceptance is not None else "-"
+        print(f"| {name:<23} | {rate:8.1f} | {speedup:6.2f}x | {accepted:>10} | {agree:11.0%} | {new:10.1f} |")
+    print(f"\n[INFO] The app falls back to plain decoding below {MIN_ACCEPTANCE_RATE:.0%} acceptance "
+          "(MIN_ACCEPTANCE_RATE in src/ircc_rag/speculative.py).")
+
+
+if __name__ == "__main__":
+    main()
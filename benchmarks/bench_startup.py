@@ -0,0 +1,129 @@
+"""Import time and time to first paint of the Streamlit app, before and after the engine package.
+
+1. Import: a fresh interpreter runs the app's import block (everything above its first
+   `# ---` section header) and reports which heavy modules it pulled in.
+2. First paint: a fresh interpreter runs the whole script once with streamlit's AppTest, i.e.
+   until the first page is complete. The old app loads the index and every model inside that
+   run; the engine version starts them on a background thread and renders immediately.
+3. Ready (engine only): RAGEngine.warm_up() in the foreground, the longest the first RAG answer
+   can wait after the page is up.
+
+"Before" is src/streamlit_app.py at --before (default: the parent of the commit that added
+src/ircc_rag/engine.py), copied next to the current app for the run so paths resolve the same.
+Each figure is the median over --repeat fresh interpreters.
+
+Run from the repository root:
+    python benchmarks/bench_startup.py --repeat 3
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+APP = os.path.join("src", "streamlit_app.py")
+BEFORE_COPY = os.path.join("src", "_bench_startup_before_app.py")
+HEAVY_MODULES = ("streamlit", "faiss", "torch", "transformers", "sentence_transformers")
+
+IMPORT_CODE = """
+import sys, json, time
+path = sys.argv[1]
+with open(path, encoding="utf-8") as f:
+    lines = f.read().splitlines()
+end = next((i for i, line in enumerate(lines) if line.startswith("# ---")), len(lines))
+code = compile("\\n".join(lines[:end]), path, "exec")
+start = time.perf_counter()
+exec(code, {"__file__": path, "__name__": "bench_startup"})
+elapsed = time.perf_counter() - start
+print(json.dumps({"s": elapsed, "heavy": [m for m in HEAVY if m in sys.modules]}))
+""".replace("HEAVY", repr(HEAVY_MODULES))
+
+PAINT_CODE = """
+import sys, json, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=float(sys.argv[2])).run()
+elapsed = time.perf_counter() - start
+print(json.dumps({"s": elapsed, "errors": [str(e.value) for e in at.exception]}))
+"""
+
+READY_CODE = """
+import json, time
+start = time.perf_counter()
+from ircc_rag.engine import RAGEngine
+engine = RAGEngine()
+engine.warm_up(background=False)
+elapsed = time.perf_counter() - start
+print(json.dumps({"s": elapsed, "errors": list(engine.errors.values())}))
+"""
+
+
+def default_before() -> str:
+    added = subprocess.run(["git", "log", "--diff-filter=A", "--format=%H", "-1", "--", "src/ircc_rag/engine.py"],
+                           cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    return f"{added}^" if added else "HEAD"
+
+
+def run_child(code: str, *args: str, timeout: float) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.join(ROOT, "src"), env.get("PYTHONPATH")]))
+    proc = subprocess.run([sys.executable, "-c", code, *args], cwd=ROOT, env=env, capture_output=True, text=True,
+                          timeout=timeout)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "child failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def measure(code: str, args, repeat: int, timeout: float, label: str):
+    results = [run_child(code, *args, timeout=timeout) for _ in range(repeat)]
+    for error in results[-1].get("errors", []):
+        print(f"[WARN] {label}: {error}")
+    return statistics.median(r["s"] for r in results), results[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--before", default=None, help="Git revision of the old app (default: before the engine).")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=900.0, help="Seconds allowed per app run.")
+    parser.add_argument("--skip-paint", action="store_true", help="Import times only, no models loaded.")
+    args = parser.parse_args()
+
+    before = args.before or default_before()
+    source = subprocess.run(["git", "show", f"{before}:{APP}"], cwd=ROOT, capture_output=True, text=True,
+                            check=True).stdout
+    before_path = os.path.join(ROOT, BEFORE_COPY)
+    with open(before_path, "w", encoding="utf-8") as f:
+        f.write(source)
+    print(f"[INFO] Before: {APP} at {before}; after: working tree")
+
+    rows = []
+    try:
+        for name, path in ((f"Before ({before})", BEFORE_COPY), ("After (engine)", APP)):
+            import_s, info = measure(IMPORT_CODE, [path], args.repeat, args.timeout, name)
+            paint_s = None
+            if not args.skip_paint:
+                paint_s, _ = measure(PAINT_CODE, [path, str(args.timeout)], args.repeat, args.timeout, name)
+            rows.append((name, import_s, ", ".join(info["heavy"]) or "-", paint_s))
+        ready_s = None
+        if not args.skip_paint:
+            ready_s, _ = measure(READY_CODE, [], args.repeat, args.timeout, "Engine warm-up")
+    finally:
+        os.remove(before_path)
+
+    print("\n| App                  | Import (s) | Heavy modules imported                   | First paint (s) |")
+    print("|----------------------|------------|------------------------------------------|-----------------|")
+    for name, import_s, heavy, paint_s in rows:
+        paint = "-" if paint_s is None else f"{paint_s:.2f}"
+        print(f"| {name[:20]:<20} | {import_s:10.2f} | {heavy:<40} | {paint:>15} |")
+    if ready_s is not None:
+        print(f"\n[INFO] Engine ready (all components, foreground warm-up): {ready_s:.2f}s")
+        if rows[1][3]:
+            print(f"[INFO] First paint {rows[0][3] / rows[1][3]:,.0f}x sooner; the first RAG answer waits for "
+                  f"warm-up only if asked within {ready_s:.1f}s of start")
+
+
+if __name__ == "__main__":
+    main()
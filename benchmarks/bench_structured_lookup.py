@@ -0,0 +1,127 @@
+"""Latency of fee / processing-time questions answered from the lookup table vs the full RAG path.
+
+Every question in benchmarks/data/structured_queries.jsonl carries the route it should take
+("fee", "processing_time" or null for RAG). The first table checks the router's decisions and
+times them; declined questions pay that time on top of RAG. The second times the app's full
+path (embed, hybrid search, rerank, pack, generate) on the routed questions, next to the
+routed lookup for the same questions.
+
+Run from the repository root:
+    python benchmarks/bench_structured_lookup.py --llm google/flan-t5-base --limit 10
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from ircc_rag.bm25 import BM25_FILE, BM25Index, hybrid_search  # noqa: E402
+from ircc_rag.chunk_store import open_chunks  # noqa: E402
+from ircc_rag.context_packer import ContextPacker  # noqa: E402
+from ircc_rag.index_factory import configure_search  # noqa: E402
+from ircc_rag.llm_backend import load_generator  # noqa: E402
+from ircc_rag.reranker import RERANK_CANDIDATES, Reranker  # noqa: E402
+from ircc_rag.structured_lookup import IntentRouter, LookupTable  # noqa: E402
+from ircc_rag.shared_store import resolve_store  # noqa: E402
+
+QUERIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "structured_queries.jsonl")
+
+
+def percentiles(times_ms):
+    p50, p95 = np.percentile(times_ms, [50, 95])
+    return p50, p95
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default="data/scraped_json")
+    parser.add_argument("--vector-dir", default="vector_store")
+    parser.add_argument("--queries", default=QUERIES_FILE)
+    parser.add_argument("--embed-model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--llm", default="google/flan-t5-xl")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--max-new-tokens", type=int, default=128)
+    parser.add_argument("--limit", type=int, default=0, help="Routed questions sent through RAG (0 = all).")
+    parser.add_argument("--no-rerank", action="store_true")
+    parser.add_argument("--skip-rag", action="store_true", help="Router table only, no models loaded.")
+    args = parser.parse_args()
+    args.vector_dir = resolve_store(args.vector_dir)
+
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = [json.loads(line) for line in f if line.strip()]
+    start = time.perf_counter()
+    router = IntentRouter(LookupTable.load(args.data_dir))
+    print(f"[INFO] Lookup table loaded in {(time.perf_counter() - start) * 1000:.1f} ms: "
+          f"{len(router.table.times)} processing times, {len(router.table.fees)} fees")
+
+    routed, routed_ms, declined_ms, correct = [], [], [], 0
+    for q in queries:
+        start = time.perf_counter()
+        answer = router.route(q["query"])
+        elapsed = (time.perf_counter() - start) * 1000
+        got = answer.intent if answer else None
+        correct += got == q["route"]
+        if got != q["route"]:
+            print(f"[WARN] Expected {q['route']}, routed {got}: {q['query']}")
+        if answer is not None:
+            routed.append(q["query"])
+            routed_ms.append(elapsed)
+        else:
+            declined_ms.append(elapsed)
+
+    print("\n| Router      | Questions | Correct route | p50 (ms) | p95 (ms) |")
+    print("|-------------|-----------|---------------|----------|----------|")
+    for name, times in (("Answered", routed_ms), ("Sent to RAG", declined_ms)):
+        if times:
+            p50, p95 = percentiles(times)
+            print(f"| {name:<11} | {len(times):9d} | {'':13} | {p50:8.3f} | {p95:8.3f} |")
+    print(f"| {'All':<11} | {len(queries):9d} | {correct / len(queries):13.0%} | {'':8} | {'':8} |")
+    if args.skip_rag or not routed:
+        return
+
+    from sentence_transformers import SentenceTransformer
+
+    index = faiss.read_index(os.path.join(args.vector_dir, "index.faiss"))
+    configure_search(index)
+    chunks = open_chunks(args.vector_dir)
+    bm25_path = os.path.join(args.vector_dir, BM25_FILE)
+    bm25 = BM25Index.load(bm25_path) if os.path.exists(bm25_path) else None
+    embedder = SentenceTransformer(args.embed_model)
+    reranker = None if args.no_rerank else Reranker()
+    llm_pipe = load_generator(args.llm)
+    packer = ContextPacker(llm_pipe.tokenizer)
+    llm_pipe("warm up", max_new_tokens=4)
+
+    rag_ms = []
+    for question in routed[:args.limit or None]:
+        start = time.perf_counter()
+        emb = embedder.encode([question], normalize_embeddings=True).astype("float32")
+        depth = RERANK_CANDIDATES if reranker is not None else args.k
+        if bm25 is not None:
+            ids = hybrid_search(index, bm25, question, emb, depth, max(20, depth))
+        else:
+            ids = index.search(emb, depth)[1][0]
+        sources = [chunks[i] for i in ids if i in chunks]
+        if reranker is not None:
+            sources, _ = reranker.rerank(question, sources, args.k)
+        prompt, _ = packer.pack(question, sources[:args.k], [])
+        llm_pipe(prompt, max_new_tokens=args.max_new_tokens)
+        rag_ms.append((time.perf_counter() - start) * 1000)
+
+    rag_p50, rag_p95 = percentiles(rag_ms)
+    lookup_p50, lookup_p95 = percentiles(routed_ms[:len(rag_ms)])
+    print(f"\n[INFO] {len(rag_ms)} routed questions, generator {args.llm}, "
+          f"{'no rerank' if reranker is None else 'reranked'}, {args.max_new_tokens} max new tokens")
+    print("\n| Path          | p50 (ms) | p95 (ms) |")
+    print("|---------------|----------|----------|")
+    print(f"| Full RAG      | {rag_p50:8.1f} | {rag_p95:8.1f} |")
+    print(f"| Lookup table  | {lookup_p50:8.3f} | {lookup_p95:8.3f} |")
+    print(f"\n[INFO] Speed-up at p50: {rag_p50 / max(lookup_p50, 1e-6):,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Cost of the tracing layer (ircc_rag.tracing) relative to the work it measures.
+
+1. Span cost: ns per `with trace.span(...)` including the histogram update, against an
+   empty loop.
+2. Turn cost: one traced chat turn's worth of bookkeeping (the app's lookup, embed, search,
+   rerank, pack and generate spans plus trace.finish()) with no work inside the spans.
+3. Overhead: (2) as a share of the cheapest real RAG turn, an uncached query embedding plus
+   hybrid search and chunk decoding on a real vector store. Generation makes real turns
+   seconds long, so the share there is far smaller still.
+4. Export cost: rendering the Prometheus text.
+
+Run from the repository root:
+    python benchmarks/bench_tracing_overhead.py --vector-dir vector_store --turns 500
+"""
+import os
+import sys
+import time
+import argparse
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from ircc_rag.bm25 import BM25_FILE, BM25Index, hybrid_search  # noqa: E402
+from ircc_rag.chunk_store import open_chunks  # noqa: E402
+from ircc_rag.index_factory import configure_search  # noqa: E402
+from ircc_rag.tracing import Tracer  # noqa: E402
+from ircc_rag.shared_store import resolve_store  # noqa: E402
+
+STAGES = ("lookup", "embed", "search", "rerank", "pack", "generate")
+QUESTIONS = ["How much is a study permit?", "Who needs to give biometrics?", "What is Express Entry?",
+             "Can I work while studying?", "What is form IMM 5257 used for?", "Proof of funds for 3 people"]
+
+
+def span_cost_ns(n: int) -> float:
+    trace = Tracer().start()
+    start = time.perf_counter_ns()
+    for _ in range(n):
+        pass
+    empty = time.perf_counter_ns() - start
+    start = time.perf_counter_ns()
+    for _ in range(n):
+        with trace.span("search"):
+            pass
+    return (time.perf_counter_ns() - start - empty) / n
+
+
+def turn_cost_us(n: int, tracer: Tracer) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        trace = tracer.start()
+        for stage in STAGES:
+            with trace.span(stage):
+                pass
+        trace.set(reranked=True, prompt_tokens=300, token_budget=512)
+        trace.finish(route="rag", cache="miss", first_token_s=0.8, prompt_tokens=300, new_tokens=40)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vector-dir", default="vector_store")
+    parser.add_argument("--embed-model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--spans", type=int, default=200000)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+    args.vector_dir = resolve_store(args.vector_dir)
+
+    from sentence_transformers import SentenceTransformer
+
+    tracer = Tracer()
+    span_ns = span_cost_ns(args.spans)
+    turn_us = turn_cost_us(args.spans // len(STAGES), tracer)
+
+    index = faiss.read_index(os.path.join(args.vector_dir, "index.faiss"))
+    configure_search(index)
+    chunks = open_chunks(args.vector_dir)
+    bm25_path = os.path.join(args.vector_dir, BM25_FILE)
+    bm25 = BM25Index.load(bm25_path) if os.path.exists(bm25_path) else None
+    model = SentenceTransformer(args.embed_model)
+
+    def retrieval_turn(question: str):
+        emb = np.ascontiguousarray(model.encode([question], normalize_embeddings=True), dtype="float32")
+        if bm25 is not None:
+            ids = hybrid_search(index, bm25, question, emb, args.k)
+        else:
+            ids = index.search(emb, args.k)[1][0]
+        return [chunks[j]["text"] for j in ids if j in chunks]
+
+    for question in QUESTIONS:  # Warm-up: page in the model, index and chunk store
+        retrieval_turn(question)
+    times = []
+    for i in range(args.turns):
+        start = time.perf_counter()
+        retrieval_turn(f"{QUESTIONS[i % len(QUESTIONS)]} ({i})")  # Distinct text: no tokenizer-level reuse
+        times.append(time.perf_counter() - start)
+    retrieval_us = float(np.median(times)) * 1e6
+
+    start = time.perf_counter()
+    text = tracer.metrics.render()
+    render_ms = (time.perf_counter() - start) * 1000
+
+    print(f"[INFO] {'hybrid' if bm25 is not None else 'dense'} search, k={args.k}, {index.ntotal} vectors, "
+          f"{args.embed_model}")
+    rows = [
+        ("Span (enter/exit + histogram)", f"{span_ns:.0f} ns"),
+        (f"Tracing per turn ({len(STAGES)} spans + finish)", f"{turn_us:.1f} µs"),
+        ("Cheapest RAG turn (embed + search), p50", f"{retrieval_us:.1f} µs"),
+        ("Overhead vs that turn", f"{turn_us / retrieval_us:.2%}"),
+        (f"Render {len(text.splitlines())} metric lines", f"{render_ms:.2f} ms"),
+    ]
+    print("\n| Measure                                   |        Value |")
+    print("|-------------------------------------------|--------------|")
+    for name, value in rows:
+        print(f"| {name:<41} | {value:>12} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""Retrieval and end-to-end evaluation of a vector store, written as JSON so runs can be compared.
+
+Questions come from a versioned set (benchmarks/data/eval_questions_v2.jsonl): each has the
+source file(s) that should be retrieved and, where the answer is a checkable fact, snippets
+the answer must contain; "out_of_domain" questions have neither and should be gated. Per
+question the pipeline runs the app's stages (embed, hybrid or dense search, optional rerank,
+score gating / adaptive k with --gate / --adaptive-k, expansion of small chunks to their parent
+sections for parent-child stores, and in e2e mode pack + generate) and reports; retrieval goes
+through RAGEngine.rank_chunks(), the code the app and batch_answer.py run:
+  - recall@k and hit@k over expected source files, MRR (in-domain questions);
+  - context match: share of expected snippets present in the retrieved chunks;
+  - answer match (e2e): share of expected snippets present in the generated answer;
+  - chunks (or parent sections) forwarded per question, their stored token count (context tokens)
+    and, in e2e mode, the prompt tokens after packing;
+  - the share of in-domain / out-of-domain questions gated;
+  - p50/p95/p99 latency per stage and peak RSS;
+  - calibration: best dense (and, with --rerank, cross-encoder) score per question, and the
+    gating threshold that keeps --min-keep of in-domain questions while gating the most
+    out-of-domain ones, next to the current one in src/ircc_rag/relevance.py.
+
+Tune one thing at a time (chunker, TOP_K_RETRIEVAL, EMBED_MODEL, --index-type) and compare:
+    python benchmarks/eval_rag.py --vector-dir vector_store --k 3 --output before.json
+    python benchmarks/eval_rag.py --vector-dir vector_store_ivf --k 3 --baseline before.json
+    python benchmarks/eval_rag.py --mode e2e --llm google/flan-t5-base --limit 10
+    python benchmarks/eval_rag.py --rerank --gate --adaptive-k --baseline before.json
+
+Parent-child vs flat chunks (answer quality and prompt tokens):
+    python scripts/embed_documents.py --full --chunking flat --vector-dir vector_store_flat
+    python benchmarks/eval_rag.py --mode e2e --vector-dir vector_store_flat --output flat.json
+    python benchmarks/eval_rag.py --mode e2e --vector-dir vector_store --baseline flat.json
+"""
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import datetime
+import resource
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from ircc_rag import engine as rag  # noqa: E402
+from ircc_rag.context_packer import TOKEN_BUDGET, ContextPacker  # noqa: E402
+from ircc_rag.index_factory import configure_search  # noqa: E402
+from ircc_rag.relevance import MIN_DENSE_SCORE, MIN_RERANK_SCORE  # noqa: E402
+from ircc_rag.tracing import Trace, Tracer  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+QUESTIONS_FILE = os.path.join(BENCH_DIR, "data", "eval_questions_v2.jsonl")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+STAGES = ("embed", "search", "rerank", "pack", "generate", "total")
+HEADLINE = ("recall@k", "hit@k", "mrr", "context_match", "answer_match", "chunks", "context_tokens",
+            "prompt_tokens", "in_domain_gated", "out_of_domain_gated")
+OUT_OF_DOMAIN = "out_of_domain"  # Question kind with no expected sources: the right outcome is no answer
+
+
+def load_questions(path: str):
+    with open(path, "rb") as f:
+        raw = f.read()
+    questions = [json.loads(line) for line in raw.decode("utf-8").splitlines() if line.strip()]
+    version = {"file": os.path.basename(path), "sha256": hashlib.sha256(raw).hexdigest()[:16],
+               "questions": len(questions)}
+    return questions, version
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text.lower()).strip()
+
+
+def snippet_match(text: str, snippets: List[str]) -> Optional[float]:
+    """Share of expected snippets found in `text`; None when the question has none to check."""
+    if not snippets:
+        return None
+    text = normalize(text)
+    return sum(normalize(s) in text for s in snippets) / len(snippets)
+
+
+def rank_metrics(sources: List[str], expected: List[str], k: int) -> Dict[str, float]:
+    ranked = list(dict.fromkeys(sources))[:k]  # Unique files in retrieval order
+    found = [s for s in ranked if s in expected]
+    rr = next((1.0 / rank for rank, s in enumerate(ranked, start=1) if s in expected), 0.0)
+    return {"recall@k": len(found) / min(len(expected), k), "hit@k": float(bool(found)), "mrr": rr}
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": round(p50, 3), "p95": round(p95, 3), "p99": round(p99, 3), "mean": round(float(np.mean(values)), 3)}
+
+
+def mean_of(rows: List[Dict], key: str) -> Optional[float]:
+    values = [r[key] for r in rows if r.get(key) is not None]
+    return round(float(np.mean(values)), 4) if values else None
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+
+def store_info(vector_dir: str, index) -> Dict:
+    info = {"vector_dir": vector_dir, "index": type(index).__name__, "vectors": index.ntotal}
+    manifest_path = os.path.join(vector_dir, "build_manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        info.update({k: v for k, v in manifest.items() if k != "files"})
+    return info
+
+
+def summarize(rows: List[Dict]) -> Dict:
+    summary = {key: mean_of(rows, key) for key in HEADLINE}
+    summary["latency_ms"] = {stage: latency_summary([r["ms"][stage] for r in rows])
+                             for stage in STAGES if all(stage in r["ms"] for r in rows)}
+    return summary
+
+
+def calibration(rows: List[Dict], scorer: str, current: float, min_keep: float) -> Optional[Dict]:
+    """Best-score distributions and the threshold keeping `min_keep` of in-domain questions, set midway
+    to the next out-of-domain score below it."""
+    key = f"{scorer}_top"
+    inside = sorted(r["scores"][key] for r in rows if r["kind"] != OUT_OF_DOMAIN and r["scores"][key] is not None)
+    outside = sorted(r["scores"][key] for r in rows if r["kind"] == OUT_OF_DOMAIN and r["scores"][key] is not None)
+    if not inside or not outside:
+        return None
+    keep_floor = inside[int((1 - min_keep) * len(inside))]  # Lowest in-domain score that must pass
+    below = [x for x in outside if x < keep_floor]
+    recommended = (keep_floor + below[-1]) / 2 if below else keep_floor
+
+    def at(threshold):
+        return {"threshold": round(threshold, 4),
+                "in_domain_kept": round(float(np.mean([x >= threshold for x in inside])), 4),
+                "out_of_domain_gated": round(float(np.mean([x < threshold for x in outside])), 4)}
+
+    return {
+        "scorer": scorer,
+        "in_domain": {"min": inside[0], "p10": round(float(np.percentile(inside, 10)), 4),
+                      "median": round(float(np.median(inside)), 4)},
+        "out_of_domain": {"median": round(float(np.median(outside)), 4),
+                          "p90": round(float(np.percentile(outside, 90)), 4), "max": outside[-1]},
+        "current": at(current),
+        "recommended": at(recommended),
+    }
+
+
+def print_report(report: Dict, baseline: Optional[Dict]):
+    summary = report["summary"]
+    k = report["config"]["k"]
+    chunking = report["config"]["store"].get("chunking", "flat")
+    print(f"\n[INFO] {report['question_set']['file']} ({report['question_set']['sha256']}), "
+          f"{len(report['questions'])} questions, mode={report['config']['mode']}, k={k}, {chunking} chunks")
+    print("\n| Metric              |   Value | Baseline |   Delta |")
+    print("|---------------------|---------|----------|---------|")
+    for key in HEADLINE:
+        value = summary[key]
+        if value is None:
+            continue
+        digits = 1 if key.endswith("tokens") else 3
+        old = baseline["summary"].get(key) if baseline else None
+        delta = f"{value - old:+.{digits}f}" if old is not None else ""
+        old = f"{old:.{digits}f}" if old is not None else ""
+        print(f"| {key.replace('@k', f'@{k}'):<19} | {value:7.{digits}f} | {old:>8} | {delta:>7} |")
+
+    print("\n| Stage    | p50 (ms) | p95 (ms) | p99 (ms) | Baseline p50 |")
+    print("|----------|----------|----------|----------|--------------|")
+    for stage, lat in summary["latency_ms"].items():
+        old = baseline["summary"]["latency_ms"].get(stage, {}).get("p50") if baseline else None
+        old = f"{old:.1f}" if old is not None else ""
+        print(f"| {stage:<8} | {lat['p50']:8.1f} | {lat['p95']:8.1f} | {lat['p99']:8.1f} | {old:>12} |")
+    print(f"\n[INFO] Peak RSS: {report['peak_rss_mb']:.0f} MB")
+
+    print("\n| Kind         | Questions | hit@k |  MRR |")
+    print("|--------------|-----------|-------|------|")
+    for kind, row in report["by_kind"].items():
+        print(f"| {kind:<12} | {row['questions']:9d} | {row['hit@k']:.2f} | {row['mrr']:.2f} |")
+
+    for cal in report["calibration"]:
+        print(f"\n[INFO] Best {cal['scorer']} score: in-domain min {cal['in_domain']['min']:.3f} · "
+              f"p10 {cal['in_domain']['p10']:.3f} · median {cal['in_domain']['median']:.3f}; out-of-domain median "
+              f"{cal['out_of_domain']['median']:.3f} · p90 {cal['out_of_domain']['p90']:.3f} · "
+              f"max {cal['out_of_domain']['max']:.3f}")
+        print(f"| {cal['scorer'].capitalize() + ' threshold':<22} |    Value | In-domain kept | Out-of-domain gated |")
+        print("|------------------------|----------|----------------|---------------------|")
+        for name in ("current", "recommended"):
+            row = cal[name]
+            print(f"| {name.capitalize():<22} | {row['threshold']:8.3f} | {row['in_domain_kept']:14.0%} "
+                  f"| {row['out_of_domain_gated']:19.0%} |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("retrieval", "e2e"), default="retrieval")
+    parser.add_argument("--vector-dir", default="vector_store")
+    parser.add_argument("--questions", default=QUESTIONS_FILE)
+    parser.add_argument("--embed-model", default=rag.EMBED_MODEL)
+    parser.add_argument("--retrieval", choices=("hybrid", "dense"), default="hybrid")
+    parser.add_argument("--k", type=int, default=3, help="TOP_K_RETRIEVAL")
+    parser.add_argument("--rerank", action="store_true", help="Cross-encoder over RERANK_CANDIDATES first.")
+    parser.add_argument("--gate", action="store_true", help="Skip questions whose best score is under threshold.")
+    parser.add_argument("--adaptive-k", action="store_true", help="Cut k at a score gap (dense or reranked order).")
+    parser.add_argument("--no-parents", action="store_true",
+                        help="Parent-child stores: forward the matched small chunks, not their sections.")
+    parser.add_argument("--min-keep", type=float, default=1.0,
+                        help="Share of in-domain questions the recommended threshold must keep.")
+    parser.add_argument("--nprobe", type=int, default=rag.SEARCH_NPROBE)
+    parser.add_argument("--ef-search", type=int, default=rag.SEARCH_EF_SEARCH)
+    parser.add_argument("--llm", default=rag.LOCAL_LLM_MODEL)
+    parser.add_argument("--backend", default="fp32")
+    parser.add_argument("--token-budget", type=int, default=TOKEN_BUDGET)
+    parser.add_argument("--max-new-tokens", type=int, default=128)
+    parser.add_argument("--limit", type=int, default=0, help="First N questions only (0 = all).")
+    parser.add_argument("--output", help="JSON report path (default: benchmarks/results/eval-<mode>-<time>.json).")
+    parser.add_argument("--baseline", help="Earlier JSON report to print deltas against.")
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    questions, version = load_questions(args.questions)
+    questions = questions[:args.limit or None]
+    # The app's engine with the evaluated settings; no generation server, lookup routing or metric exports.
+    engine = rag.RAGEngine(args.vector_dir, args.llm, args.backend, generation_server_url=None,
+                           use_reranker=args.rerank, use_structured_lookup=False, tracer=Tracer(),
+                           score_gating=args.gate, adaptive_top_k=args.adaptive_k,
+                           parent_context=not args.no_parents, draft_model=None)
+    engine.retrieval_mode = args.retrieval
+    store = engine.store
+    configure_search(store.index, nprobe=args.nprobe, ef_search=args.ef_search)
+    # Embedded here rather than through the engine's cache, so latency is the model's on every run.
+    embedder = SentenceTransformer(args.embed_model)
+    embedder.encode(["warm up"])
+    if engine.reranker is not None:
+        engine.reranker.scores("warm up", ["warm up"])
+    llm_pipe, packer = None, None
+    if args.mode == "e2e":
+        llm_pipe = engine.llm_pipe
+        packer = ContextPacker(llm_pipe.tokenizer, args.token_budget)
+        llm_pipe("warm up", max_new_tokens=4)
+    hybrid = store.bm25 is not None and args.retrieval == "hybrid"
+    parents = store.parents is not None and not args.no_parents
+    print(f"[INFO] {len(questions)} questions, {'hybrid' if hybrid else 'dense'} retrieval, "
+          f"{'reranked, ' if engine.reranker is not None else ''}{'parent sections, ' if parents else ''}"
+          f"mode={args.mode}")
+
+    rows = []
+    for q in questions:
+        trace = Trace()
+        with trace.span("embed"):
+            emb = np.ascontiguousarray(embedder.encode([q["question"]], normalize_embeddings=True), dtype="float32")
+        retrieved, scores = engine.rank_chunks([q["question"]], emb, args.k, trace)[0]
+        ms = {stage: trace.timings[f"{stage}_ms"] for stage in ("embed", "search", "rerank")
+              if f"{stage}_ms" in trace.timings}
+
+        kind = q.get("kind", "")
+        # A chunk merged from several files at build time counts for each of them.
+        sources = [s for c in retrieved for s in (c.get("sources") or [c["source"]])]
+        row = {"id": q["id"], "kind": kind, "sources": sources, "scores": scores}
+        if kind == OUT_OF_DOMAIN:
+            row["out_of_domain_gated"] = float(scores["gate"] is not None)
+        else:
+            row.update(rank_metrics(row["sources"], q["expected_sources"], args.k))
+            row["context_match"] = snippet_match(" ".join(c["text"] for c in retrieved), q["expected_snippets"])
+            row["chunks"] = len(retrieved)
+            row["context_tokens"] = sum(c.get("tokens") or 0 for c in retrieved)
+            row["in_domain_gated"] = float(scores["gate"] is not None)
+        if llm_pipe is not None and not retrieved:
+            ms["pack"] = ms["generate"] = 0.0  # Gated: nothing is generated
+            row.update(answer="", prompt_tokens=None, answer_match=snippet_match("", q["expected_snippets"]))
+        elif llm_pipe is not None:
+            start = time.perf_counter()
+            prompt, pack_stats = packer.pack(q["question"], retrieved, [])
+            ms["pack"] = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            answer = llm_pipe(prompt, max_new_tokens=args.max_new_tokens)[0]["generated_text"].strip()
+            ms["generate"] = (time.perf_counter() - start) * 1000
+            row.update(answer=answer, prompt_tokens=pack_stats.tokens_used,
+                       answer_match=snippet_match(answer, q["expected_snippets"]))
+        ms["total"] = (time.perf_counter() - trace.started) * 1000
+        row["ms"] = {stage: round(v, 3) for stage, v in ms.items()}
+        rows.append(row)
+
+    by_kind = defaultdict(list)
+    for row in rows:
+        by_kind[row["kind"]].append(row)
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "question_set": version,
+        "config": dict(vars(args), store=store_info(store.path, store.index)),
+        "summary": summarize(rows),
+        "by_kind": {kind: {"questions": len(r), "hit@k": mean_of(r, "hit@k"), "mrr": mean_of(r, "mrr")}
+                    for kind, r in sorted(by_kind.items()) if kind != OUT_OF_DOMAIN},
+        "calibration": [cal for cal in (calibration(rows, "dense", MIN_DENSE_SCORE, args.min_keep),
+                                        calibration(rows, "rerank", MIN_RERANK_SCORE, args.min_keep)) if cal],
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "questions": rows,
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["question_set"]["sha256"] != version["sha256"]:
+            print(f"[WARN] Baseline used question set {baseline['question_set']['file']} "
+                  f"({baseline['question_set']['sha256']}); metrics are not directly comparable")
+    print_report(report, baseline)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"eval-{args.mode}-{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n[DONE] Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Local HTTP stand-in for canada.ca serving fixture PDFs.
+
+Files are generated deterministically from their name, so nothing needs to be checked in.
+The server sends ETag/Last-Modified and answers conditional GETs with 304. It can add
+per-request latency, cap per-connection bandwidth, and fail a share of requests with 503
+to exercise retries.
+
+Run standalone (then point the downloader at --links written by --write-links):
+    python benchmarks/pdf_stand_in_server.py --files 40 --size-kb 1024 --write-links /tmp/links.json
+"""
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+
+LAST_MODIFIED = formatdate(1_700_000_000, usegmt=True)
+
+
+def fixture_pdf(name: str, size: int) -> bytes:
+    seed = int(hashlib.sha1(name.encode("utf-8")).hexdigest()[:8], 16)
+    body = random.Random(seed).randbytes(max(0, size - 32))
+    return b"%PDF-1.4\n% stand-in fixture\n" + body + b"\n%%EOF\n"
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, n_files: int, size: int, latency_ms: float = 0.0,
+                 bandwidth_kbps: Optional[float] = None, fail_rate: float = 0.0, seed: int = 0):
+        super().__init__(address, _Handler)
+        self.files = {f"manual_{i:03d}.pdf": fixture_pdf(f"manual_{i:03d}", size) for i in range(n_files)}
+        self.etags = {name: f'"{hashlib.md5(data).hexdigest()}"' for name, data in self.files.items()}
+        self.latency_ms = latency_ms
+        self.bandwidth_kbps = bandwidth_kbps
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {"200": 0, "304": 0, "503": 0}
+
+    def count(self, status: int):
+        with self.lock:
+            self.counters[str(status)] = self.counters.get(str(status), 0) + 1
+
+    def links(self) -> List[dict]:
+        host, port = self.server_address[:2]
+        return [{"title": f"{name[:-4]} (PDF)", "url": f"http://{host}:{port}/files/{name}"} for name in self.files]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server: StandInServer = self.server
+        if server.latency_ms:
+            time.sleep(server.latency_ms / 1000)
+        name = self.path.rsplit("/", 1)[-1]
+        if name not in server.files:
+            self._empty(404)
+            return
+        with server.lock:
+            fail = server.rng.random() < server.fail_rate
+        if fail:
+            self._empty(503, {"Retry-After": "0"})
+            return
+        etag = server.etags[name]
+        if self.headers.get("If-None-Match") == etag or self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            self._empty(304, {"ETag": etag, "Last-Modified": LAST_MODIFIED})
+            return
+
+        data = server.files[name]
+        server.count(200)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        step = 64 * 1024
+        for start in range(0, len(data), step):
+            self.wfile.write(data[start:start + step])
+            if server.bandwidth_kbps:
+                time.sleep(step / 1024 / server.bandwidth_kbps)
+
+    def _empty(self, status: int, headers: Optional[dict] = None):
+        self.server.count(status)
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+def start_server(n_files: int, size: int, **kwargs) -> Tuple[StandInServer, threading.Thread]:
+    """Serve on an ephemeral localhost port from a background thread."""
+    server = StandInServer(("127.0.0.1", 0), n_files, size, **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--size-kb", type=int, default=1024)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--bandwidth-kbps", type=float, default=2048, help="Per connection.")
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--write-links", help="Write a manuals_links.json-style file for these files.")
+    args = parser.parse_args()
+
+    server = StandInServer(("127.0.0.1", args.port), args.files, args.size_kb * 1024, args.latency_ms,
+                           args.bandwidth_kbps, args.fail_rate)
+    if args.write_links:
+        with open(args.write_links, "w", encoding="utf-8") as f:
+            json.dump(server.links(), f, indent=2)
+    print(f"[INFO] Serving {args.files} fixture PDFs on http://127.0.0.1:{args.port}/files/")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,173 @@
 import os
 import json
-import requests
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+import tempfile
+from collections import Counter
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import aiohttp
 
 # Paths
 LINKS_FILE = "data/manuals_links.json"
 PDF_FOLDER = "data/manuals_pdfs"
+MANIFEST_NAME = "download_manifest.json"
+
+# Config
+MAX_CONNECTIONS = 16   # Whole connection pool
+PER_HOST_LIMIT = 4     # canada.ca serves every manual; stay polite per host
+RETRIES = 4
+BACKOFF_BASE_S = 0.5   # 0.5, 1, 2, 4 s (+ jitter) between attempts
+TIMEOUT_S = 120
+CHUNK_SIZE = 1 << 16
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def pdf_filename(title: str) -> str:
+    title = title.split("(")[0].strip()  # Remove size info from title
+    return title.replace("/", "-").replace(" ", "_").replace("__", "_") + ".pdf"
+
+
+def pdf_filenames(items: List[Dict]) -> List[str]:
+    """pdf_filename() per item; titles shared by several URLs (two manuals are both "Adoptions")
+    get the URL's file name appended, so every URL has its own file."""
+    names = [pdf_filename(item["title"]) for item in items]
+    counts = Counter(names)
+    return [f"{name[:-4]}_{os.path.splitext(os.path.basename(urlparse(item['url']).path))[0]}.pdf"
+            if counts[name] > 1 else name for name, item in zip(names, items)]
+
+
+def load_manifest(path: str) -> Dict[str, Dict]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError:
+            return {}
+
+
+def save_manifest(manifest: Dict[str, Dict], path: str):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return BACKOFF_BASE_S * (2 ** attempt) * (1 + random.random() / 2)
+
+
+async def download_one(session: aiohttp.ClientSession, url: str, filepath: str, entry: Optional[Dict]) -> Dict:
+    """Conditional GET streamed to disk; returns the new manifest entry plus a `status`."""
+    headers = {}
+    if entry and os.path.exists(filepath):
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    error, tmp_path = None, None
+    for attempt in range(RETRIES + 1):
+        try:
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304:
+                    if entry is None:
+                        return {"url": url, "status": "failed", "error": "HTTP 304 without a cached copy"}
+                    return dict(entry, status="unchanged", checked=time.time())
+                if response.status in RETRY_STATUSES:
+                    error = f"HTTP {response.status}"
+                    if attempt < RETRIES:
+                        await asyncio.sleep(_retry_delay(attempt, response.headers.get("Retry-After")))
+                    continue
+                response.raise_for_status()
+
+                # Stream into a temp file of its own next to the target, so a failed transfer never
+                # replaces a good PDF.
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(filepath) or ".",
+                                                prefix=os.path.basename(filepath) + ".", suffix=".part")
+                sha, size = hashlib.sha256(), 0
+                with os.fdopen(fd, "wb") as f:
+                    async for block in response.content.iter_chunked(CHUNK_SIZE):
+                        f.write(block)
+                        sha.update(block)
+                        size += len(block)
+                os.replace(tmp_path, filepath)
+                return {
+                    "url": url,
+                    "file": os.path.basename(filepath),
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "size": size,
+                    "sha256": sha.hexdigest(),
+                    "checked": time.time(),
+                    "status": "downloaded",
+                }
+        except aiohttp.ClientResponseError as e:
+            return {"url": url, "status": "failed", "error": f"HTTP {e.status}"}  # 4xx: retrying will not help
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = f"{type(e).__name__}: {e}"
+            if attempt < RETRIES:
+                await asyncio.sleep(_retry_delay(attempt))
+        except OSError as e:  # Disk full, permissions: this URL fails, the others carry on
+            return {"url": url, "status": "failed", "error": f"{type(e).__name__}: {e}"}
+        finally:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            tmp_path = None
+    return {"url": url, "status": "failed", "error": error}
+
+
+async def download_all(items: List[Dict], pdf_folder: str = PDF_FOLDER, manifest_path: Optional[str] = None,
+                       max_connections: int = MAX_CONNECTIONS, per_host: int = PER_HOST_LIMIT) -> Dict[str, int]:
+    os.makedirs(pdf_folder, exist_ok=True)
+    manifest_path = manifest_path or os.path.join(pdf_folder, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    counts = {"downloaded": 0, "unchanged": 0, "failed": 0}
+    connector = aiohttp.TCPConnector(limit=max_connections, limit_per_host=per_host)
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT_S)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async def fetch(i: int, item: Dict, filename: str):
+            result = await download_one(session, item["url"], os.path.join(pdf_folder, filename),
+                                        manifest.get(item["url"]))
+            status = result.pop("status")
+            counts[status] += 1
+            if status == "failed":
+                print(f"[{i}/{len(items)}] ✖ Failed to download: {filename} ({result['error']})")
+                return
+            manifest[item["url"]] = result
+            save_manifest(manifest, manifest_path)  # Single event loop: no concurrent writers
+            if status == "downloaded":
+                print(f"[{i}/{len(items)}] ➤ Saved {filename} ({result['size'] / 1e6:.2f} MB)")
+
+        await asyncio.gather(*(fetch(i, item, filename)
+                               for i, (item, filename) in enumerate(zip(items, pdf_filenames(items)), start=1)))
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download the IRCC manual PDFs listed in data/manuals_links.json.")
+    parser.add_argument("--links", default=LINKS_FILE)
+    parser.add_argument("--out", default=PDF_FOLDER)
+    parser.add_argument("--max-connections", type=int, default=MAX_CONNECTIONS)
+    parser.add_argument("--per-host", type=int, default=PER_HOST_LIMIT)
+    args = parser.parse_args(argv)
+
+    with open(args.links, "r", encoding="utf-8") as f:
+        pdf_list = json.load(f)
+    start = time.perf_counter()
+    counts = asyncio.run(download_all(pdf_list, args.out, None, args.max_connections, args.per_host))
+    print(f"\n✅ All PDFs processed in {time.perf_counter() - start:.1f}s: {counts['downloaded']} downloaded, "
+          f"{counts['unchanged']} unchanged, {counts['failed']} failed.")
+    return counts
+
 
-# Create folder if it doesn't exist
-os.makedirs(PDF_FOLDER, exist_ok=True)
-
-# Load links from JSON
-with open(LINKS_FILE, "r", encoding="utf-8") as f:
-    pdf_list = json.load(f)
-
-# Download all PDFs
-for i, item in enumerate(pdf_list, start=1):
-    title = item["title"].split("(")[0].strip()  # Remove size info from title
-    filename = title.replace("/", "-").replace(" ", "_").replace("__", "_") + ".pdf"
-    filepath = os.path.join(PDF_FOLDER, filename)
-    
-    print(f"[{i}/{len(pdf_list)}] Downloading: {title}")
-    
-    try:
-        response = requests.get(item["url"], timeout=20)
-        response.raise_for_status()
-        with open(filepath, "wb") as f:
-            f.write(response.content)
-        print(f"    ➤ Saved to: {filepath}")
-    except Exception as e:
-        print(f"    ✖ Failed to download: {title} ({e})")
-
-print("\n✅ All PDFs processed.")
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
 import requests
 from bs4 import BeautifulSoup
 import json
+import datetime
 
 URL = "https://www.cic.gc.ca/english/information/fees/fees.asp"
 
 def scrape_fees():
     res = requests.get(URL)
+    retrieved = datetime.date.today().isoformat()  # Read back as the "as of" date of fee answers
     soup = BeautifulSoup(res.text, "html.parser")
 
     fee_data = []
@@ -17,7 +19,7 @@ def scrape_fees():
         for row in rows:
             cells = [td.get_text(strip=True) for td in row.find_all("td")]
             if len(cells) == len(headers):
-                fee_data.append(dict(zip(headers, cells)))
+                fee_data.append(dict(zip(headers, cells), retrieved=retrieved))
 
     with open("ircc_fees.json", "w", encoding="utf-8") as f:
         json.dump(fee_data, f, indent=2, ensure_ascii=False)
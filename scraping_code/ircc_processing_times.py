@@ -1,6 +1,26 @@
-from playwright.sync_api import sync_playwright, TimeoutError
-import time
+import os
 import json
+import asyncio
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote, urljoin, urlparse
+
+import requests
+from playwright.async_api import async_playwright
+
+PAGE_URL = "https://www.canada.ca/en/immigration-refugees-citizenship/services/application/check-processing-times.html"
+OUTPUT_FILE = "ircc_processing_times_selected.json"
+CONTEXTS = 4        # Parallel browser contexts, one (category, subcategory) task at a time each
+WAIT_MS = 10000     # Upper bound for event-driven waits; nothing sleeps for a fixed time
+SETTLE_MS = 250     # DOM quiet time after a selection before a missing dependent dropdown counts as "none"
+
+FIELDFLOW = "select[id*=wb-auto][name*=wb-fieldflow]"
+CATEGORY_SELECTOR = f"{FIELDFLOW}:nth-of-type(1)"
+SUB_SELECTOR = f"{FIELDFLOW}:nth-of-type(2)"
+COUNTRY_SELECTOR = f"{FIELDFLOW}:nth-of-type(3)"
+PTIME_SELECTOR = "span[data-json-replace*='ptime']"
+UPDATED_SELECTOR = "span[data-json-replace*='lastupdated']"
 
 # Target countries only
 # TARGET_COUNTRIES = {"Nepal", "India", "Pakistan", "Bangladesh"}
@@ -14,134 +34,279 @@ TARGET_COUNTRIES = {
     "United Arab Emirates", "Saudi Arabia", "Yemen", "Ethiopia"
 }
 
-def scrape_processing_times():
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)  # Change to False to see browser
-        page = browser.new_page()
-        page.goto("https://www.canada.ca/en/immigration-refugees-citizenship/services/application/check-processing-times.html")
-        time.sleep(5)
-
-        results = []
-
-        # Main category dropdown
-        category_selector = "select[id*=wb-auto][name*=wb-fieldflow]:nth-of-type(1)"
-        page.wait_for_selector(category_selector)
-        categories = page.query_selector_all(f"{category_selector} option")[1:]
-
-        for category_option in categories:
-            category_value = category_option.get_attribute("value")
-            category_label = category_option.inner_text().strip()
-            print(f"\n[INFO] Category: {category_label}")
-            page.select_option(category_selector, category_value)
-            time.sleep(3)
-
-            # Subcategory dropdown
-            sub_selector = "select[id*=wb-auto][name*=wb-fieldflow]:nth-of-type(2)"
-            try:
-                page.wait_for_selector(sub_selector, timeout=10000)
-            except TimeoutError:
-                print("  [WARN] No subcategory found, skipping...")
-                continue
+# ---------- JSON DATA ----------
+class JsonData:
+    """Resolves `data-json-replace` references ("<json url>#/json/pointer") without the browser.
+
+    Every referenced file is fetched once. For a saved copy of the page, `json_base` maps the
+    site-absolute /content/dam/... paths onto a local directory (or another host).
+    """
+
+    def __init__(self, page_url: str, json_base: Optional[str] = None):
+        self.page_url = page_url
+        self.json_base = json_base
+        self._docs: Dict[str, object] = {}
+
+    def _url(self, ref_url: str) -> str:
+        if self.json_base and ref_url.startswith("/"):
+            return urljoin(self.json_base.rstrip("/") + "/", ref_url.lstrip("/"))
+        return urljoin(self.page_url, ref_url)
 
-            sub_options = page.query_selector_all(f"{sub_selector} option")[1:]
-            for sub_option in sub_options:
-                sub_value = sub_option.get_attribute("value")
-                sub_label = sub_option.inner_text().strip()
-                print(f"  [INFO] Subcategory: {sub_label}")
-                page.select_option(sub_selector, sub_value)
-                time.sleep(3)
-
-                # Try to detect if country dropdown exists
-                country_selector = "select[id*=wb-auto][name*=wb-fieldflow]:nth-of-type(3)"
-                country_dropdown_exists = True
+    def document(self, ref_url: str):
+        url = self._url(ref_url)
+        if url not in self._docs:
+            parsed = urlparse(url)
+            if parsed.scheme in ("http", "https"):
+                response = requests.get(url, timeout=30)
+                response.raise_for_status()
+                self._docs[url] = response.json()
+            else:
+                path = unquote(parsed.path) if parsed.scheme == "file" else url
+                with open(path, "r", encoding="utf-8") as f:
+                    self._docs[url] = json.load(f)
+        return self._docs[url]
+
+    def resolve(self, ref: str) -> str:
+        ref_url, _, pointer = ref.partition("#")
+        value = self.document(ref_url) if ref_url else None
+        for part in pointer.strip("/").split("/") if pointer.strip("/") else []:
+            part = part.replace("~1", "/").replace("~0", "~")
+            value = value[int(part)] if isinstance(value, list) else value[part]
+        if isinstance(value, (dict, list)) or value is None:
+            raise KeyError(f"{ref} does not point at a value")
+        return str(value).strip()
+
+
+def country_template(ref: Optional[str], country_value: str) -> Optional[str]:
+    """Turn one country's reference into a template by swapping its code segment for `{}`."""
+    if not ref or "#" not in ref or not country_value:
+        return None
+    ref_url, _, pointer = ref.partition("#")
+    parts = pointer.split("/")
+    if parts.count(country_value) != 1:
+        return None  # Country not (unambiguously) part of the pointer: values are not addressable
+    parts[parts.index(country_value)] = "{}"
+    return f"{ref_url}#{'/'.join(parts)}"
+
+# ---------- PROGRESS ----------
+def record_key(record: Dict) -> Tuple[str, str, Optional[str]]:
+    return record["category"], record["subcategory"], record["country"]
+
+def load_progress(path: str) -> List[Dict]:
+    """Records already written by an interrupted run (a torn last line is ignored)."""
+    records = []
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
                 try:
-                    page.wait_for_selector(country_selector, timeout=5000)
-                except TimeoutError:
-                    country_dropdown_exists = False
-                    print("    [INFO] No country dropdown found for this subcategory")
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+    return records
 
-                if country_dropdown_exists:
-                    countries = page.query_selector_all(f"{country_selector} option")[1:]
-                    for country_option in countries:
-                        country_value = country_option.get_attribute("value")
-                        country_label = country_option.inner_text().strip()
+class ProgressWriter:
+    """Appends one JSON line per result and flushes it, so a crash loses at most one row."""
 
-                        if country_label not in TARGET_COUNTRIES:
-                            continue
+    def __init__(self, path: str):
+        self.f = open(path, "a", encoding="utf-8")
 
-                        print(f"    🌍 Country: {country_label}")
-                        page.select_option(country_selector, country_value)
-                        time.sleep(2)
+    def write(self, record: Dict):
+        self.f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.f.flush()
 
-                        try:
-                            page.click("button.btn-submit")
-                            page.wait_for_selector("div.panel-body", timeout=10000)
+    def close(self):
+        self.f.close()
 
-                            processing_time_span = page.query_selector("span[data-json-replace*='ptime']")
-                            last_updated_span = page.query_selector("span[data-json-replace*='lastupdated']")
+# ---------- BROWSER ----------
+# Marks the dependent dropdown's current options as stale and records DOM mutations, so the wait
+# below sees the dropdown being rebuilt even when the new options equal the old ones.
+_MARK_JS = """selector => {
+    if (!window.__scrapeObserver) {
+        window.__scrapeObserver = new MutationObserver(() => { window.__scrapeLastMutation = performance.now(); });
+        window.__scrapeObserver.observe(document.body, {childList: true, subtree: true, attributes: true});
+    }
+    window.__scrapeLastMutation = performance.now();
+    document.querySelectorAll(`${selector} option`).forEach(o => { o.dataset.scrapeStale = "1"; });
+}"""
 
-                            processing_time = processing_time_span.inner_text().strip() if processing_time_span else "N/A"
-                            last_updated = last_updated_span.inner_text().strip() if last_updated_span else "N/A"
+# "options" once the dependent dropdown shows rebuilt options (or settles visible with options),
+# "none" once the DOM has settled with the dropdown hidden, absent or empty.
+_DEPENDENT_JS = """([selector, settleMs]) => {
+    const el = document.querySelector(selector);
+    const visible = !!el && el.offsetParent !== null;
+    const opts = visible ? Array.from(el.options).slice(1) : [];
+    if (opts.some(o => !o.dataset.scrapeStale)) return "options";
+    if (performance.now() - window.__scrapeLastMutation < settleMs) return false;
+    return opts.length ? "options" : "none";
+}"""
 
-                            print(f"      ⏱️ {processing_time} (Updated: {last_updated})")
+_CLEAR_RESULT_JS = """selector => document.querySelectorAll(selector).forEach(el => { el.textContent = ""; })"""
 
-                            results.append({
-                                "category": category_label,
-                                "subcategory": sub_label,
-                                "country": country_label,
-                                "processing_time": processing_time,
-                                "last_updated": last_updated
-                            })
+_RESULT_JS = """selector => {
+    const el = document.querySelector(selector);
+    const text = el ? el.textContent.trim() : "";
+    return text || false;
+}"""
 
-                        except Exception as e:
-                            print(f"      [ERROR] Could not extract result for {country_label}: {e}")
-                            results.append({
-                                "category": category_label,
-                                "subcategory": sub_label,
-                                "country": country_label,
-                                "processing_time": "N/A",
-                                "last_updated": "N/A"
-                            })
-
-                else:
-                    # No country dropdown → scrape directly for this subcategory
-                    print("    [INFO] Extracting data without country filter")
-                    try:
-                        page.click("button.btn-submit")
-                        page.wait_for_selector("div.panel-body", timeout=10000)
+async def options(page, selector: str) -> List[Tuple[str, str]]:
+    """(value, label) of a dropdown's options, skipping the placeholder."""
+    return (await page.eval_on_selector_all(
+        f"{selector} option", "opts => opts.map(o => [o.value, o.textContent.trim()])"))[1:]
+
+async def select_and_wait(page, selector: str, value: str, next_selector: str) -> bool:
+    """Select `value`, then wait for the dependent dropdown to be rebuilt; False if the selection has none."""
+    await page.evaluate(_MARK_JS, next_selector)
+    await page.select_option(selector, value)
+    handle = await page.wait_for_function(_DEPENDENT_JS, arg=[next_selector, SETTLE_MS], timeout=WAIT_MS)
+    return await handle.json_value() == "options"
+
+async def submit_and_read(page) -> Tuple[str, str, Optional[str]]:
+    """Clear the processing time, click submit and wait for it to be filled in again."""
+    await page.evaluate(_CLEAR_RESULT_JS, PTIME_SELECTOR)
+    await page.click("button.btn-submit")
+    await page.wait_for_function(_RESULT_JS, arg=PTIME_SELECTOR, timeout=WAIT_MS)
+    ptime = await page.text_content(PTIME_SELECTOR)
+    updated = await page.text_content(UPDATED_SELECTOR) if await page.query_selector(UPDATED_SELECTOR) else None
+    ref = await page.get_attribute(PTIME_SELECTOR, "data-json-replace")
+    return (ptime or "N/A").strip(), (updated or "N/A").strip(), ref
+
+async def open_page(context, url: str):
+    page = await context.new_page()
+    await page.goto(url, wait_until="domcontentloaded")
+    await page.wait_for_selector(CATEGORY_SELECTOR, timeout=WAIT_MS)
+    return page
+
+async def enumerate_tasks(context, url: str) -> List[Tuple[str, str, str, str]]:
+    """(category value/label, subcategory value/label) pairs from the dropdowns alone, no submits."""
+    page = await open_page(context, url)
+    tasks = []
+    for cat_value, cat_label in await options(page, CATEGORY_SELECTOR):
+        if not await select_and_wait(page, CATEGORY_SELECTOR, cat_value, SUB_SELECTOR):
+            print(f"  [WARN] No subcategory found for {cat_label}, skipping...")
+            continue
+        tasks.extend((cat_value, cat_label, v, l) for v, l in await options(page, SUB_SELECTOR))
+    await page.close()
+    return tasks
+
+async def scrape_task(page, task, data: Optional[JsonData], done: Set, emit):
+    cat_value, cat_label, sub_value, sub_label = task
+    if await page.eval_on_selector(CATEGORY_SELECTOR, "el => el.value") != cat_value:
+        await select_and_wait(page, CATEGORY_SELECTOR, cat_value, SUB_SELECTOR)
+    has_countries = await select_and_wait(page, SUB_SELECTOR, sub_value, COUNTRY_SELECTOR)
+    base = {"category": cat_label, "subcategory": sub_label}
+
+    if not has_countries:
+        if (cat_label, sub_label, None) in done:
+            return
+        try:
+            ptime, updated, _ = await submit_and_read(page)
+        except Exception as e:
+            print(f"      [ERROR] Could not extract result without country filter: {e}")
+            emit(dict(base, country=None, processing_time="N/A", last_updated="N/A"), failed=True)
+            return
+        emit(dict(base, country=None, processing_time=ptime, last_updated=updated))
+        return
 
-                        processing_time_span = page.query_selector("span[data-json-replace*='ptime']")
-                        last_updated_span = page.query_selector("span[data-json-replace*='lastupdated']")
+    countries = [(v, l) for v, l in await options(page, COUNTRY_SELECTOR) if l in TARGET_COUNTRIES]
+    template, updated_json = None, None
+    for country_value, country_label in countries:
+        if (cat_label, sub_label, country_label) in done:
+            continue
+        if template is not None:
+            # JSON path: values come straight from the data file the spans are filled from.
+            try:
+                emit(dict(base, country=country_label, processing_time=data.resolve(template.format(country_value)),
+                          last_updated=updated_json))
+                continue
+            except (KeyError, IndexError, ValueError, OSError) as e:
+                print(f"    [WARN] JSON lookup failed for {country_label} ({e}), using the form")
+        try:
+            await page.select_option(COUNTRY_SELECTOR, country_value)
+            ptime, updated, ref = await submit_and_read(page)
+        except Exception as e:
+            print(f"      [ERROR] Could not extract result for {country_label}: {e}")
+            emit(dict(base, country=country_label, processing_time="N/A", last_updated="N/A"), failed=True)
+            continue
+        emit(dict(base, country=country_label, processing_time=ptime, last_updated=updated))
+        if data is not None and template is None:
+            template = country_template(ref, country_value)
+            updated_json = updated
 
-                        processing_time = processing_time_span.inner_text().strip() if processing_time_span else "N/A"
-                        last_updated = last_updated_span.inner_text().strip() if last_updated_span else "N/A"
+async def scrape_processing_times_async(url: str = PAGE_URL, output: str = OUTPUT_FILE, contexts: int = CONTEXTS,
+                                        use_json: bool = True, json_base: Optional[str] = None) -> List[Dict]:
+    progress_path = f"{os.path.splitext(output)[0]}.jsonl"
+    records = load_progress(progress_path)
+    done = {record_key(r) for r in records}
+    if records:
+        print(f"[INFO] Resuming: {len(records)} results already in {progress_path}")
+    writer = ProgressWriter(progress_path)
+    data = JsonData(url, json_base) if use_json else None
+    failures = []  # Failed rows and tasks; any of them keeps the progress file for a resumed run
 
-                        print(f"      ⏱️ {processing_time} (Updated: {last_updated})")
+    def emit(record: Dict, failed: bool = False):
+        # Failed rows go to the output as N/A but not to the progress file, so a resumed run retries them.
+        records.append(record)
+        if failed:
+            failures.append(record_key(record))
+        else:
+            done.add(record_key(record))
+            writer.write(record)
+        print(f"    🌍 {record['subcategory']} / {record['country'] or '-'}: {record['processing_time']}")
 
-                        results.append({
-                            "category": category_label,
-                            "subcategory": sub_label,
-                            "country": None,
-                            "processing_time": processing_time,
-                            "last_updated": last_updated
-                        })
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)  # Change to False to see browser
+        try:
+            tasks = await enumerate_tasks(await browser.new_context(), url)
+            print(f"[INFO] {len(tasks)} subcategories across {contexts} browser contexts")
+            queue: asyncio.Queue = asyncio.Queue()
+            for task in tasks:
+                queue.put_nowait(task)
+
+            async def worker():
+                try:
+                    page = await open_page(await browser.new_context(), url)
+                except Exception as e:
+                    print(f"  [ERROR] Could not open a browser context: {e}")
+                    return
+                while not queue.empty():
+                    task = queue.get_nowait()
+                    print(f"\n[INFO] {task[1]} / {task[3]}")
+                    try:
+                        await scrape_task(page, task, data, done, emit)
                     except Exception as e:
-                        print(f"      [ERROR] Could not extract result without country filter: {e}")
-                        results.append({
-                            "category": category_label,
-                            "subcategory": sub_label,
-                            "country": None,
-                            "processing_time": "N/A",
-                            "last_updated": "N/A"
-                        })
+                        print(f"  [ERROR] {task[1]} / {task[3]} failed: {e}")
+                        failures.append(task)
+                        try:
+                            await page.goto(url, wait_until="domcontentloaded")
+                        except Exception as e:
+                            print(f"  [ERROR] Could not reload the page: {e}")
 
-        browser.close()
+            await asyncio.gather(*(worker() for _ in range(max(1, contexts))))
+            failures.extend(queue.get_nowait() for _ in range(queue.qsize()))  # Left over if every worker failed
+        finally:
+            await browser.close()
+            writer.close()
 
-        # Save results to JSON
-        with open("ircc_processing_times_selected.json", "w", encoding="utf-8") as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(records, f, indent=2, ensure_ascii=False)
+    print(f"\n✅ Done. Saved {len(records)} entries to '{output}'")
+    if failures:
+        print(f"[INFO] {len(failures)} rows or subcategories failed; run again to retry them from {progress_path}")
+    else:
+        os.remove(progress_path)  # Complete: the next run scrapes fresh processing times
+    return records
 
-        print(f"\n✅ Done. Saved {len(results)} entries to 'ircc_processing_times_selected.json'")
+def scrape_processing_times(**kwargs) -> List[Dict]:
+    return asyncio.run(scrape_processing_times_async(**kwargs))
 
 if __name__ == "__main__":
-    scrape_processing_times()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scrape IRCC processing times for the target countries.")
+    parser.add_argument("--url", default=PAGE_URL, help="Live page, or a saved local copy (path or file:// URL).")
+    parser.add_argument("--json-base", help="Where the page's /content/dam/... JSON files live for a saved copy.")
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--contexts", type=int, default=CONTEXTS)
+    parser.add_argument("--no-json", action="store_true", help="Always read values through the form.")
+    args = parser.parse_args()
+    url = args.url if "://" in args.url else Path(args.url).resolve().as_uri()
+    scrape_processing_times(url=url, output=args.output, contexts=args.contexts, use_json=not args.no_json,
+                            json_base=args.json_base)
@@ -0,0 +1,78 @@
+import sys
+import json
+import argparse
+import contextlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from ircc_rag.context_packer import source_label  # noqa: E402
+from ircc_rag import engine as rag  # noqa: E402
+
+
+def questions_from(args):
+    if args.questions:
+        yield from args.questions
+    elif not sys.stdin.isatty():
+        for line in sys.stdin:
+            if line.strip():
+                yield line.strip()
+    else:
+        while True:
+            try:
+                question = input("You: ").strip()
+            except (EOFError, KeyboardInterrupt):
+                print()
+                return
+            if question:
+                yield question
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Ask the IRCC chatbot without the UI. Questions come from the arguments, one per line on "
+                    "stdin, or an interactive prompt.")
+    parser.add_argument("questions", nargs="*")
+    parser.add_argument("--json", action="store_true", help="One JSON record per answer instead of text.")
+    parser.add_argument("--chat", action="store_true", help="Treat the questions as one conversation (history).")
+    parser.add_argument("--vector-dir", default=str(rag.VECTOR_DIR))
+    parser.add_argument("--llm", default=rag.LOCAL_LLM_MODEL)
+    parser.add_argument("--backend", default=rag.GENERATOR_BACKEND, choices=["fp32", "int8", "onnx"])
+    parser.add_argument("--server", default=rag.GENERATION_SERVER_URL, help="Generation server URL.")
+    parser.add_argument("--draft", default=rag.DRAFT_LLM_MODEL,
+                        help="Draft model for speculative decoding, e.g. google/flan-t5-small.")
+    parser.add_argument("--no-rerank", action="store_true")
+    parser.add_argument("--no-lookup", action="store_true", help="Send fee / processing-time questions to RAG too.")
+    parser.add_argument("--no-gating", action="store_true",
+                        help="Generate even when the retrieval scores say the question is out of domain.")
+    args = parser.parse_args()
+
+    out = sys.stdout
+    engine = rag.RAGEngine(args.vector_dir, args.llm, args.backend, args.server,
+                           use_reranker=not args.no_rerank, use_structured_lookup=not args.no_lookup,
+                           score_gating=not args.no_gating, draft_model=args.draft)
+    history = []
+    # Engine logging goes to stderr so stdout carries only answers.
+    with contextlib.redirect_stdout(sys.stderr):
+        engine.warm_up()  # Loads while the first question is read or routed
+        for question in questions_from(args):
+            turn = engine.chat(question, history if args.chat else [])
+            if args.json:
+                record = turn.result()
+                labels = [source_label(s, all_sources=True) for s in record["sources"]]
+                out.write(json.dumps(dict(record, sources=labels), ensure_ascii=False) + "\n")
+            else:
+                out.write("Bot: ")
+                for piece in turn:
+                    out.write(piece)
+                    out.flush()
+                record = turn.result()
+                out.write("\n")
+                for source in record["sources"]:
+                    out.write(f"  - {source_label(source, all_sources=True)}\n")
+            out.flush()
+            if args.chat:
+                history.append(record)
+
+
+if __name__ == "__main__":
+    main()
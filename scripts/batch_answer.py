@@ -0,0 +1,106 @@
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import Dict, List, Set
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from ircc_rag.context_packer import source_label  # noqa: E402
+from ircc_rag import engine as rag  # noqa: E402
+
+# Config
+CHUNK_SIZE = 256  # Questions embedded and searched together; the output is checkpointed after each
+
+
+# ---------- INPUT / CHECKPOINT ----------
+def load_questions(path: str) -> List[Dict]:
+    """{"id", "question"} per line; "query" is accepted for the question and the line number is the default id."""
+    questions = []
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            text = row.get("question") or row.get("query")
+            if not text:
+                print(f"[WARN] Line {n}: no question, skipped")
+                continue
+            questions.append({"id": str(row.get("id", n)), "question": text})
+    return questions
+
+
+def load_done(path: str) -> Set[str]:
+    """Ids already answered in `path`; a torn last line from an interrupted run is cut off."""
+    done, good_bytes = set(), 0
+    if not os.path.exists(path):
+        return done
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                done.add(json.loads(line)["id"])
+            except (json.JSONDecodeError, KeyError, UnicodeDecodeError):
+                break
+            good_bytes += len(line)
+    if good_bytes < os.path.getsize(path):
+        print(f"[WARN] Dropping a partial record at the end of {path}")
+        with open(path, "r+b") as f:
+            f.truncate(good_bytes)
+    return done
+
+
+# ---------- MAIN ----------
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer a JSONL file of questions offline: batched embedding, search and generation, "
+                    "appended to a JSONL output that doubles as the checkpoint (re-run to resume).")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--batch-size", type=int, default=rag.GENERATION_BATCH_SIZE,
+                        help="Prompts per padded generation call.")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="Questions embedded and searched together.")
+    parser.add_argument("--limit", type=int, default=0)
+    parser.add_argument("--vector-dir", default=str(rag.VECTOR_DIR))
+    parser.add_argument("--llm", default=rag.LOCAL_LLM_MODEL)
+    parser.add_argument("--backend", default=rag.GENERATOR_BACKEND, choices=["fp32", "int8", "onnx"])
+    parser.add_argument("--server", default=rag.GENERATION_SERVER_URL, help="Generation server URL.")
+    parser.add_argument("--no-rerank", action="store_true")
+    parser.add_argument("--no-lookup", action="store_true", help="Send fee / processing-time questions to RAG too.")
+    parser.add_argument("--no-gating", action="store_true",
+                        help="Generate even when the retrieval scores say the question is out of domain.")
+    args = parser.parse_args()
+
+    questions = load_questions(args.input)[:args.limit or None]
+    done = load_done(args.output)
+    todo = [q for q in questions if q["id"] not in done]
+    print(f"[INFO] {len(questions)} questions, {len(questions) - len(todo)} already answered, {len(todo)} to go")
+    if not todo:
+        return
+
+    engine = rag.RAGEngine(args.vector_dir, args.llm, args.backend, args.server,
+                           use_reranker=not args.no_rerank, use_structured_lookup=not args.no_lookup,
+                           score_gating=not args.no_gating)
+    start, answered = time.perf_counter(), 0
+    with open(args.output, "a", encoding="utf-8") as out:
+        for offset in range(0, len(todo), args.chunk_size):
+            chunk = todo[offset:offset + args.chunk_size]
+            for i, record in engine.answer_batch([q["question"] for q in chunk], args.batch_size):
+                out.write(json.dumps({
+                    "id": chunk[i]["id"], "question": record["user"], "answer": record["bot"],
+                    "sources": [source_label(s, all_sources=True) for s in record["sources"]], "route": record["route"],
+                    "scores": record.get("scores"),
+                }, ensure_ascii=False) + "\n")
+                out.flush()
+                answered += 1
+            os.fsync(out.fileno())
+            elapsed = time.perf_counter() - start
+            print(f"[INFO] {len(done) + answered}/{len(questions)} answered · {answered / elapsed:.2f} questions/s")
+    print(f"[DONE] {answered} answers in {time.perf_counter() - start:.1f}s → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import os
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from ircc_rag.chunk_store import STORE_FILE, LEGACY_METADATA_FILE, convert_json  # noqa: E402
+
+# Config
+VECTOR_DIR = "vector_store"
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert chunks_metadata.json into the memory-mapped chunk store.")
+    parser.add_argument("--vector-dir", default=VECTOR_DIR)
+    parser.add_argument("--remove-json", action="store_true", help="Delete the JSON file after converting.")
+    args = parser.parse_args()
+
+    json_path = os.path.join(args.vector_dir, LEGACY_METADATA_FILE)
+    store_path = os.path.join(args.vector_dir, STORE_FILE)
+    if not os.path.exists(json_path):
+        print(f"[WARN] {json_path} not found, nothing to convert.")
+        return
+
+    n = convert_json(json_path, store_path)
+    print(f"[INFO] Wrote {n} chunks to {store_path} "
+          f"({os.path.getsize(json_path) / 1e6:.1f} MB JSON -> {os.path.getsize(store_path) / 1e6:.1f} MB)")
+    if args.remove_json:
+        os.remove(json_path)
+        print(f"[INFO] Removed {json_path}")
+    print("[DONE] Chunk store ready.")
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,52 @@
 import os
 import re
 import json
-from typing import List, Dict
+import hashlib
+import argparse
+import sys
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Iterator, Optional, Tuple
+from tqdm import tqdm
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from sentence_transformers import SentenceTransformer
+from transformers import AutoTokenizer
 import faiss
 import numpy as np
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from ircc_rag.embedding_cache import EmbeddingCache  # noqa: E402
+from ircc_rag.index_factory import INDEX_TYPES, IndexBuilder, build_index, supports_removal  # noqa: E402
+from ircc_rag.chunk_store import STORE_FILE, PARENTS_FILE, LEGACY_METADATA_FILE, open_chunks, open_parents  # noqa: E402
+from ircc_rag.chunk_store import write_chunk_store  # noqa: E402
+from ircc_rag.bm25 import BM25_FILE, BM25Index  # noqa: E402
+from ircc_rag.near_dedup import NEAR_DUP_THRESHOLD, NearDuplicateFilter  # noqa: E402
+from ircc_rag.shared_store import new_build_dir, publish, resolve_store, write_flat_sidecar  # noqa: E402
+
 # Config
 SOURCE_DIR = "knowledge_base/english"
 VECTOR_DIR = "vector_store"
 EMBED_MODEL = "all-MiniLM-L6-v2"
+TOKENIZER_MODEL = "google/flan-t5-xl"  # Generator tokenizer; per-chunk counts feed the context packer
+INDEX_FILE = "index.faiss"
+METADATA_FILE = STORE_FILE
+MANIFEST_FILE = "build_manifest.json"
+CHUNKER_VERSION = 2  # Bump when clean_text/semantic_chunk change, forces a full rebuild
+INDEX_TYPE = "flat"  # One of INDEX_TYPES; switch to ivf_*/hnsw for the full manuals corpus
+WORKERS = max(1, (os.cpu_count() or 2) - 1)  # Parse/clean/chunk processes
+EMBED_BATCH_SIZE = 256   # Chunks per embedding batch; bounds the in-flight vectors
+PREFETCH_PER_WORKER = 2  # Files chunked ahead of the embedder per worker
+CHUNKINGS = ("flat", "parent_child")
+CHUNKING = "parent_child"  # parent_child: small chunks are searched, their section (parent) is sent to the model
+PARENT_CHUNK_SIZE = 1500  # Sections longer than this are split into several parents
+CHILD_CHUNK_SIZE = 300
+CHILD_CHUNK_OVERLAP = 50
+# Chunks nearly identical to an earlier one (MinHash-LSH, threshold in src/ircc_rag/near_dedup.py) are not
+# embedded; the kept chunk lists every file it appeared in under "sources".
+NEAR_DEDUP = True
 os.makedirs(VECTOR_DIR, exist_ok=True)
 
 # ---------- TEXT CLEANING ----------
@@ -56,34 +92,88 @@ def semantic_chunk(text: str) -> List[str]:
         chunks.extend([sc.strip() for sc in sub_chunks if len(sc.strip()) > 50])
     return chunks
 
+# ---------- SECTION STRUCTURE ----------
+HEADING = re.compile(r'^(\d{1,2}(?:\.\d{1,2}){0,4})\.?\s+([A-Z][^.]{2,120})$')
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """Split raw (uncleaned) text at numbered headings into (section path, text) pairs.
+
+    A numbered line only counts as a heading when it continues the numbering seen so far
+    (first child or next sibling), which skips numbered lists, dates and table-of-contents
+    wraps. Text before the first heading is a section with an empty path.
+    """
+    sections, numbers, path, lines = [], [], [], []
+    for line in text.splitlines():
+        match = HEADING.match(line.strip())
+        if match and not re.search(r'\.{5,}', line):
+            number = [int(n) for n in match.group(1).split(".")]
+            depth = len(number) - 1
+            previous = numbers[depth] if depth < len(numbers) else 0
+            if depth <= len(numbers) and number[:depth] == numbers[:depth] and number[depth] == previous + 1:
+                if lines:
+                    sections.append((" > ".join(path), "\n".join(lines)))
+                numbers, path, lines = number, path[:depth] + [line.strip()], []
+        lines.append(line)
+    if lines:
+        sections.append((" > ".join(path), "\n".join(lines)))
+    return sections
+
 # ---------- DOCUMENT LOADING ----------
-def load_documents() -> List[Dict]:
-    """Load JSON docs with source and page info."""
+def load_file(path: str, file: str, clean: bool = True) -> List[Dict]:
+    """Load one JSON doc with source and page info; `clean=False` keeps the line structure."""
     docs = []
-    for file in os.listdir(SOURCE_DIR):
-        if not file.endswith(".json"):
-            continue
-        path = os.path.join(SOURCE_DIR, file)
-        with open(path, "r", encoding="utf-8") as f:
-            try:
-                data = json.load(f)
-            except json.JSONDecodeError:
-                print(f"[WARN] Could not load {file}")
-                continue
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError:
+            print(f"[WARN] Could not load {file}")
+            return docs
 
-            if isinstance(data, list):
-                for entry in data:
-                    text = clean_text(entry.get("text", ""))
-                    page = entry.get("page", None)
-                    if text:
-                        docs.append({"source": file, "page": page, "text": text})
-            else:
-                text = clean_text(data.get("text", ""))
-                page = data.get("page", None)
+        if isinstance(data, list):
+            for entry in data:
+                text = entry.get("text", "")
+                text = clean_text(text) if clean else text.strip()
+                page = entry.get("page", None)
                 if text:
                     docs.append({"source": file, "page": page, "text": text})
+        else:
+            text = data.get("text", "")
+            text = clean_text(text) if clean else text.strip()
+            page = data.get("page", None)
+            if text:
+                docs.append({"source": file, "page": page, "text": text})
     return docs
 
+def load_documents(source_dir: str = SOURCE_DIR, files: Optional[List[str]] = None) -> List[Dict]:
+    """Load JSON docs with source and page info."""
+    docs = []
+    for file in files if files is not None else os.listdir(source_dir):
+        if not file.endswith(".json"):
+            continue
+        docs.extend(load_file(os.path.join(source_dir, file), file))
+    return docs
+
+# ---------- HASHING ----------
+def file_hash(path: str) -> str:
+    """SHA-256 of the raw file bytes."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def chunk_id(text: str) -> int:
+    """Stable 60-bit vector id derived from the chunk text."""
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:15], 16)
+
+def scan_sources(source_dir: str = SOURCE_DIR) -> Dict[str, str]:
+    """Map every source file to its content hash."""
+    return {
+        file: file_hash(os.path.join(source_dir, file))
+        for file in sorted(os.listdir(source_dir))
+        if file.endswith(".json")
+    }
+
 # ---------- CHUNK DOCUMENTS ----------
 def chunk_documents(docs: List[Dict]) -> List[Dict]:
     """Split into semantic chunks with metadata."""
@@ -92,6 +182,7 @@ def chunk_documents(docs: List[Dict]) -> List[Dict]:
         chunks = semantic_chunk(doc["text"])
         for idx, chunk in enumerate(chunks):
             all_chunks.append({
+                "id": chunk_id(chunk),
                 "source": doc["source"],
                 "page_start": doc.get("page"),
                 "page_end": doc.get("page"),  # Single page for now
@@ -103,46 +194,407 @@ def chunk_documents(docs: List[Dict]) -> List[Dict]:
     unique_chunks = {c["text"]: c for c in all_chunks}
     return list(unique_chunks.values())
 
+def chunk_documents_parent_child(docs: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """(children, parents) for raw docs: each section is cleaned and split into parents of at
+    most PARENT_CHUNK_SIZE characters, each parent into the small children that get embedded.
+    Children carry their parent's id, so query time maps hits to sections by lookup."""
+    parent_splitter = RecursiveCharacterTextSplitter(chunk_size=PARENT_CHUNK_SIZE, chunk_overlap=0)
+    child_splitter = RecursiveCharacterTextSplitter(chunk_size=CHILD_CHUNK_SIZE, chunk_overlap=CHILD_CHUNK_OVERLAP)
+    children, parents = {}, {}
+    for doc in docs:
+        for section, raw in split_sections(doc["text"]):
+            text = clean_text(raw)
+            if len(text) <= 50:
+                continue  # Heading directly followed by a subsection
+            for parent_text in parent_splitter.split_text(text):
+                parent = {
+                    "id": chunk_id(parent_text),
+                    "source": doc["source"],
+                    "page_start": doc.get("page"),
+                    "page_end": doc.get("page"),
+                    "section": section,
+                    "text": parent_text,
+                    "char_length": len(parent_text),
+                }
+                child_texts = [c.strip() for c in child_splitter.split_text(parent_text) if len(c.strip()) > 50]
+                if child_texts:
+                    parents.setdefault(parent["id"], parent)  # Parents without children are never retrieved
+                for child_text in child_texts:
+                    # The id includes the parent: the same sentence under two sections is two children.
+                    child_id = chunk_id(f"{parent['id']}{child_text}")
+                    children.setdefault(child_id, {
+                        "id": child_id,
+                        "source": doc["source"],
+                        "page_start": doc.get("page"),
+                        "page_end": doc.get("page"),
+                        "parent_id": parent["id"],
+                        "section": section,
+                        "text": child_text,
+                        "keywords": extract_keywords(child_text),
+                        "char_length": len(child_text),
+                    })
+    return list(children.values()), list(parents.values())
+
+# ---------- TOKEN COUNTS ----------
+_tokenizer = None
+
+def count_chunk_tokens(chunks: List[Dict]) -> List[Dict]:
+    """Store each chunk's generator token count so prompts can be packed without re-tokenizing."""
+    global _tokenizer
+    if _tokenizer is None:
+        _tokenizer = AutoTokenizer.from_pretrained(TOKENIZER_MODEL)
+    if chunks:
+        encoded = _tokenizer([c["text"] for c in chunks], add_special_tokens=False).input_ids
+        for chunk, ids in zip(chunks, encoded):
+            chunk["tokens"] = len(ids)
+    return chunks
+
 # ---------- EMBEDDINGS ----------
-def embed_chunks(chunks: List[Dict]):
-    model = SentenceTransformer(EMBED_MODEL)
+_model = None
+
+def encode_texts(texts: List[str], show_progress_bar: bool = True) -> np.ndarray:
+    """Embed with the model loaded once per process (only when a text is not cached)."""
+    global _model
+    if _model is None:
+        _model = SentenceTransformer(EMBED_MODEL)
+    return _model.encode(texts, show_progress_bar=show_progress_bar, normalize_embeddings=True)
+
+def embed_chunks(chunks: List[Dict], use_cache: bool = True, cache: Optional[EmbeddingCache] = None,
+                 verbose: bool = True):
+    """Embed chunk texts; with the cache on, the model is only loaded for unseen texts."""
     texts = [chunk["text"] for chunk in chunks]
-    embeddings = model.encode(texts, show_progress_bar=True, normalize_embeddings=True)
-    return np.array(embeddings), chunks
+    if not use_cache:
+        return np.array(encode_texts(texts, verbose)), chunks
+    cache = cache or EmbeddingCache(EMBED_MODEL)
+    embeddings = cache.encode(texts, lambda t: encode_texts(t, verbose))
+    if verbose:
+        stats = cache.stats()
+        print(f"[INFO] Embedding cache: {stats['disk_hits']} hits, {stats['misses']} misses.")
+    return embeddings, chunks
 
 # ---------- FAISS INDEX ----------
-def build_faiss_index(embeddings: np.ndarray):
-    dim = embeddings.shape[1]
-    index = faiss.IndexFlatIP(dim)
-    index.add(embeddings)
-    return index
+def build_faiss_index(embeddings: np.ndarray, ids: Optional[np.ndarray] = None, index_type: str = INDEX_TYPE):
+    """ID-mapped index of the configured type so vectors can be removed later."""
+    if ids is None:
+        ids = np.arange(len(embeddings), dtype="int64")
+    return build_index(embeddings, ids, index_type)
+
+# ---------- BM25 INDEX ----------
+def build_bm25_index(chunks: List[Dict]) -> BM25Index:
+    """Sparse keyword index over the same chunks, for form numbers, fees and section numbers."""
+    return BM25Index.build([c["text"] for c in chunks], [c["id"] for c in chunks])
 
 # ---------- SAVE ----------
-def save_index(index, chunks):
-    faiss.write_index(index, os.path.join(VECTOR_DIR, "index.faiss"))
-    with open(os.path.join(VECTOR_DIR, "chunks_metadata.json"), "w", encoding="utf-8") as f:
-        json.dump(chunks, f, indent=2, ensure_ascii=False)
+def save_index(index, chunks, vector_dir: str = VECTOR_DIR, manifest: Optional[Dict] = None,
+               parents: Optional[List[Dict]] = None) -> str:
+    """Write index, metadata, parents, BM25 and manifest as a new snapshot, then make it the current one."""
+    build_dir = new_build_dir(vector_dir)
+    try:
+        faiss.write_index(index, os.path.join(build_dir, INDEX_FILE))
+        write_flat_sidecar(index, build_dir)  # Flat indexes: vectors workers memory-map and share
+        write_chunk_store(chunks, os.path.join(build_dir, METADATA_FILE))
+        if parents:
+            write_chunk_store(parents, os.path.join(build_dir, PARENTS_FILE))
+        # Rebuilt from all chunks on every save: corpus-wide IDF makes patching postings unsound.
+        build_bm25_index(chunks).save(os.path.join(build_dir, BM25_FILE))
+        if manifest is not None:
+            with open(os.path.join(build_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2, ensure_ascii=False)
+    except Exception:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+    # Running apps watch CURRENT and swap to the new snapshot between requests.
+    store_dir = publish(vector_dir, build_dir)
+    print(f"[INFO] Published snapshot {os.path.basename(store_dir)}")
+    # Snapshots supersede the older flat layout and the JSON metadata; stale copies would only mislead.
+    for name in (INDEX_FILE, METADATA_FILE, BM25_FILE, MANIFEST_FILE, LEGACY_METADATA_FILE):
+        legacy_path = os.path.join(vector_dir, name)
+        if os.path.exists(legacy_path):
+            os.remove(legacy_path)
+    return store_dir
 
-# ---------- MAIN ----------
-def main():
-    print("[INFO] Loading documents...")
-    docs = load_documents()
-    print(f"[INFO] Loaded {len(docs)} documents.")
+# ---------- MANIFEST ----------
+def load_manifest(vector_dir: str = VECTOR_DIR) -> Optional[Dict]:
+    path = os.path.join(vector_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError:
+            return None
+
+def new_manifest(files: Dict[str, Dict], index_type: str = INDEX_TYPE, chunking: str = CHUNKING,
+                 near_dedup: bool = NEAR_DEDUP) -> Dict:
+    return {
+        "embed_model": EMBED_MODEL,
+        "tokenizer": TOKENIZER_MODEL,
+        "chunker_version": CHUNKER_VERSION,
+        "chunking": chunking,
+        "near_dedup": NEAR_DUP_THRESHOLD if near_dedup else None,
+        "index_type": index_type,
+        "files": files,
+    }
+
+def file_entries(chunks: List[Dict], hashes: Dict[str, str], files: List[str]) -> Dict[str, Dict]:
+    """Per-file manifest entries: content hash plus the ids of the chunks (and parents) it produced."""
+    entries = {file: {"sha256": hashes[file], "chunk_ids": []} for file in files}
+    for chunk in chunks:
+        entries[chunk["source"]]["chunk_ids"].append(chunk["id"])
+        if chunk.get("parent_id") is not None:
+            entries[chunk["source"]].setdefault("parent_ids", []).append(chunk["parent_id"])
+    for entry in entries.values():
+        if "parent_ids" in entry:
+            entry["parent_ids"] = list(dict.fromkeys(entry["parent_ids"]))
+    return entries
 
-    print("[INFO] Chunking documents...")
-    chunks = chunk_documents(docs)
-    print(f"[INFO] Total unique chunks: {len(chunks)}")
+def remap_entries(entries: Dict[str, Dict], replaced: Dict[int, int], lookup) -> Dict[str, Dict]:
+    """Point file entries at the chunks that replaced their near-duplicates; `lookup` maps id -> chunk."""
+    for entry in entries.values():
+        entry["chunk_ids"] = list(dict.fromkeys(replaced.get(i, i) for i in entry["chunk_ids"]))
+        if "parent_ids" in entry:
+            entry["parent_ids"] = list(dict.fromkeys(lookup[i]["parent_id"] for i in entry["chunk_ids"]))
+    return entries
 
-    print("[INFO] Generating embeddings...")
-    embeddings, chunks = embed_chunks(chunks)
+def attach_sources(chunks: List[Dict], files: Dict[str, Dict]) -> List[Dict]:
+    """List all files that produced a chunk (repeated or near-duplicate text) under "sources"."""
+    sources: Dict[int, List[str]] = {}
+    for file in sorted(files):
+        for i in files[file]["chunk_ids"]:
+            sources.setdefault(i, []).append(file)
+    for chunk in chunks:
+        files_of = sources.get(chunk["id"], [chunk["source"]])
+        if chunk["source"] not in files_of:
+            chunk["source"] = files_of[0]  # Its original file was deleted; another still produces it
+        if len(files_of) > 1:
+            chunk["sources"] = [chunk["source"]] + [f for f in files_of if f != chunk["source"]]
+        else:
+            chunk.pop("sources", None)
+    return chunks
+
+def chunk_files(files: List[str], source_dir: str, workers: int = WORKERS,
+                chunking: str = CHUNKING) -> Tuple[List[Dict], List[Dict]]:
+    """Chunk files, keeping every (file, chunk) pair so shared chunks stay referenced per file."""
+    chunks, parents = [], []
+    for _, file_chunks, file_parents in iter_file_chunks(files, source_dir, min(workers, len(files)), chunking):
+        chunks.extend(file_chunks)
+        parents.extend(file_parents)
+    return chunks, parents
+
+# ---------- STREAMING INGESTION ----------
+def _chunk_file(source_dir: str, file: str, chunking: str = CHUNKING) -> Tuple[List[Dict], List[Dict]]:
+    path = os.path.join(source_dir, file)
+    if chunking == "parent_child":
+        return chunk_documents_parent_child(load_file(path, file, clean=False))
+    return chunk_documents(load_file(path, file)), []
 
-    print("[INFO] Building FAISS index...")
-    index = build_faiss_index(embeddings)
+def iter_file_chunks(files: List[str], source_dir: str, workers: int = WORKERS,
+                     chunking: str = CHUNKING) -> Iterator[Tuple[str, List[Dict], List[Dict]]]:
+    """(file, chunks, parents) in file order, parsed/cleaned/chunked in a process pool.
+
+    Only `workers * PREFETCH_PER_WORKER` files are in flight, so a slow consumer (the
+    embedder) holds back the pool instead of letting chunked files pile up in memory.
+    """
+    if workers <= 1:
+        for file in files:
+            yield (file, *_chunk_file(source_dir, file, chunking))
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for file in files:
+            pending.append((file, pool.submit(_chunk_file, source_dir, file, chunking)))
+            if len(pending) >= workers * PREFETCH_PER_WORKER:
+                done_file, future = pending.popleft()
+                yield (done_file, *future.result())
+        while pending:
+            done_file, future = pending.popleft()
+            yield (done_file, *future.result())
+
+def iter_chunk_batches(files: List[str], source_dir: str, batch_size: int = EMBED_BATCH_SIZE,
+                       workers: int = WORKERS, file_chunk_ids: Optional[Dict[str, List[int]]] = None,
+                       chunking: str = CHUNKING, parents: Optional[Dict[int, Dict]] = None) -> Iterator[List[Dict]]:
+    """Fixed-size batches of unique chunks as files finish; records each file's chunk ids and
+    collects parent sections (not embedded) into `parents`."""
+    seen = set()
+    batch = []
+    for file, chunks, file_parents in iter_file_chunks(files, source_dir, workers, chunking):
+        if file_chunk_ids is not None:
+            file_chunk_ids[file] = [c["id"] for c in chunks]
+        if parents is not None:
+            for parent in file_parents:
+                parents.setdefault(parent["id"], parent)
+        for chunk in chunks:
+            if chunk["id"] in seen:
+                continue
+            seen.add(chunk["id"])
+            batch.append(chunk)
+            if len(batch) == batch_size:
+                yield count_chunk_tokens(batch)
+                batch = []
+    if batch:
+        yield count_chunk_tokens(batch)
+
+# ---------- BUILD ----------
+def full_build(source_dir: str = SOURCE_DIR, vector_dir: str = VECTOR_DIR, use_cache: bool = True,
+               index_type: str = INDEX_TYPE, workers: int = WORKERS, batch_size: int = EMBED_BATCH_SIZE,
+               chunking: str = CHUNKING, near_dedup: bool = NEAR_DEDUP) -> Dict:
+    """Stream files through chunking, near-duplicate removal, batched embedding and incremental index adds."""
+    hashes = scan_sources(source_dir)
+    print(f"[INFO] Chunking {len(hashes)} documents ({chunking}) with {workers} workers, "
+          f"embedding in batches of {batch_size}...")
+    cache = EmbeddingCache(EMBED_MODEL) if use_cache else None
+    builder = IndexBuilder(index_type, spill_dir=vector_dir)
+    file_chunk_ids: Dict[str, List[int]] = {}
+    parents: Dict[int, Dict] = {}
+    dedup = NearDuplicateFilter() if near_dedup else None
+    dedup_s = 0.0
+    chunks = []
+    with tqdm(unit="chunk", desc="Embedding") as progress:
+        for batch in iter_chunk_batches(list(hashes), source_dir, batch_size, workers, file_chunk_ids,
+                                        chunking, parents):
+            if dedup is not None:
+                start = time.perf_counter()
+                batch = dedup.filter(batch)
+                dedup_s += time.perf_counter() - start
+                if not batch:
+                    continue
+            embeddings, batch = embed_chunks(batch, use_cache, cache, verbose=False)
+            builder.add(embeddings, np.array([c["id"] for c in batch], dtype="int64"))
+            chunks.extend(batch)
+            progress.update(len(batch))
+    if dedup is not None:
+        print(f"[INFO] Near-duplicates: {len(dedup.replaced)} chunks merged into kept ones ({dedup_s:.1f}s)")
+    print(f"[INFO] Total unique chunks: {len(chunks)}" + (f", {len(parents)} parent sections" if parents else ""))
+    if cache is not None:
+        stats = cache.stats()
+        print(f"[INFO] Embedding cache: {stats['disk_hits']} hits, {stats['misses']} misses.")
+
+    print(f"[INFO] Finalizing FAISS index ({index_type})...")
+    index = builder.finish()
 
     print("[INFO] Saving index & metadata...")
-    save_index(index, chunks)
+    files = {f: {"sha256": hashes[f], "chunk_ids": file_chunk_ids.get(f, [])} for f in hashes}
+    if dedup is not None:
+        remap_entries(files, dedup.replaced, {})
+    if parents:
+        parent_of = {c["id"]: c["parent_id"] for c in chunks}
+        for entry in files.values():
+            entry["parent_ids"] = list(dict.fromkeys(parent_of[i] for i in entry["chunk_ids"]))
+        # Sections whose every child merged into another section's child are never retrieved.
+        parents = {i: parents[i] for i in dict.fromkeys(parent_of.values())}
+    attach_sources(chunks, files)
+    save_index(index, chunks, vector_dir, new_manifest(files, index_type, chunking, near_dedup),
+               count_chunk_tokens(list(parents.values())))
+    return {"files_changed": len(hashes), "chunks_added": len(chunks), "chunks_removed": 0, "total": index.ntotal}
+
+def incremental_build(source_dir: str = SOURCE_DIR, vector_dir: str = VECTOR_DIR, use_cache: bool = True,
+                      index_type: str = INDEX_TYPE, workers: int = WORKERS, batch_size: int = EMBED_BATCH_SIZE,
+                      chunking: str = CHUNKING, near_dedup: bool = NEAR_DEDUP) -> Dict:
+    """Re-chunk and re-embed only the files whose content hash changed since the last build."""
+    store_dir = resolve_store(vector_dir)
+    manifest = load_manifest(store_dir)
+    index_path = os.path.join(store_dir, INDEX_FILE)
+    old_chunks = open_chunks(store_dir)
+    if (
+        manifest is None
+        or manifest.get("embed_model") != EMBED_MODEL
+        or manifest.get("tokenizer") != TOKENIZER_MODEL
+        or manifest.get("chunker_version") != CHUNKER_VERSION
+        or manifest.get("index_type", "flat") != index_type
+        or manifest.get("chunking", "flat") != chunking
+        or manifest.get("near_dedup") != (NEAR_DUP_THRESHOLD if near_dedup else None)
+        or not os.path.exists(index_path)
+        or old_chunks is None
+    ):
+        print("[INFO] No compatible manifest found, running a full rebuild.")
+        return full_build(source_dir, vector_dir, use_cache, index_type, workers, batch_size, chunking, near_dedup)
+
+    index = faiss.read_index(index_path)
+    if not isinstance(index, faiss.IndexIDMap) or index.ntotal != len(old_chunks):
+        print("[INFO] Index and metadata are out of sync, running a full rebuild.")
+        return full_build(source_dir, vector_dir, use_cache, index_type, workers, batch_size, chunking, near_dedup)
+
+    hashes = scan_sources(source_dir)
+    old_files = manifest["files"]
+    changed = [f for f in hashes if old_files.get(f, {}).get("sha256") != hashes[f]]
+    deleted = [f for f in old_files if f not in hashes]
+    if not changed and not deleted:
+        print("[INFO] Vector store is up to date.")
+        return {"files_changed": 0, "chunks_added": 0, "chunks_removed": 0, "total": index.ntotal}
+    print(f"[INFO] {len(changed)} changed/new and {len(deleted)} deleted files.")
+    if not supports_removal(index_type):
+        print(f"[INFO] {index_type} indexes cannot remove vectors, running a full rebuild.")
+        return full_build(source_dir, vector_dir, use_cache, index_type, workers, batch_size, chunking, near_dedup)
 
-    print("[DONE] Vector store created:", os.path.join(VECTOR_DIR, "index.faiss"))
+    per_file, per_file_parents = chunk_files(changed, source_dir, workers, chunking)
+    new_chunks = {c["id"]: c for c in per_file}
+    files = {f: old_files[f] for f in hashes if f not in changed}
+    entries = file_entries(per_file, hashes, changed)
+    if near_dedup:
+        # Chunks still produced by unchanged files are the representatives new chunks are checked against.
+        kept_ids = list(dict.fromkeys(i for f in sorted(files) for i in files[f]["chunk_ids"]))
+        dedup = NearDuplicateFilter()
+        dedup.seed(old_chunks[i] for i in kept_ids)
+        kept_set = set(kept_ids)
+        dedup.filter(c for i, c in new_chunks.items() if i not in kept_set)
+        if dedup.replaced:
+            print(f"[INFO] Near-duplicates: {len(dedup.replaced)} new chunks merged into kept ones")
+        lookup = {i: old_chunks[i] for i in set(dedup.replaced.values()) if i not in new_chunks}
+        lookup.update(new_chunks)
+        remap_entries(entries, dedup.replaced, lookup)
+    files.update(entries)
+
+    # A chunk survives as long as any file still produces it.
+    live_ids = []
+    for f in sorted(files):
+        live_ids.extend(files[f]["chunk_ids"])
+    live_ids = list(dict.fromkeys(live_ids))
+    live_set = set(live_ids)
+
+    removed = np.array([i for i in old_chunks if i not in live_set], dtype="int64")
+    added = count_chunk_tokens([new_chunks[i] for i in live_ids if i not in old_chunks])
+    if len(removed):
+        index.remove_ids(removed)
+    if added:
+        print(f"[INFO] Generating embeddings for {len(added)} chunks...")
+        embeddings, added = embed_chunks(added, use_cache)
+        index.add_with_ids(embeddings, np.array([c["id"] for c in added], dtype="int64"))
+    print(f"[INFO] Added {len(added)} and removed {len(removed)} vectors.")
+
+    chunks = attach_sources([old_chunks[i] if i in old_chunks else new_chunks[i] for i in live_ids], files)
+    parents = None
+    if chunking == "parent_child":
+        old_parents = open_parents(store_dir) or {}
+        new_parents = {p["id"]: p for p in per_file_parents}
+        live_parent_ids = list(dict.fromkeys(i for f in sorted(files) for i in files[f].get("parent_ids", [])))
+        parents = [old_parents[i] if i in old_parents else new_parents[i] for i in live_parent_ids]
+        count_chunk_tokens([p for p in parents if "tokens" not in p])
+    save_index(index, chunks, vector_dir, new_manifest(files, index_type, chunking, near_dedup), parents)
+    return {"files_changed": len(changed) + len(deleted), "chunks_added": len(added), "chunks_removed": len(removed), "total": index.ntotal}
+
+# ---------- MAIN ----------
+def main(full: bool = False, source_dir: str = SOURCE_DIR, vector_dir: str = VECTOR_DIR, use_cache: bool = True,
+         index_type: str = INDEX_TYPE, workers: int = WORKERS, batch_size: int = EMBED_BATCH_SIZE,
+         chunking: str = CHUNKING, near_dedup: bool = NEAR_DEDUP):
+    os.makedirs(vector_dir, exist_ok=True)
+    if full:
+        full_build(source_dir, vector_dir, use_cache, index_type, workers, batch_size, chunking, near_dedup)
+    else:
+        incremental_build(source_dir, vector_dir, use_cache, index_type, workers, batch_size, chunking, near_dedup)
+    print("[DONE] Vector store created:", os.path.join(resolve_store(vector_dir), INDEX_FILE))
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Build the FAISS vector store from knowledge_base/english.")
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest and rebuild everything.")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk embedding cache.")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default=INDEX_TYPE,
+                        help="FAISS index type; see benchmarks/bench_ann_recall.py to pick one.")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Processes for parsing and chunking.")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE, help="Chunks per embedding batch.")
+    parser.add_argument("--chunking", choices=CHUNKINGS, default=CHUNKING,
+                        help="flat: 600-char chunks; parent_child: small chunks searched, sections sent to the model.")
+    parser.add_argument("--no-near-dedup", action="store_true", help="Keep near-duplicate chunks as separate vectors.")
+    parser.add_argument("--vector-dir", default=VECTOR_DIR, help="Output store (e.g. a second one to compare chunkings).")
+    args = parser.parse_args()
+    main(full=args.full, vector_dir=args.vector_dir, use_cache=not args.no_cache, index_type=args.index_type,
+         workers=args.workers, batch_size=args.batch_size, chunking=args.chunking, near_dedup=not args.no_near_dedup)
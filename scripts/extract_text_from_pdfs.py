@@ -1,46 +1,131 @@
 import os
-import fitz  # PyMuPDF
+import time
 import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+import fitz  # PyMuPDF
 
 PDF_DIR = "data/pdfs/"
 OUTPUT_DIR = "knowledge_base/english/"
+# Kept with the PDFs: every .json in OUTPUT_DIR is ingested as a document.
+MANIFEST_FILE = os.path.join(PDF_DIR, "extract_manifest.json")
+WORKERS = os.cpu_count() or 1
 
-def extract_text_from_pdf(pdf_path):
-    """Extracts text from all pages in the PDF."""
-    text = []
-    try:
-        doc = fitz.open(pdf_path)
-        for page in doc:
+# ---------- EXTRACTION ----------
+def extract_pages(pdf_path: str) -> List[Dict]:
+    """One record per non-empty page, numbered from 1 like the printed manuals."""
+    pages = []
+    with fitz.open(pdf_path) as doc:
+        for number, page in enumerate(doc, start=1):
             page_text = page.get_text().strip()
             if page_text:
-                text.append(page_text)
-        return "\n".join(text)
-    except Exception as e:
-        print(f"[ERROR] Could not read {pdf_path}: {e}")
-        return ""
-
-def save_text_as_json(doc_name, text, source_file):
-    """Saves extracted text to JSON with metadata."""
-    output_path = os.path.join(OUTPUT_DIR, f"{doc_name}.json")
-    data = {
-        "type": "pdf",
-        "source": source_file,
-        "text": text
-    }
-    with open(output_path, "w", encoding="utf-8") as f:
+                pages.append({"page": number, "text": page_text})
+    return pages
+
+def save_pages_as_json(doc_name: str, pages: List[Dict], source_file: str, output_dir: str = OUTPUT_DIR) -> str:
+    """Saves per-page records (the list shape load_documents() reads) with metadata."""
+    output_path = os.path.join(output_dir, f"{doc_name}.json")
+    data = [{"type": "pdf", "source": source_file, "page": p["page"], "text": p["text"]} for p in pages]
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+def process_pdf(filename: str, pdf_dir: str = PDF_DIR, output_dir: str = OUTPUT_DIR) -> Dict:
+    """Extract and save one PDF; runs in a worker process."""
+    pdf_path = os.path.join(pdf_dir, filename)
+    start = time.perf_counter()
+    try:
+        pages = extract_pages(pdf_path)
+    except Exception as e:
+        return {"file": filename, "error": str(e)}
+    output = None
+    if pages:
+        output = save_pages_as_json(os.path.splitext(filename)[0], pages, filename, output_dir)
+    return {"file": filename, "pages": len(pages), "output": output, "seconds": time.perf_counter() - start}
+
+# ---------- MANIFEST ----------
+def file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def load_manifest(path: str = MANIFEST_FILE) -> Dict[str, Dict]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError:
+            return {}
+
+def save_manifest(manifest: Dict[str, Dict], path: str = MANIFEST_FILE):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def is_unchanged(path: str, entry: Optional[Dict]) -> bool:
+    """mtime+size match -> unchanged; otherwise fall back to the content hash (touched but identical).
+
+    PDFs without extractable text (scans) have no output; their entry records pages == 0 instead.
+    """
+    if not entry:
+        return False
+    if entry.get("pages") != 0 and (not entry.get("output") or not os.path.exists(entry["output"])):
+        return False
+    st = os.stat(path)
+    if entry.get("mtime_ns") == st.st_mtime_ns and entry.get("size") == st.st_size:
+        return True
+    if entry.get("sha256") == file_hash(path):
+        entry.update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+        return True
+    return False
+
+# ---------- MAIN ----------
+def process_all_pdfs(pdf_dir: str = PDF_DIR, output_dir: str = OUTPUT_DIR, manifest_path: str = MANIFEST_FILE,
+                     workers: int = WORKERS, force: bool = False) -> Dict:
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {} if force else load_manifest(manifest_path)
+    pdfs = sorted(f for f in os.listdir(pdf_dir) if f.lower().endswith(".pdf"))
+    todo = [f for f in pdfs if not is_unchanged(os.path.join(pdf_dir, f), manifest.get(f))]
+    print(f"[INFO] {len(pdfs)} PDFs, {len(pdfs) - len(todo)} unchanged, extracting {len(todo)} with {workers} workers")
 
-def process_all_pdfs():
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    for filename in os.listdir(PDF_DIR):
-        if filename.lower().endswith(".pdf"):
-            pdf_path = os.path.join(PDF_DIR, filename)
-            doc_name = os.path.splitext(filename)[0]
-            print(f"[INFO] Extracting {filename}")
-            text = extract_text_from_pdf(pdf_path)
-            if text:
-                save_text_as_json(doc_name, text, filename)
-    print("[DONE] PDF text extraction complete.")
+    start = time.perf_counter()
+    pages = 0
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(todo) or 1))) as pool:
+        futures = [pool.submit(process_pdf, f, pdf_dir, output_dir) for f in todo]
+        for future in as_completed(futures):
+            result = future.result()
+            if "error" in result:
+                print(f"[ERROR] Could not read {result['file']}: {result['error']}")
+                continue
+            path = os.path.join(pdf_dir, result["file"])
+            st = os.stat(path)
+            manifest[result["file"]] = {
+                "mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": file_hash(path),
+                "pages": result["pages"], "output": result["output"],
+            }
+            save_manifest(manifest, manifest_path)  # After every file, so an interrupted run resumes
+            pages += result["pages"]
+            print(f"[INFO] Extracted {result['file']} ({result['pages']} pages, {result['seconds']:.1f}s)")
+    elapsed = time.perf_counter() - start
+    save_manifest(manifest, manifest_path)
+    rate = pages / elapsed if elapsed > 0 else 0.0
+    print(f"[DONE] PDF text extraction complete: {pages} pages in {elapsed:.1f}s ({rate:.1f} pages/sec).")
+    return {"files": len(todo), "skipped": len(pdfs) - len(todo), "pages": pages, "seconds": elapsed}
 
 if __name__ == "__main__":
-    process_all_pdfs()
+    parser = argparse.ArgumentParser(description="Extract per-page text from the IRCC PDF manuals.")
+    parser.add_argument("--pdf-dir", default=PDF_DIR)
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--force", action="store_true", help="Re-extract every PDF, ignoring the manifest.")
+    args = parser.parse_args()
+    process_all_pdfs(args.pdf_dir, args.output_dir, os.path.join(args.pdf_dir, "extract_manifest.json"),
+                     args.workers, args.force)
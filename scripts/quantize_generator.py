@@ -0,0 +1,24 @@
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from ircc_rag.llm_backend import MODEL_CACHE_DIR, convert  # noqa: E402
+
+# Config
+LOCAL_LLM_MODEL = "google/flan-t5-xl"
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the int8 / ONNX generator artefacts ahead of time.")
+    parser.add_argument("--model", default=LOCAL_LLM_MODEL)
+    parser.add_argument("--backend", choices=["int8", "onnx"], action="append",
+                        help="Repeatable; defaults to both.")
+    parser.add_argument("--cache-dir", default=MODEL_CACHE_DIR)
+    args = parser.parse_args()
+
+    for backend in args.backend or ["int8", "onnx"]:
+        print(f"[INFO] Converting {args.model} -> {backend}...")
+        convert(args.model, backend, args.cache_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Shared building blocks for the IRCC RAG pipeline."""
@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import uuid
+import atexit
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+import faiss
+import numpy as np
+
+# Config
+SIMILARITY_THRESHOLD = 0.95   # Cosine similarity between questions to count as the same question
+TTL_SECONDS = 7 * 24 * 3600
+MAX_ENTRIES = 2000
+NEIGHBOURS = 8
+SAVE_INTERVAL_S = 30.0        # New entries are written this long after the first unsaved one, and at exit
+
+
+def chunk_key(chunk: Dict) -> int:
+    """Chunk id, or a text-derived id for legacy stores that predate ids."""
+    if chunk.get("id") is not None:
+        return int(chunk["id"])
+    return int(hashlib.sha1(chunk["text"].encode("utf-8")).hexdigest()[:15], 16)
+
+
+def store_version(vector_dir: str, names: Iterable[str] = ("index.faiss", "chunks.bin", "chunks_metadata.json")) -> str:
+    """Fingerprint of the vector store files; changes whenever embed_documents.py rewrites them."""
+    h = hashlib.sha1()
+    for name in names:
+        path = os.path.join(vector_dir, name)
+        if os.path.exists(path):
+            st = os.stat(path)
+            h.update(f"{name}:{st.st_size}:{st.st_mtime_ns};".encode("utf-8"))
+    return h.hexdigest()
+
+
+class AnswerCache:
+    """Answers keyed by (question embedding, retrieved chunk ids).
+
+    A hit needs a cached question within `threshold` cosine similarity *and* the exact same
+    retrieved chunks, so a near-duplicate question that pulls different context still goes
+    to the model. Entries expire after `ttl_s`, the least recently used are evicted past
+    `max_entries`, and the whole cache is dropped when the vector store version changes.
+
+    Persistence is off the request path: a timer thread writes the entries to `path` (a JSON index)
+    plus a float32 .npy of their question embeddings, merging in what other processes sharing the
+    file saved meanwhile.
+    """
+
+    def __init__(self, path: str, version: str, threshold: float = SIMILARITY_THRESHOLD,
+                 ttl_s: float = TTL_SECONDS, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.version = version
+        self.threshold = threshold
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[int, Dict]" = OrderedDict()
+        self._vectors: Dict[int, np.ndarray] = {}
+        self.index = None
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "saved_s": 0.0}
+        self._save_timer = None
+        self._old_versions = set()  # Store versions this process moved off; files of those may be replaced
+        self._save_lock = threading.Lock()  # One save at a time; held without blocking lookups
+        self._load()
+        atexit.register(self.flush)
+
+    # ---------- INDEX ----------
+    def _ensure_index(self, dim: int):
+        if self.index is None:
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+
+    def _add(self, entry: Dict, vector: np.ndarray, recent: bool = True):
+        self._ensure_index(len(vector))
+        entry_id = self._next_id
+        self._next_id += 1
+        self.entries[entry_id] = entry
+        if not recent:
+            self.entries.move_to_end(entry_id, last=False)  # First in line for LRU eviction
+        self._vectors[entry_id] = vector
+        self.index.add_with_ids(vector[None, :], np.array([entry_id], dtype="int64"))
+
+    def _remove(self, entry_ids: List[int]):
+        for entry_id in entry_ids:
+            self.entries.pop(entry_id, None)
+            self._vectors.pop(entry_id, None)
+        if entry_ids and self.index is not None:
+            self.index.remove_ids(np.array(entry_ids, dtype="int64"))
+
+    def _evict(self):
+        now = time.time()
+        expired = [i for i, e in self.entries.items() if now - e["created"] > self.ttl_s]
+        overflow = max(0, len(self.entries) - len(expired) - self.max_entries)
+        expired_set = set(expired)
+        lru = [i for i in self.entries if i not in expired_set][:overflow]
+        self._remove(expired + lru)
+
+    # ---------- PUBLIC API ----------
+    def lookup(self, query_emb: np.ndarray, chunk_ids: Iterable[int]) -> Optional[Dict]:
+        query = np.ascontiguousarray(query_emb, dtype="float32").reshape(1, -1)
+        key = sorted(set(chunk_ids))
+        with self._lock:
+            if self.index is not None and self.index.ntotal:
+                sims, ids = self.index.search(query, min(NEIGHBOURS, self.index.ntotal))
+                now = time.time()
+                for sim, entry_id in zip(sims[0], ids[0]):
+                    if entry_id < 0 or sim < self.threshold:
+                        break
+                    entry = self.entries[int(entry_id)]
+                    if now - entry["created"] > self.ttl_s:
+                        self._remove([int(entry_id)])
+                        continue
+                    if entry["chunk_ids"] == key:
+                        self.entries.move_to_end(int(entry_id))
+                        entry["hits"] += 1
+                        self.counters["hits"] += 1
+                        self.counters["saved_s"] += entry["gen_s"]
+                        return entry
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, question: str, query_emb: np.ndarray, chunk_ids: Iterable[int], answer: str, gen_s: float):
+        query = np.ascontiguousarray(query_emb, dtype="float32").reshape(1, -1)
+        with self._lock:
+            self._add({
+                "key": uuid.uuid4().hex,
+                "question": question,
+                "chunk_ids": sorted(set(chunk_ids)),
+                "answer": answer,
+                "gen_s": gen_s,
+                "created": time.time(),
+                "hits": 0,
+            }, query[0])
+            self._evict()
+            self._schedule_save()
+
+    def invalidate(self, version: str):
+        """Drop everything if the vector store changed since the entries were cached."""
+        with self._lock:
+            if version == self.version:
+                return
+            self._old_versions.add(self.version)
+            self.version = version
+            self.entries.clear()
+            self._vectors.clear()
+            self.index = None
+            self._schedule_save()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self.counters)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+            stats["entries"] = len(self.entries)
+            return stats
+
+    # ---------- PERSISTENCE ----------
+    def _read(self):
+        """(version, entries, vectors, vectors file) saved at `path`, or None when there is nothing readable."""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            entries = data.get("entries", [])
+            if "vectors" in data:
+                vectors = np.load(os.path.join(os.path.dirname(self.path), data["vectors"]))
+            else:  # Older caches kept the embeddings inline
+                vectors = np.array([e.pop("embedding") for e in entries], dtype="float32")
+        except (OSError, ValueError, KeyError):
+            return None  # Unreadable, or a concurrent save replaced it; the next save merges again
+        if len(vectors) != len(entries):
+            return None
+        return data.get("version"), entries, vectors, data.get("vectors")
+
+    def _merge(self, saved):
+        """Add entries another process saved that this one does not have (they count as least recent)."""
+        version, entries, vectors, _ = saved
+        if version != self.version:
+            return  # Built against another vector store
+        now = time.time()
+        known = {e.get("key") for e in self.entries.values()}
+        for entry, vector in zip(entries, vectors):
+            entry.setdefault("key", uuid.uuid4().hex)
+            if entry["key"] not in known and now - entry["created"] <= self.ttl_s:
+                self._add(entry, np.ascontiguousarray(vector, dtype="float32"), recent=False)
+
+    def _load(self):
+        saved = self._read()
+        if saved is None:
+            if os.path.exists(self.path):
+                print(f"[WARN] Could not load answer cache {self.path}, starting empty")
+            return
+        self._merge(saved)
+        self._evict()
+
+    def _schedule_save(self):
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(SAVE_INTERVAL_S, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """Merge with the saved cache and write it back; called by the save timer and at exit."""
+        with self._save_lock:
+            with self._lock:
+                if self._save_timer is None:
+                    return  # Nothing new since the last save
+                self._save_timer.cancel()
+                self._save_timer = None
+            saved = self._read()
+            with self._lock:
+                if saved is not None and saved[0] != self.version and saved[0] not in self._old_versions:
+                    return  # Saved by a worker on another (likely newer) store: don't wipe its entries
+                if saved is not None:
+                    self._merge(saved)
+                    self._evict()
+                ids = list(self.entries)
+                entries = [self.entries[i] for i in ids]
+                dim = self.index.d if self.index is not None else 0
+                vectors = np.stack([self._vectors[i] for i in ids]) if ids else np.zeros((0, dim), dtype="float32")
+
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            base = os.path.splitext(os.path.basename(self.path))[0]
+            vectors_name = f"{base}.{uuid.uuid4().hex[:12]}.npy"  # New name per save: readers never see a torn file
+            np.save(os.path.join(directory, vectors_name), vectors)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": self.version, "vectors": vectors_name, "entries": entries}, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+            if saved is not None and saved[3] and saved[3] != vectors_name:
+                try:
+                    os.remove(os.path.join(directory, saved[3]))
+                except OSError:
+                    pass
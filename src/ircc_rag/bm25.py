@@ -0,0 +1,137 @@
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ircc_rag.shared_store import mmap_npz
+
+# Config
+BM25_FILE = "bm25.npz"
+K1 = 1.2
+B = 0.75
+RRF_K = 60  # Standard reciprocal-rank-fusion damping constant
+
+# Letters and numbers are split apart ("IMM5257E" -> imm, 5257, e) while decimals and
+# section numbers stay whole ("150.00", "44.1"), so form numbers, fees and sections
+# survive as exact-match terms.
+_TOKEN_RE = re.compile(r"[a-z]+|\d+(?:\.\d+)*")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from", "how", "i", "if", "in",
+    "is", "it", "my", "of", "on", "or", "the", "this", "that", "to", "what", "when", "which", "who",
+    "with", "you", "your",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    text = re.sub(r"(?<=\d),(?=\d{3})", "", text.lower())  # 1,365.00 -> 1365.00
+    return [t for t in _TOKEN_RE.findall(text) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """Precomputed BM25 inverted index in CSR form.
+
+    Postings store the final per-(term, doc) BM25 weight, so scoring a query is a single
+    np.bincount over the postings of its terms.
+    """
+
+    def __init__(self, ids: np.ndarray, vocab: Sequence[str], indptr: np.ndarray,
+                 docs: np.ndarray, weights: np.ndarray):
+        self.ids = ids
+        self.vocab = {term: i for i, term in enumerate(vocab)}
+        self.indptr = indptr
+        self.docs = docs
+        self.weights = weights
+
+    @classmethod
+    def build(cls, texts: Sequence[str], ids: Sequence[int], k1: float = K1, b: float = B) -> "BM25Index":
+        doc_terms = [Counter(tokenize(t)) for t in texts]
+        lengths = np.array([sum(c.values()) for c in doc_terms], dtype="float32")
+        avgdl = float(lengths.mean()) if len(lengths) else 0.0
+
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for doc, counts in enumerate(doc_terms):
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc, tf))
+
+        n = len(texts)
+        vocab = sorted(postings)
+        indptr = np.zeros(len(vocab) + 1, dtype="int64")
+        docs_out, weights_out = [], []
+        for i, term in enumerate(vocab):
+            plist = postings[term]
+            doc_idx = np.array([d for d, _ in plist], dtype="int32")
+            tf = np.array([f for _, f in plist], dtype="float32")
+            idf = np.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            norm = k1 * (1 - b + b * lengths[doc_idx] / max(avgdl, 1e-9))
+            docs_out.append(doc_idx)
+            weights_out.append((idf * tf * (k1 + 1) / (tf + norm)).astype("float32"))
+            indptr[i + 1] = indptr[i] + len(plist)
+        return cls(
+            np.asarray(ids, dtype="int64"),
+            vocab,
+            indptr,
+            np.concatenate(docs_out) if docs_out else np.zeros(0, dtype="int32"),
+            np.concatenate(weights_out) if weights_out else np.zeros(0, dtype="float32"),
+        )
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for `query` (row order = self.ids)."""
+        cols = [self.vocab[t] for t in set(tokenize(query)) if t in self.vocab]
+        if not cols:
+            return np.zeros(len(self.ids), dtype="float32")
+        spans = [np.arange(self.indptr[c], self.indptr[c + 1]) for c in cols]
+        rows = np.concatenate(spans)
+        return np.bincount(self.docs[rows], weights=self.weights[rows], minlength=len(self.ids)).astype("float32")
+
+    def search(self, query: str, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(scores, chunk ids) of the best `top_k` matches, best first; zero-score docs are dropped."""
+        scores = self.scores(query)
+        k = min(top_k, len(scores))
+        if k == 0:
+            return np.zeros(0, dtype="float32"), np.zeros(0, dtype="int64")
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = top[scores[top] > 0]
+        return scores[top], self.ids[top]
+
+    # ---------- PERSISTENCE ----------
+    def save(self, path: str):
+        vocab = np.array(sorted(self.vocab, key=self.vocab.get))
+        # Write through a file object so numpy does not append ".npz" to temp file names.
+        with open(path, "wb") as f:
+            np.savez(f, ids=self.ids, vocab=vocab, indptr=self.indptr, docs=self.docs, weights=self.weights)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = False) -> "BM25Index":
+        """With `mmap`, the postings stay mapped from the file and are shared between processes."""
+        if mmap:
+            data = mmap_npz(path)
+            return cls(data["ids"], data["vocab"].tolist(), data["indptr"], data["docs"], data["weights"])
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["ids"], data["vocab"].tolist(), data["indptr"], data["docs"], data["weights"])
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], top_k: int, k: int = RRF_K,
+                           weights: Optional[Sequence[float]] = None) -> List[int]:
+    """Fuse ranked id lists: score(id) = sum(w / (k + rank)), rank starting at 1."""
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[int, float] = {}
+    for ranking, w in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[int(doc_id)] = fused.get(int(doc_id), 0.0) + w / (k + rank)
+    return sorted(fused, key=fused.get, reverse=True)[:top_k]
+
+
+def fuse_with_bm25(bm25: BM25Index, query: str, dense_ids: Sequence[int], top_k: int,
+                   candidates: int = 20) -> List[int]:
+    """A dense ranking already computed for `query` and BM25's top-`candidates`, fused with RRF."""
+    _, sparse_ids = bm25.search(query, candidates)
+    return reciprocal_rank_fusion([[i for i in dense_ids if i >= 0], sparse_ids], top_k)
+
+
+def hybrid_search(index, bm25: BM25Index, query: str, query_emb: np.ndarray, top_k: int,
+                  candidates: int = 20) -> List[int]:
+    """Dense top-`candidates` and BM25 top-`candidates`, fused with RRF down to `top_k` chunk ids."""
+    _, dense_ids = index.search(query_emb, candidates)
+    return fuse_with_bm25(bm25, query, dense_ids[0], top_k, candidates)
@@ -0,0 +1,233 @@
+import os
+import json
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+# Config
+STORE_FILE = "chunks.bin"
+PARENTS_FILE = "parents.bin"  # Parent-child stores: section text per chunks.bin `parent_id`
+LEGACY_METADATA_FILE = "chunks_metadata.json"
+MAGIC = b"IRCCCHK1"
+NULL_INT = np.iinfo(np.int64).min
+LIST_SEP = "\x1f"  # ASCII unit separator, never produced by clean_text()
+_ALIGN = 8
+
+# File layout:
+#   MAGIC | uint32 header length | JSON header | 8-byte aligned sections
+# The header lists every column with its kind and the (dtype, offset, count) of the
+# sections backing it. Rows are sorted by chunk id so a lookup is one searchsorted.
+
+
+def _column_kind(values: List) -> str:
+    present = [v for v in values if v is not None]
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        return "int"
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return "float"
+    if all(isinstance(v, str) for v in present):
+        # Low-cardinality strings such as `source` are dictionary-encoded.
+        return "category" if len(set(present)) <= max(1, len(values) // 8) else "str"
+    if all(isinstance(v, list) and all(isinstance(x, str) for x in v) for v in present):
+        return "str_list"
+    return "json"
+
+
+def _blob(strings: List[str]):
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype="uint64")
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype="uint8")
+
+
+def _encode_column(name: str, kind: str, values: List):
+    """Return (column header, {section name: array})."""
+    column = {"name": name, "kind": kind}
+    if kind == "int":
+        return column, {"values": np.array([NULL_INT if v is None else v for v in values], dtype="int64")}
+    if kind == "float":
+        return column, {"values": np.array([np.nan if v is None else v for v in values], dtype="float64")}
+    if kind == "category":
+        categories = sorted({v for v in values if v is not None})
+        lookup = {c: i for i, c in enumerate(categories)}
+        column["categories"] = categories
+        return column, {"codes": np.array([-1 if v is None else lookup[v] for v in values], dtype="int32")}
+    if kind == "str":
+        offsets, data = _blob(["" if v is None else v for v in values])
+        sections = {"offsets": offsets, "data": data}
+        if any(v is None for v in values):
+            sections["null"] = np.array([v is None for v in values], dtype="uint8")
+        return column, sections
+    if kind == "str_list":
+        offsets, data = _blob([LIST_SEP.join(v or []) for v in values])
+        return column, {"offsets": offsets, "data": data}
+    offsets, data = _blob([json.dumps(v, ensure_ascii=False) for v in values])
+    return column, {"offsets": offsets, "data": data}
+
+
+def write_chunk_store(chunks: List[Dict], path: str):
+    """Write chunk dicts as a columnar, memory-mappable file. Missing ids fall back to list position."""
+    rows = [c if "id" in c else dict(c, id=pos) for pos, c in enumerate(chunks)]
+    rows.sort(key=lambda c: c["id"])
+    names = [k for k in dict.fromkeys(k for c in rows for k in c) if k != "id"]
+
+    columns, arrays = [], []
+    for name in ["id"] + names:
+        values = [c.get(name) for c in rows]
+        column, sections = _encode_column(name, "int" if name == "id" else _column_kind(values), values)
+        column["sections"] = {}
+        for section, array in sections.items():
+            column["sections"][section] = [array.dtype.str, len(array)]
+            arrays.append(array)
+        columns.append(column)
+
+    # Offsets depend on the header length, so lay sections out relative to the data start first.
+    layout, cursor = [], 0
+    for array in arrays:
+        cursor = -(-cursor // _ALIGN) * _ALIGN
+        layout.append(cursor)
+        cursor += array.nbytes
+    i = 0
+    for column in columns:
+        for section in column["sections"]:
+            column["sections"][section].append(layout[i])
+            i += 1
+    header = json.dumps({"version": 1, "n": len(rows), "columns": columns}, ensure_ascii=False).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 4 + len(header)) // _ALIGN) * _ALIGN
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(4, "little"))
+        f.write(header)
+        for offset, array in zip(layout, arrays):
+            f.write(b"\0" * (data_start + offset - f.tell()))
+            f.write(array.tobytes())
+
+
+class ChunkStore(Mapping):
+    """Read-only chunk id -> chunk dict mapping backed by a memory-mapped file.
+
+    Opening only parses the header; a row is decoded when it is looked up, so memory
+    use is the pages the top-k lookups touch rather than the whole corpus.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._buf = np.memmap(path, dtype="uint8", mode="r")
+        if bytes(self._buf[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a chunk store")
+        header_len = int.from_bytes(bytes(self._buf[len(MAGIC):len(MAGIC) + 4]), "little")
+        header_end = len(MAGIC) + 4 + header_len
+        header = json.loads(bytes(self._buf[len(MAGIC) + 4:header_end]).decode("utf-8"))
+        data_start = -(-header_end // _ALIGN) * _ALIGN
+
+        self._n = header["n"]
+        self._columns = []
+        for column in header["columns"]:
+            sections = {
+                name: np.frombuffer(self._buf, dtype=np.dtype(dtype), count=count, offset=data_start + offset)
+                for name, (dtype, count, offset) in column["sections"].items()
+            }
+            self._columns.append((column["name"], column["kind"], column.get("categories"), sections))
+        self._ids = self._columns[0][3]["values"]
+
+    # ---------- LOOKUP ----------
+    def _row(self, chunk_id) -> int:
+        row = int(np.searchsorted(self._ids, chunk_id))
+        if row >= self._n or self._ids[row] != chunk_id:
+            return -1
+        return row
+
+    def _decode(self, row: int) -> Dict:
+        chunk = {}
+        for name, kind, categories, sections in self._columns:
+            if kind == "int":
+                value = int(sections["values"][row])
+                chunk[name] = None if value == NULL_INT else value
+            elif kind == "float":
+                value = float(sections["values"][row])
+                chunk[name] = None if np.isnan(value) else value
+            elif kind == "category":
+                code = int(sections["codes"][row])
+                chunk[name] = None if code < 0 else categories[code]
+            else:
+                offsets = sections["offsets"]
+                text = sections["data"][int(offsets[row]):int(offsets[row + 1])].tobytes().decode("utf-8")
+                if kind == "str":
+                    null = sections.get("null")
+                    chunk[name] = None if null is not None and null[row] else text
+                elif kind == "str_list":
+                    chunk[name] = text.split(LIST_SEP) if text else []
+                else:
+                    chunk[name] = json.loads(text)
+        return chunk
+
+    def __getitem__(self, chunk_id) -> Dict:
+        row = self._row(chunk_id)
+        if row < 0:
+            raise KeyError(chunk_id)
+        return self._decode(row)
+
+    def __contains__(self, chunk_id) -> bool:
+        return self._row(chunk_id) >= 0
+
+    def __iter__(self) -> Iterator[int]:
+        return (int(i) for i in self._ids)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def ids(self) -> np.ndarray:
+        return self._ids
+
+
+def convert_json(json_path: str, store_path: str) -> int:
+    """Convert a legacy chunks_metadata.json into a chunk store; returns the row count."""
+    with open(json_path, "r", encoding="utf-8") as f:
+        chunks = json.load(f)
+    tmp = store_path + ".tmp"
+    write_chunk_store(chunks, tmp)
+    os.replace(tmp, store_path)
+    return len(chunks)
+
+
+def open_chunks(vector_dir: str) -> Optional[Mapping]:
+    """Chunk id -> chunk mapping for a vector store, preferring the binary store over legacy JSON."""
+    store_path = os.path.join(vector_dir, STORE_FILE)
+    if os.path.exists(store_path):
+        return ChunkStore(store_path)
+    json_path = os.path.join(vector_dir, LEGACY_METADATA_FILE)
+    if os.path.exists(json_path):
+        with open(json_path, "r", encoding="utf-8") as f:
+            # Older stores have no ids; vectors were added in list order.
+            return {c.get("id", pos): c for pos, c in enumerate(json.load(f))}
+    return None
+
+
+def open_parents(vector_dir: str) -> Optional[Mapping]:
+    """Parent id -> parent section for stores built with parent-child chunking, else None."""
+    path = os.path.join(vector_dir, PARENTS_FILE)
+    return ChunkStore(path) if os.path.exists(path) else None
+
+
+def expand_to_parents(chunks: Sequence[Dict], parents: Optional[Mapping]) -> List[Dict]:
+    """Swap best-first child chunks for their parent sections, each parent once, at the rank of its
+    best child. The parent carries that child under "child", for when the whole section does not
+    fit the prompt, and the child's "sources" when near-duplicates were merged into it. Chunks
+    without a parent (flat stores) pass through unchanged.
+    """
+    if parents is None:
+        return list(chunks)
+    expanded, seen = [], set()
+    for chunk in chunks:
+        parent_id = chunk.get("parent_id")
+        if parent_id is None or parent_id not in parents:
+            expanded.append(chunk)
+        elif parent_id not in seen:
+            seen.add(parent_id)
+            parent = dict(parents[parent_id], child=chunk)
+            if chunk.get("sources"):
+                parent["sources"] = chunk["sources"]
+            expanded.append(parent)
+    return expanded
@@ -0,0 +1,83 @@
+import json
+import socket
+import http.client
+from typing import Dict, List
+from urllib.parse import urlparse
+
+import numpy as np
+
+DEFAULT_TIMEOUT = 600  # Generation on CPU can take minutes under load
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class GenerationClient:
+    """Blocking client for ircc_rag.server; `url` is http://host:port or unix:///path/to.sock."""
+
+    def __init__(self, url: str, timeout: float = DEFAULT_TIMEOUT):
+        self.url = urlparse(url)
+        self.timeout = timeout
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self.url.scheme == "unix":
+            return _UnixHTTPConnection(self.url.path, self.timeout)
+        return http.client.HTTPConnection(self.url.hostname, self.url.port or 80, timeout=self.timeout)
+
+    def _request(self, method: str, path: str, payload: Dict = None) -> Dict:
+        conn = self._connection()
+        try:
+            body = json.dumps(payload).encode("utf-8") if payload is not None else None
+            headers = {"Content-Type": "application/json", "Connection": "close"}
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            data = json.loads(response.read() or b"{}")
+        finally:
+            conn.close()
+        if response.status != 200:
+            raise RuntimeError(f"Generation server returned {response.status}: {data.get('error')}")
+        return data
+
+    def generate(self, prompt: str, max_new_tokens: int = 300) -> str:
+        return self._request("POST", "/generate", {"prompt": prompt, "max_new_tokens": max_new_tokens})["generated_text"]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return np.array(self._request("POST", "/embed", {"texts": list(texts)})["embeddings"], dtype="float32")
+
+    def health(self) -> bool:
+        try:
+            return self._request("GET", "/health").get("status") == "ok"
+        except OSError:
+            return False
+
+    def stats(self) -> Dict:
+        return self._request("GET", "/stats")
+
+
+class RemoteEmbedder:
+    """Drop-in for SentenceTransformer.encode() backed by the generation server."""
+
+    def __init__(self, client: GenerationClient):
+        self.client = client
+
+    def encode(self, sentences, normalize_embeddings: bool = True, **kwargs) -> np.ndarray:
+        # The server always returns L2-normalized vectors, which is what the FAISS index expects.
+        return self.client.embed(sentences)
+
+
+class RemoteGenerator:
+    """Drop-in for the transformers text2text pipeline call used by generate_answer()."""
+
+    def __init__(self, client: GenerationClient):
+        self.client = client
+
+    def __call__(self, prompt: str, max_new_tokens: int = 300, **kwargs) -> List[Dict[str, str]]:
+        return [{"generated_text": self.client.generate(prompt, max_new_tokens)}]
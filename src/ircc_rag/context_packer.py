@@ -0,0 +1,142 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Config
+TOKEN_BUDGET = 512           # flan-t5 encoder window; anything past it is truncated away
+SAFETY_MARGIN = 8            # Per-piece counts are summed, joins can tokenize slightly differently
+HISTORY_TOKEN_SHARE = 0.25   # At most this share of the budget goes to conversation history
+MIN_OVERLAP_CHARS = 20       # RecursiveCharacterTextSplitter overlap is up to 80 chars
+MAX_OVERLAP_CHARS = 120
+
+PROMPT_HEADER = (
+    "You are an AI assistant specializing in answering questions about IRCC guidelines. "
+    "Base your answers only on the provided context. If the context does not contain the answer, say so clearly.\n\n"
+)
+
+
+def render_prompt(context: str, history: str, question: str) -> str:
+    return f"{PROMPT_HEADER}Context:\n{context}\n\nConversation History:\n{history}\n\nUser: {question}\nBot:"
+
+
+def source_label(chunk: Dict, all_sources: bool = False) -> str:
+    """File name plus page for chunks extracted page by page from the PDF manuals; with `all_sources`,
+    also the other files a chunk merged at build time (repeated or near-duplicate text) came from."""
+    page = chunk.get("page_start")
+    end = chunk.get("page_end")
+    if page is None:
+        label = chunk["source"]
+    else:
+        label = f"{chunk['source']}, page {page}" if end in (None, page) else f"{chunk['source']}, pages {page}-{end}"
+    others = (chunk.get("sources") or [])[1:] if all_sources else []
+    return f"{label} (also in {', '.join(others)})" if others else label
+
+
+def count_tokens(tokenizer, text: str) -> int:
+    return len(tokenizer(text, add_special_tokens=False).input_ids)
+
+
+def _overlap(a: str, b: str) -> int:
+    """Length of the longest suffix of `a` that is a prefix of `b` (within the splitter's overlap range)."""
+    for k in range(min(MAX_OVERLAP_CHARS, len(a), len(b)), MIN_OVERLAP_CHARS - 1, -1):
+        if a.endswith(b[:k]):
+            return k
+    return 0
+
+
+def strip_overlap(text: str, kept: Sequence[str]) -> str:
+    """Drop the head/tail of `text` that repeats the splitter overlap of an already kept neighbour."""
+    for other in kept:
+        head = _overlap(other, text)
+        if head:
+            text = text[head:]
+        tail = _overlap(text, other)
+        if tail:
+            text = text[:-tail]
+    return text.strip()
+
+
+@dataclass
+class PackStats:
+    budget: int
+    tokens_used: int
+    chunks_used: int
+    chunks_dropped: int
+    history_turns_used: int
+    history_turns_dropped: int
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(self.__dict__)
+
+
+class ContextPacker:
+    """Builds the flan-t5 prompt within a token budget.
+
+    The question and the fixed instructions are always kept. The newest history turns are
+    fitted into their share of the budget first, then the oldest are dropped. Chunks arrive
+    in score order and are added greedily while they fit, with the text repeated from a kept
+    neighbouring chunk removed; a parent section that does not fit is replaced by its matched
+    child. Chunk token counts come from the `tokens` column written at index-build time;
+    anything else is tokenized once and memoized.
+    """
+
+    def __init__(self, tokenizer, budget: int = TOKEN_BUDGET, history_share: float = HISTORY_TOKEN_SHARE):
+        self.tokenizer = tokenizer
+        self.budget = budget
+        self.history_share = history_share
+        self._memo: Dict[str, int] = {}
+        self.fixed_tokens = self._tokens(render_prompt("", "", "")) + 1  # + </s>
+
+    def _tokens(self, text: str) -> int:
+        if text not in self._memo:
+            if len(self._memo) > 50000:
+                self._memo.clear()
+            self._memo[text] = count_tokens(self.tokenizer, text)
+        return self._memo[text]
+
+    def _chunk_piece(self, chunk: Dict, kept_texts: List[Tuple[str, str]]) -> Tuple[str, str, int]:
+        text = strip_overlap(chunk["text"], [t for s, t in kept_texts if s == chunk["source"]])
+        header = f"Source: {source_label(chunk)}\n"
+        cached: Optional[int] = chunk.get("tokens")
+        body = cached if cached is not None and text == chunk["text"] else self._tokens(text)
+        return header, text, self._tokens(header) + body + 1  # + "\n\n" separator
+
+    def pack(self, question: str, chunks: Sequence[Dict], chat_history: Sequence[Dict],
+             max_history_turns: int = 5) -> Tuple[str, PackStats]:
+        remaining = self.budget - SAFETY_MARGIN - self.fixed_tokens - self._tokens(question)
+
+        # History: newest turns first, bounded by its share of the budget.
+        history_budget = min(max(remaining, 0), int(self.budget * self.history_share))
+        turns = list(chat_history)[-max_history_turns:]
+        kept_turns = []
+        for turn in reversed(turns):
+            line = f"User: {turn['user']}\nBot: {turn['bot']}"
+            cost = self._tokens(line) + 1
+            if cost > history_budget:
+                break  # Older turns are dropped before newer ones
+            kept_turns.insert(0, line)
+            history_budget -= cost
+            remaining -= cost
+
+        kept, kept_texts, used_chunks = [], [], 0
+        for chunk in chunks:
+            header, text, cost = self._chunk_piece(chunk, kept_texts)
+            if (not text or cost > remaining) and chunk.get("child") is not None:
+                chunk = chunk["child"]  # Parent section too long for what is left: its best-matching child
+                header, text, cost = self._chunk_piece(chunk, kept_texts)
+            if not text or cost > remaining:
+                continue
+            kept.append(header + text)
+            kept_texts.append((chunk["source"], chunk["text"]))
+            remaining -= cost
+            used_chunks += 1
+
+        prompt = render_prompt("\n\n".join(kept), "\n".join(kept_turns), question)
+        stats = PackStats(
+            budget=self.budget,
+            tokens_used=self.budget - SAFETY_MARGIN - remaining,
+            chunks_used=used_chunks,
+            chunks_dropped=len(chunks) - used_chunks,
+            history_turns_used=len(kept_turns),
+            history_turns_dropped=len(turns) - len(kept_turns),
+        )
+        return prompt, stats
@@ -0,0 +1,159 @@
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+# Config
+CACHE_DIR = os.environ.get("IRCC_CACHE_DIR", str(Path(__file__).resolve().parents[2] / ".cache"))
+QUERY_LRU_SIZE = 1024
+_SQL_BATCH = 500
+
+EncodeFn = Callable[[List[str]], np.ndarray]
+
+
+def normalize_text(text: str) -> str:
+    """Unicode-normalize and collapse whitespace so trivially different strings share a key."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def text_key(model_name: str, text: str) -> str:
+    return hashlib.sha256(f"{model_name}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Persistent (model, text) -> embedding cache.
+
+    Vectors live in an append-only float32 matrix that is memory-mapped for reads;
+    a SQLite table maps the text hash to its row. Query embeddings additionally go
+    through an in-memory LRU so repeat questions skip SQLite as well.
+    Stored vectors are L2-normalized, matching what the FAISS index expects.
+    """
+
+    def __init__(self, model_name: str, cache_dir: str = CACHE_DIR, lru_size: int = QUERY_LRU_SIZE):
+        self.model_name = model_name
+        os.makedirs(os.path.join(cache_dir, "embeddings"), exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        base = os.path.join(cache_dir, "embeddings", slug)
+        self.matrix_path = base + ".f32"
+        self.db = sqlite3.connect(base + ".sqlite", timeout=30, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS rows (key TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        open(self.matrix_path, "ab").close()
+
+        self.lru_size = lru_size
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._dim = self._read_dim()
+        self.counters = {"lru_hits": 0, "disk_hits": 0, "misses": 0}
+
+    # ---------- STORAGE ----------
+    def _read_dim(self):
+        row = self.db.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        return int(row[0]) if row else None
+
+    def _rows(self, min_rows: int) -> np.ndarray:
+        """Memory-mapped view of the matrix, remapped when another writer has grown it."""
+        if self._matrix is None or len(self._matrix) < min_rows:
+            n_rows = os.path.getsize(self.matrix_path) // (4 * self._dim)
+            self._matrix = np.memmap(self.matrix_path, dtype="float32", mode="r", shape=(n_rows, self._dim))
+        return self._matrix
+
+    def _lookup_rows(self, keys: Sequence[str]) -> Dict[str, int]:
+        found = {}
+        for start in range(0, len(keys), _SQL_BATCH):
+            batch = keys[start:start + _SQL_BATCH]
+            marks = ",".join("?" * len(batch))
+            found.update(self.db.execute(f"SELECT key, row FROM rows WHERE key IN ({marks})", batch))
+        return found
+
+    def _append(self, keys: List[str], vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        # BEGIN IMMEDIATE takes the write lock, so concurrent writers append one at a time.
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            if self._dim is None:
+                self._dim = self._read_dim() or vectors.shape[1]
+                self.db.execute("INSERT OR IGNORE INTO meta VALUES ('dim', ?)", (str(self._dim),))
+            existing = self._lookup_rows(keys)
+            fresh = list({k: i for i, k in enumerate(keys) if k not in existing}.values())
+            if fresh:
+                row_bytes = 4 * self._dim
+                with open(self.matrix_path, "r+b") as f:
+                    # A crash mid-append leaves a partial row that no committed key points at; cut it off
+                    # so the new rows start on a row boundary.
+                    base = os.path.getsize(self.matrix_path) // row_bytes
+                    f.truncate(base * row_bytes)
+                    f.seek(base * row_bytes)
+                    f.write(vectors[fresh].tobytes())
+                self.db.executemany(
+                    "INSERT INTO rows VALUES (?, ?)",
+                    [(keys[i], base + n) for n, i in enumerate(fresh)],
+                )
+            self.db.execute("COMMIT")
+        except Exception:
+            self.db.execute("ROLLBACK")
+            raise
+
+    # ---------- PUBLIC API ----------
+    def encode(self, texts: Sequence[str], encode_fn: EncodeFn) -> np.ndarray:
+        """Embeddings for `texts`; `encode_fn` only runs on the texts not cached yet."""
+        keys = [text_key(self.model_name, t) for t in texts]
+        with self._lock:
+            found = self._lookup_rows(list(dict.fromkeys(keys)))
+        missing = [i for i, k in enumerate(keys) if k not in found]
+        self.counters["disk_hits"] += len(keys) - len(missing)
+        self.counters["misses"] += len(missing)
+
+        new_vectors = None
+        if missing:
+            new_vectors = np.asarray(encode_fn([texts[i] for i in missing]), dtype="float32")
+            new_vectors /= np.maximum(np.linalg.norm(new_vectors, axis=1, keepdims=True), 1e-12)
+            with self._lock:
+                self._append([keys[i] for i in missing], new_vectors)
+        if self._dim is None:
+            self._dim = self._read_dim()
+        if self._dim is None:
+            return np.zeros((0, 0), dtype="float32")
+
+        out = np.empty((len(keys), self._dim), dtype="float32")
+        if found:
+            hit_idx = [i for i, k in enumerate(keys) if k in found]
+            rows = np.array([found[keys[i]] for i in hit_idx], dtype="int64")
+            with self._lock:
+                out[hit_idx] = self._rows(int(rows.max()) + 1)[rows]
+        if missing:
+            out[missing] = new_vectors
+        return out
+
+    def encode_query(self, text: str, encode_fn: EncodeFn) -> np.ndarray:
+        """Single query embedding of shape (1, dim), served from the LRU when possible."""
+        key = text_key(self.model_name, text)
+        with self._lock:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+                self.counters["lru_hits"] += 1
+                return vector[None, :].copy()
+        vector = self.encode([text], encode_fn)[0]
+        with self._lock:
+            self._lru[key] = vector
+            if len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+        return vector[None, :].copy()
+
+    def stats(self) -> Dict[str, float]:
+        stats = dict(self.counters)
+        lookups = sum(stats.values())
+        stats["hit_rate"] = (stats["lru_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        with self._lock:
+            stats["entries"] = self.db.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+        return stats
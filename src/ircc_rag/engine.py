@@ -0,0 +1,589 @@
+"""Index loading, retrieval and generation behind one object, shared by the Streamlit app and scripts/ask.py.
+
+Only light modules are imported here. faiss, sentence-transformers, torch and transformers are imported
+by the loaders, the first time a component is needed or when warm_up() runs them on a background thread,
+so importing the engine (and rendering the UI) never waits for the models.
+"""
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ircc_rag.chunk_store import expand_to_parents
+from ircc_rag.context_packer import ContextPacker, source_label
+from ircc_rag.relevance import cut_by_score
+from ircc_rag.shared_store import WATCH_INTERVAL_S, SnapshotWatcher, resolve_store
+from ircc_rag.streaming import GenerationStats, stream_generate
+from ircc_rag.tracing import Trace, Tracer
+
+# Config
+ROOT = Path(__file__).resolve().parents[2]
+VECTOR_DIR = ROOT / "vector_store"
+EMBED_MODEL = "all-MiniLM-L6-v2"
+LOCAL_LLM_MODEL = "google/flan-t5-xl"
+# Speculative decoding: a small model with the same tokenizer drafts tokens that LOCAL_LLM_MODEL verifies,
+# e.g. "google/flan-t5-small". Falls back to plain decoding when too few drafts are accepted
+# (ircc_rag/speculative.py). Measure with benchmarks/bench_speculative.py first.
+DRAFT_LLM_MODEL = os.environ.get("IRCC_DRAFT_MODEL") or None
+MAX_HISTORY_TURNS = 5
+TOP_K_RETRIEVAL = 3
+MAX_NEW_TOKENS = 300
+CONTEXT_TOKEN_BUDGET = 512  # flan-t5 encoder window: instructions + context + history + question
+# "fp32" (fp16 on GPU), "int8" (torch dynamic quantization) or "onnx" (ONNX Runtime with KV cache);
+# quantized backends are CPU-only and converted once into the cache dir on first load.
+GENERATOR_BACKEND = os.environ.get("IRCC_GENERATOR_BACKEND", "fp32")
+RETRIEVAL_MODE = "hybrid"  # "hybrid" (BM25 + dense, RRF) or "dense"
+HYBRID_CANDIDATES = 20     # Per-retriever candidates fed into rank fusion
+USE_RERANKER = True        # Cross-encoder over RERANK_CANDIDATES, cut back to TOP_K_RETRIEVAL
+# Thresholds and gaps live in ircc_rag/relevance.py; every turn logs its scores for tuning them.
+USE_SCORE_GATING = True    # Best retrieval score below threshold -> NO_CONTEXT_ANSWER without generating
+ADAPTIVE_TOP_K = True      # Forward fewer than TOP_K_RETRIEVAL chunks when the scores drop off
+# Parent-child stores (embed_documents.py --chunking parent_child): search the small chunks, prompt with
+# their sections, each once. Off sends the matched small chunks themselves.
+EXPAND_TO_PARENTS = True
+# Fee and processing-time questions are answered from the scraped tables, skipping RAG entirely.
+USE_STRUCTURED_LOOKUP = True
+STRUCTURED_DATA_DIR = ROOT / "data" / "scraped_json"
+# Only standalone questions are served from the answer cache; follow-ups depend on history.
+ANSWER_CACHE_WITH_HISTORY = False
+SEARCH_NPROBE = 16      # IVF indexes: inverted lists probed per query
+SEARCH_EF_SEARCH = 64   # HNSW indexes: candidate list size per query
+# When set (http://host:port or unix:///path.sock), models run in scripts/run_generation_server.py
+GENERATION_SERVER_URL = os.environ.get("IRCC_GENERATION_SERVER")
+# Per-stage latency, token and cache metrics in the Prometheus text format: served at
+# http://127.0.0.1:$IRCC_METRICS_PORT/metrics and/or rewritten to $IRCC_METRICS_FILE.
+# $IRCC_TRACE_LOG appends one JSON line per turn with its spans.
+METRICS_PORT = os.environ.get("IRCC_METRICS_PORT")
+METRICS_FILE = os.environ.get("IRCC_METRICS_FILE")
+TRACE_LOG = os.environ.get("IRCC_TRACE_LOG")
+# Batch mode (answer_batch): prompts per padded generate() call, sorted by token length first.
+GENERATION_BATCH_SIZE = 8
+OFFLINE_RERANK_BUDGET_MS = 60000  # No interactive latency budget offline; every candidate list is reranked
+# Map the index, chunks and BM25 postings read-only so several app processes share one physical copy.
+MMAP_STORE = True
+
+# Warm-up order: the lookup table first so fee / processing-time questions answer within a second,
+# then what retrieval needs, then the models.
+COMPONENTS = ("router", "store", "embed_cache", "answer_cache", "models", "packer", "reranker")
+COMPONENT_LABELS = {
+    "router": "Fee / processing-time table",
+    "store": "Vector store (index, chunks, BM25)",
+    "embed_cache": "Embedding cache",
+    "answer_cache": "Answer cache",
+    "models": "Embedding and generation models",
+    "packer": "Prompt tokenizer",
+    "reranker": "Cross-encoder reranker",
+}
+NO_CONTEXT_ANSWER = "❌ I couldn't find any relevant information in my knowledge base."
+
+
+@dataclass
+class VectorStore:
+    """One snapshot's index, chunks, parent sections and BM25, swapped as a unit on reload."""
+    path: str
+    version: str
+    index: object
+    chunks: object
+    bm25: object
+    parents: object = None  # Parent id -> section, for parent-child stores
+
+
+def open_store(store_dir: str, mmap: bool = MMAP_STORE) -> VectorStore:
+    from ircc_rag.answer_cache import store_version
+    from ircc_rag.bm25 import BM25_FILE, BM25Index
+    from ircc_rag.chunk_store import open_chunks, open_parents
+    from ircc_rag.index_factory import configure_search
+    from ircc_rag.shared_store import open_index
+
+    index = open_index(store_dir, mmap)
+    configure_search(index, nprobe=SEARCH_NPROBE, ef_search=SEARCH_EF_SEARCH)
+    # Memory-mapped chunk store: only the rows retrieval touches get decoded.
+    chunks = open_chunks(store_dir)
+    bm25_path = os.path.join(store_dir, BM25_FILE)
+    bm25 = BM25Index.load(bm25_path, mmap=mmap) if os.path.exists(bm25_path) else None
+    return VectorStore(store_dir, store_version(store_dir), index, chunks, bm25, open_parents(store_dir))
+
+
+class RAGEngine:
+    """Lazily loaded RAG pipeline. Each component loads once, on first use or from warm_up().
+
+    Thread-safe: concurrent callers needing the same component wait for a single load.
+    """
+
+    def __init__(self, vector_dir=VECTOR_DIR, llm_model: str = LOCAL_LLM_MODEL,
+                 generator_backend: str = GENERATOR_BACKEND,
+                 generation_server_url: Optional[str] = GENERATION_SERVER_URL,
+                 use_reranker: bool = USE_RERANKER, use_structured_lookup: bool = USE_STRUCTURED_LOOKUP,
+                 structured_data_dir=STRUCTURED_DATA_DIR, tracer: Optional[Tracer] = None,
+                 score_gating: bool = USE_SCORE_GATING, adaptive_top_k: bool = ADAPTIVE_TOP_K,
+                 parent_context: bool = EXPAND_TO_PARENTS, draft_model: Optional[str] = DRAFT_LLM_MODEL):
+        self.vector_dir = str(vector_dir)
+        self.llm_model = llm_model
+        self.generator_backend = generator_backend
+        self.draft_model = draft_model
+        self.generation_server_url = generation_server_url
+        self.use_reranker = use_reranker
+        self.use_structured_lookup = use_structured_lookup
+        self.structured_data_dir = str(structured_data_dir)
+        self.score_gating = score_gating
+        self.adaptive_top_k = adaptive_top_k
+        self.parent_context = parent_context
+        self.retrieval_mode = RETRIEVAL_MODE
+        if tracer is None:
+            tracer = Tracer(METRICS_FILE, TRACE_LOG)
+            if METRICS_PORT:
+                tracer.serve(int(METRICS_PORT))
+        self.tracer = tracer
+        self._locks = {name: threading.Lock() for name in COMPONENTS}
+        self._loaded: Dict[str, object] = {}
+        self._status = {name: "pending" for name in COMPONENTS}
+        self.errors: Dict[str, str] = {}
+        self.load_s: Dict[str, float] = {}
+        self._warm_thread: Optional[threading.Thread] = None
+        self._watcher: Optional[SnapshotWatcher] = None
+        self.reloads = 0
+        self.last_reload_s: Optional[float] = None
+
+    # -------------------
+    # Loading
+    # -------------------
+    def _component(self, name: str):
+        if name in self._loaded:
+            return self._loaded[name]
+        with self._locks[name]:
+            if name not in self._loaded:
+                self._status[name] = "loading"
+                start = time.perf_counter()
+                try:
+                    value = getattr(self, f"_load_{name}")()
+                except Exception as e:
+                    self._status[name] = "error"
+                    self.errors[name] = f"{type(e).__name__}: {e}"
+                    raise
+                self.load_s[name] = time.perf_counter() - start
+                self.errors.pop(name, None)
+                self._loaded[name] = value
+                self._status[name] = "ready"
+        return self._loaded[name]
+
+    def _load_store(self) -> VectorStore:
+        return open_store(resolve_store(self.vector_dir))
+
+    def _load_models(self):
+        if self.generation_server_url:
+            from ircc_rag.client import GenerationClient, RemoteEmbedder, RemoteGenerator
+
+            # Thin client: the server owns the models and batches requests across sessions.
+            client = GenerationClient(self.generation_server_url)
+            return RemoteEmbedder(client), RemoteGenerator(client)
+        from sentence_transformers import SentenceTransformer
+        from ircc_rag.llm_backend import load_generator
+
+        embedder = SentenceTransformer(EMBED_MODEL)
+        llm_pipe = load_generator(self.llm_model, self.generator_backend, draft_model=self.draft_model)
+        return embedder, llm_pipe
+
+    def _load_packer(self):
+        tokenizer = getattr(self.llm_pipe, "tokenizer", None)
+        if tokenizer is None:
+            # Remote generation: only the tokenizer is needed locally to count tokens.
+            from transformers import AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(self.llm_model)
+        return ContextPacker(tokenizer, CONTEXT_TOKEN_BUDGET)
+
+    def _load_router(self):
+        if not self.use_structured_lookup:
+            return None
+        from ircc_rag.structured_lookup import IntentRouter, LookupTable
+
+        return IntentRouter(LookupTable.load(self.structured_data_dir))
+
+    def _load_reranker(self):
+        if not self.use_reranker:
+            return None
+        from ircc_rag.reranker import Reranker
+
+        return Reranker()
+
+    def _load_embed_cache(self):
+        from ircc_rag.embedding_cache import EmbeddingCache
+
+        return EmbeddingCache(EMBED_MODEL)
+
+    def _load_answer_cache(self):
+        from ircc_rag.answer_cache import AnswerCache
+        from ircc_rag.embedding_cache import CACHE_DIR
+
+        return AnswerCache(os.path.join(CACHE_DIR, "answers.json"), self.store.version)
+
+    @property
+    def store(self) -> VectorStore:
+        """The live snapshot. Read it once per request: a reload may swap it at any time."""
+        return self._component("store")
+
+    @property
+    def index(self):
+        return self.store.index
+
+    @property
+    def chunks(self):
+        return self.store.chunks
+
+    @property
+    def bm25(self):
+        return self.store.bm25
+
+    @property
+    def embedder(self):
+        return self._component("models")[0]
+
+    @property
+    def llm_pipe(self):
+        return self._component("models")[1]
+
+    @property
+    def packer(self) -> ContextPacker:
+        return self._component("packer")
+
+    @property
+    def router(self):
+        return self._component("router")
+
+    @property
+    def reranker(self):
+        return self._component("reranker")
+
+    @property
+    def embed_cache(self):
+        return self._component("embed_cache")
+
+    @property
+    def answer_cache(self):
+        return self._component("answer_cache")
+
+    def warm_up(self, background: bool = True) -> Optional[threading.Thread]:
+        """Load every component in COMPONENTS order; failures are recorded in `errors`, not raised."""
+        def run():
+            start = time.perf_counter()
+            for name in COMPONENTS:
+                try:
+                    self._component(name)
+                except Exception as e:
+                    print(f"[WARN] Warm-up could not load {name}: {type(e).__name__}: {e}")
+            print(f"[INFO] Engine warm-up finished in {time.perf_counter() - start:.1f}s")
+
+        if not background:
+            run()
+            return None
+        if self._warm_thread is None:
+            self._warm_thread = threading.Thread(target=run, name="rag-warm-up", daemon=True)
+            self._warm_thread.start()
+        return self._warm_thread
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        if self._warm_thread is not None:
+            self._warm_thread.join(timeout)
+        return self.ready
+
+    @property
+    def warming(self) -> bool:
+        return self._warm_thread is not None and self._warm_thread.is_alive()
+
+    def status(self) -> Dict[str, str]:
+        """Component -> "pending", "loading", "ready" or "error"."""
+        return dict(self._status)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._loaded
+
+    @property
+    def ready(self) -> bool:
+        return all(name in self._loaded for name in COMPONENTS)
+
+    # -------------------
+    # Hot reload
+    # -------------------
+    def reload(self, store_dir: Optional[str] = None) -> bool:
+        """Switch to the current snapshot (or `store_dir`) if it is not the one being served.
+
+        The new snapshot is opened while the old one keeps serving; the switch itself is a single
+        reference swap, and requests already running finish on the store they started with.
+        """
+        store_dir = store_dir or resolve_store(self.vector_dir)
+        old = self._loaded.get("store")
+        if old is not None and os.path.abspath(old.path) == os.path.abspath(store_dir):
+            return False
+        start = time.perf_counter()
+        store = open_store(store_dir)
+        with self._locks["store"]:
+            self._loaded["store"] = store
+            self._status["store"] = "ready"
+        if self.is_loaded("answer_cache"):
+            self.answer_cache.invalidate(store.version)  # Cached answers cite chunks of the old snapshot
+        self.reloads += 1
+        self.last_reload_s = time.perf_counter() - start
+        print(f"[INFO] Switched to vector store {store_dir} in {self.last_reload_s * 1000:.0f} ms")
+        return True
+
+    def watch(self, interval_s: float = WATCH_INTERVAL_S) -> SnapshotWatcher:
+        """Reload whenever embed_documents.py publishes a new snapshot."""
+        if self._watcher is None:
+            self._watcher = SnapshotWatcher(self.vector_dir, self.reload, interval_s).start()
+        return self._watcher
+
+    # -------------------
+    # Retrieval
+    # -------------------
+    def embed_query(self, query: str):
+        embed_cache = self.embed_cache
+        embedder = self.embedder
+        return embed_cache.encode_query(query, lambda texts: embedder.encode(texts, normalize_embeddings=True))
+
+    def retrieve_context(self, query: str, top_k: int = TOP_K_RETRIEVAL, query_emb=None, trace: Optional[Trace] = None):
+        """Top-k chunks, as their parent sections for parent-child stores; `trace` (if given) records a
+        span per stage and the retrieval scores.
+
+        (None, []) when nothing was found or, with score gating, when the scores say the question is
+        outside the documents, so no generation is spent on it.
+        """
+        trace = trace if trace is not None else Trace()
+        if query_emb is None:
+            with trace.span("embed"):
+                query_emb = self.embed_query(query)
+        retrieved, scores = self.rank_chunks([query], query_emb, top_k, trace)[0]
+        gated = f" · gated by the {scores['gate']} score" if scores["gate"] else ""
+        print(f"[INFO] Retrieval scores: dense top {scores['dense_top']} · rerank top {scores['rerank_top']} · "
+              f"{scores['k']}/{top_k} chunks kept{gated}")
+        trace.set(scores=scores)
+        if not retrieved:
+            return None, []
+        context_text = "\n\n".join([f"Source: {source_label(c)}\n{c['text']}" for c in retrieved])
+        return context_text, retrieved
+
+    # -------------------
+    # Answer Generation
+    # -------------------
+    def build_prompt(self, sources: List[Dict], question: str, chat_history: List[Dict],
+                     trace: Optional[Trace] = None) -> str:
+        """Pack the retrieved chunks (best first), recent history and the question into the token budget."""
+        trace = trace if trace is not None else Trace()
+        packer = self.packer
+        with trace.span("pack"):
+            prompt, pack_stats = packer.pack(question, sources, chat_history, MAX_HISTORY_TURNS)
+        print(f"[INFO] Prompt tokens {pack_stats.tokens_used}/{pack_stats.budget} · "
+              f"chunks {pack_stats.chunks_used} kept, {pack_stats.chunks_dropped} dropped · "
+              f"history turns {pack_stats.history_turns_used} kept, {pack_stats.history_turns_dropped} dropped")
+        trace.set(prompt_tokens=pack_stats.tokens_used, token_budget=pack_stats.budget)
+        return prompt
+
+    def generate_answer(self, sources: List[Dict], question: str, chat_history: List[Dict],
+                        trace: Optional[Trace] = None) -> str:
+        if not sources:
+            return NO_CONTEXT_ANSWER
+        trace = trace if trace is not None else Trace()
+        prompt = self.build_prompt(sources, question, chat_history, trace)
+        llm_pipe = self.llm_pipe
+        with trace.span("generate"):
+            output = llm_pipe(prompt, max_new_tokens=MAX_NEW_TOKENS)
+        return output[0]["generated_text"].strip()
+
+    def stream_answer(self, sources: List[Dict], question: str, chat_history: List[Dict],
+                      stats: Optional[GenerationStats] = None, trace: Optional[Trace] = None) -> Iterator[str]:
+        """Like generate_answer(), but yields text pieces as flan-t5 decodes them."""
+        if not sources:
+            yield NO_CONTEXT_ANSWER
+            return
+        trace = trace if trace is not None else Trace()
+        prompt = self.build_prompt(sources, question, chat_history, trace)
+        llm_pipe = self.llm_pipe
+        with trace.span("generate"):
+            yield from stream_generate(llm_pipe, prompt, MAX_NEW_TOKENS, stats)
+
+    # -------------------
+    # Batch
+    # -------------------
+    def embed_queries(self, questions: Sequence[str]):
+        """(n, dim) embeddings; questions not in the embedding cache go through one encode() call."""
+        embedder = self.embedder
+        return self.embed_cache.encode(list(questions), lambda texts: embedder.encode(texts, normalize_embeddings=True))
+
+    def rank_chunks(self, questions: Sequence[str], query_embs, top_k: int = TOP_K_RETRIEVAL,
+                    trace: Optional[Trace] = None, rerank_budget_ms: Optional[float] = None
+                    ) -> List[Tuple[List[Dict], Dict]]:
+        """Search, rank fusion, rerank, score cut and parent expansion, with one index.search over all
+        `query_embs`: (chunks, scores record) per question, chunks empty when gated.
+
+        The one retrieval path behind retrieve_context(), retrieve_batch() and benchmarks/eval_rag.py;
+        `trace` gets the search and rerank spans.
+        """
+        from ircc_rag.bm25 import fuse_with_bm25
+        from ircc_rag.reranker import RERANK_CANDIDATES
+
+        trace = trace if trace is not None else Trace()
+        store, reranker = self.store, self.reranker
+        index, chunks, bm25 = store.index, store.chunks, store.bm25
+        depth = RERANK_CANDIDATES if reranker is not None else top_k
+        hybrid = bm25 is not None and self.retrieval_mode == "hybrid"
+        candidates = max(HYBRID_CANDIDATES, depth)
+        with trace.span("search"):
+            D, I = index.search(query_embs, candidates if hybrid else depth)
+            fused = [fuse_with_bm25(bm25, question, id_row, depth, candidates) if hybrid else id_row
+                     for question, id_row in zip(questions, I)]
+            found = [[chunks[i] for i in ids if i in chunks] for ids in fused]
+        results = []
+        for question, dense_row, id_row, retrieved in zip(questions, D, I, found):
+            # Best-first scores of `retrieved`, when its order comes from one scorer (not rank fusion).
+            ranked = None if hybrid else [float(d) for d, i in zip(dense_row, id_row) if i in chunks]
+            reranked = False
+            if reranker is not None:
+                with trace.span("rerank"):
+                    retrieved, info = reranker.rerank(question, retrieved, top_k, budget_ms=rerank_budget_ms)
+                reranked = info["reranked"]
+                trace.set(reranked=reranked)
+                ranked = info.get("scores", ranked)
+            dense_top = float(dense_row[0]) if id_row[0] >= 0 else None
+            retrieved, scores = cut_by_score(retrieved, top_k, dense_top, ranked, reranked, self.score_gating,
+                                             self.adaptive_top_k)
+            if retrieved and self.parent_context and store.parents is not None:
+                retrieved = expand_to_parents(retrieved, store.parents)
+                trace.set(parents=len(retrieved))
+            results.append((retrieved, scores))
+        return results
+
+    def retrieve_batch(self, questions: Sequence[str], query_embs,
+                       top_k: int = TOP_K_RETRIEVAL) -> List[Tuple[List[Dict], Dict]]:
+        """retrieve_context() for many questions with a single index.search over all embeddings:
+        (chunks, scores record) per question, chunks empty when gated."""
+        return self.rank_chunks(questions, query_embs, top_k, rerank_budget_ms=OFFLINE_RERANK_BUDGET_MS)
+
+    def generate_batch(self, prompts: Sequence[str], max_new_tokens: int = MAX_NEW_TOKENS) -> List[str]:
+        """One padded generate() call for `prompts`; keep them of similar length to limit padding."""
+        llm_pipe = self.llm_pipe
+        if getattr(llm_pipe, "model", None) is None:
+            # Generation server: send them together and let its batcher pad them into one batch.
+            with ThreadPoolExecutor(max_workers=len(prompts)) as pool:
+                outputs = list(pool.map(lambda p: llm_pipe(p, max_new_tokens=max_new_tokens), prompts))
+        else:
+            outputs = llm_pipe(list(prompts), max_new_tokens=max_new_tokens, batch_size=len(prompts))
+        return [(out[0] if isinstance(out, list) else out)["generated_text"].strip() for out in outputs]
+
+    def answer_batch(self, questions: Sequence[str], batch_size: int = GENERATION_BATCH_SIZE,
+                     top_k: int = TOP_K_RETRIEVAL) -> Iterator[Tuple[int, Dict]]:
+        """(position, record) for standalone `questions`, yielded as each generation batch finishes.
+
+        Lookup-table answers come first. The rest are embedded together, searched with one
+        index.search, packed, and generated shortest prompt first in padded batches. The answer
+        cache is bypassed so regression runs always see fresh answers.
+        """
+        pending = []
+        for i, question in enumerate(questions):
+            routed = self.router.route(question) if self.use_structured_lookup else None
+            if routed is not None:
+                yield i, {"user": question, "bot": routed.answer, "sources": routed.sources, "route": "lookup"}
+            else:
+                pending.append(i)
+        if not pending:
+            return
+
+        rag_questions = [questions[i] for i in pending]
+        retrieved = self.retrieve_batch(rag_questions, self.embed_queries(rag_questions), top_k)
+        packer = self.packer
+        prompts: Dict[int, Tuple[str, int, List[Dict], Dict]] = {}
+        for i, question, (sources, scores) in zip(pending, rag_questions, retrieved):
+            if not sources:
+                route = "gated" if scores["gate"] else "rag"
+                yield i, {"user": question, "bot": NO_CONTEXT_ANSWER, "sources": [], "route": route, "scores": scores}
+                continue
+            prompt, pack_stats = packer.pack(question, sources, [], MAX_HISTORY_TURNS)
+            prompts[i] = (prompt, pack_stats.tokens_used, sources, scores)
+
+        order = sorted(prompts, key=lambda i: prompts[i][1])
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            answers = self.generate_batch([prompts[i][0] for i in batch])
+            for i, answer in zip(batch, answers):
+                yield i, {"user": questions[i], "bot": answer, "sources": prompts[i][2], "route": "rag",
+                          "prompt_tokens": prompts[i][1], "scores": prompts[i][3]}
+
+    def chat(self, question: str, chat_history: Optional[List[Dict]] = None) -> "Turn":
+        return Turn(self, question, chat_history or [])
+
+    def ask(self, question: str, chat_history: Optional[List[Dict]] = None) -> Dict:
+        """Answer without streaming; returns the same record the app keeps in its chat history."""
+        return self.chat(question, chat_history).result()
+
+
+class Turn:
+    """One chat turn. Iterating yields the answer text as it is produced (routed and cached answers
+    arrive in one piece); result() runs the turn to the end and returns its history record.
+    """
+
+    def __init__(self, engine: RAGEngine, question: str, chat_history: List[Dict]):
+        self.engine = engine
+        self.question = question
+        self.chat_history = chat_history
+        self.answer = ""
+        self.sources: List[Dict] = []
+        self.cached = False
+        self.stats = GenerationStats()  # Timed from the question, so first-token latency includes retrieval
+        self.trace = engine.tracer.start()
+        self._record: Optional[Dict] = None
+        self._pieces = self._run()
+
+    def __iter__(self) -> Iterator[str]:
+        return self._pieces
+
+    def _run(self) -> Iterator[str]:
+        engine, question, stats, trace = self.engine, self.question, self.stats, self.trace
+        routed, cache_result = None, "none"
+        if engine.use_structured_lookup:
+            router = engine.router
+            with trace.span("lookup"):
+                routed = router.route(question)
+        if routed is not None:
+            self.answer, self.sources = routed.answer, routed.sources
+            stats.first_token_s = stats.total_s = time.perf_counter() - stats.started
+            trace.set(route="lookup")
+            yield self.answer
+        else:
+            from ircc_rag.answer_cache import chunk_key
+
+            answer_cache = engine.answer_cache
+            with trace.span("embed"):
+                query_emb = engine.embed_query(question)
+            context, self.sources = engine.retrieve_context(question, query_emb=query_emb, trace=trace)
+            chunk_ids = [chunk_key(s) for s in self.sources]
+            use_answer_cache = bool(context) and (ANSWER_CACHE_WITH_HISTORY or not self.chat_history)
+            cached = answer_cache.lookup(query_emb, chunk_ids) if use_answer_cache else None
+            if use_answer_cache:
+                cache_result = "hit" if cached is not None else "miss"
+            if cached is not None:
+                self.answer, self.cached = cached["answer"], True
+                stats.first_token_s = stats.total_s = time.perf_counter() - stats.started
+                yield self.answer
+            else:
+                for piece in engine.stream_answer(self.sources, question, self.chat_history, stats, trace):
+                    self.answer += piece
+                    yield piece
+                if use_answer_cache:
+                    answer_cache.put(question, query_emb, chunk_ids, self.answer.strip(),
+                                     trace.timings.get("generate_ms", 0.0) / 1000)  # Generation only: what a hit saves
+        for name, component in (("embedding", "embed_cache"), ("answer", "answer_cache")):
+            if engine.is_loaded(component):
+                engine.tracer.record_cache_stats(name, getattr(engine, component).stats())
+        scores = trace.timings.get("scores")
+        route = "lookup" if routed is not None else "gated" if scores and scores["gate"] else "rag"
+        trace.finish(route=route, cache=cache_result, first_token_s=stats.first_token_s,
+                     prompt_tokens=trace.timings.get("prompt_tokens"), new_tokens=stats.new_tokens, scores=scores)
+        self._record = {
+            "user": question, "bot": self.answer.strip(), "sources": self.sources,
+            "timing": stats.as_dict(), "stages": trace.timings, "cached": self.cached,
+        }
+
+    def result(self) -> Dict:
+        for _ in self._pieces:
+            pass
+        return self._record
@@ -0,0 +1,154 @@
+import os
+import math
+import tempfile
+from typing import Dict, Optional
+
+import faiss
+import numpy as np
+
+# Config
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+DEFAULT_NPROBE = 16
+DEFAULT_EF_SEARCH = 64
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+PQ_SUBVECTOR_DIM = 8  # 384-dim MiniLM vectors -> 48 sub-quantizers
+TRAIN_POINTS_PER_CENTROID = 64
+MIN_POINTS_PER_CENTROID = 39  # Below this FAISS k-means warns and quality drops
+
+
+def default_nlist(n_vectors: int) -> int:
+    """Roughly 4*sqrt(N) inverted lists, capped so every centroid gets enough training points."""
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // MIN_POINTS_PER_CENTROID))
+
+
+def _pq_nbits(n_train: int) -> int:
+    # PQ needs at least 2**nbits training points per sub-quantizer.
+    return int(min(8, max(4, math.floor(math.log2(max(n_train // MIN_POINTS_PER_CENTROID, 16))))))
+
+
+def _pq_m(dim: int) -> int:
+    m = max(1, dim // PQ_SUBVECTOR_DIM)
+    while dim % m:
+        m -= 1
+    return m
+
+
+def train_sample(embeddings: np.ndarray, n_points: int, seed: int = 0) -> np.ndarray:
+    """Random subset used for k-means / PQ training instead of the whole corpus."""
+    if len(embeddings) <= n_points:
+        return embeddings
+    rows = np.random.default_rng(seed).choice(len(embeddings), n_points, replace=False)
+    return embeddings[np.sort(rows)]
+
+
+def make_index(dim: int, index_type: str = "flat", n_vectors: int = 0, nlist: Optional[int] = None):
+    """Untrained inner-product index of the requested type."""
+    if index_type == "flat":
+        return faiss.IndexFlatIP(dim)
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        return index
+    nlist = nlist or default_nlist(n_vectors)
+    quantizer = faiss.IndexFlatIP(dim)
+    if index_type == "ivf_flat":
+        return faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+    if index_type == "ivf_pq":
+        n_train = min(n_vectors, nlist * TRAIN_POINTS_PER_CENTROID)
+        return faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_m(dim), _pq_nbits(n_train), faiss.METRIC_INNER_PRODUCT)
+    raise ValueError(f"Unknown index type {index_type!r}, expected one of {INDEX_TYPES}")
+
+
+def build_index(embeddings: np.ndarray, ids: np.ndarray, index_type: str = "flat", nlist: Optional[int] = None):
+    """Build, train (on a sample) and fill an ID-mapped index."""
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    inner = make_index(embeddings.shape[1], index_type, len(embeddings), nlist)
+    if not inner.is_trained:
+        n_train = getattr(inner, "nlist", 1) * TRAIN_POINTS_PER_CENTROID
+        inner.train(train_sample(embeddings, n_train))
+    index = faiss.IndexIDMap2(inner)
+    index.add_with_ids(embeddings, np.asarray(ids, dtype="int64"))
+    return index
+
+
+class IndexBuilder:
+    """Fill an ID-mapped index batch by batch.
+
+    Flat and HNSW indexes take vectors as they arrive. IVF indexes cannot be trained until
+    the corpus size (and so nlist) is known, so their batches are spilled to a float32 file
+    on disk and memory-mapped for training and adding at the end.
+    """
+
+    def __init__(self, index_type: str = "flat", nlist: Optional[int] = None, spill_dir: Optional[str] = None):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type {index_type!r}, expected one of {INDEX_TYPES}")
+        self.index_type = index_type
+        self.nlist = nlist
+        self.spill_dir = spill_dir
+        self.index = None
+        self.dim = None
+        self._spill = None
+        self._spill_ids = []
+        self.ntotal = 0
+
+    def add(self, embeddings: np.ndarray, ids: np.ndarray):
+        embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+        if not len(embeddings):
+            return
+        self.dim = embeddings.shape[1]
+        if self.index_type in ("flat", "hnsw"):
+            if self.index is None:
+                self.index = faiss.IndexIDMap2(make_index(self.dim, self.index_type))
+            self.index.add_with_ids(embeddings, np.asarray(ids, dtype="int64"))
+        else:
+            if self._spill is None:
+                self._spill = tempfile.NamedTemporaryFile(dir=self.spill_dir, prefix=".vectors.", suffix=".f32",
+                                                          delete=False)
+            self._spill.write(embeddings.tobytes())
+            self._spill_ids.append(np.asarray(ids, dtype="int64"))
+        self.ntotal += len(embeddings)
+
+    def finish(self):
+        """The filled index (None if nothing was added)."""
+        if self._spill is None:
+            return self.index
+        self._spill.close()
+        try:
+            vectors = np.memmap(self._spill.name, dtype="float32", mode="r").reshape(-1, self.dim)
+            self.index = build_index(vectors, np.concatenate(self._spill_ids), self.index_type, self.nlist)
+            del vectors
+        finally:
+            os.remove(self._spill.name)
+            self._spill = None
+        return self.index
+
+
+def supports_removal(index_type: str) -> bool:
+    """HNSW graphs cannot drop vectors, so incremental builds must rebuild them."""
+    return index_type != "hnsw"
+
+
+def configure_search(index, nprobe: int = DEFAULT_NPROBE, ef_search: int = DEFAULT_EF_SEARCH) -> Dict[str, int]:
+    """Apply query-time knobs to whatever index type was loaded; returns what was set."""
+    params = faiss.ParameterSpace()
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    applied = {}
+    if isinstance(inner, faiss.IndexIVF):
+        params.set_index_parameter(index, "nprobe", nprobe)
+        applied["nprobe"] = nprobe
+    elif isinstance(inner, faiss.IndexHNSW):
+        params.set_index_parameter(index, "efSearch", ef_search)
+        applied["efSearch"] = ef_search
+    return applied
+
+
+def index_type_of(index) -> str:
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(inner, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(inner, faiss.IndexIVF):
+        return "ivf_flat"
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    return "flat"
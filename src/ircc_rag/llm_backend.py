@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import shutil
+from typing import Optional, Tuple
+
+from ircc_rag.embedding_cache import CACHE_DIR
+
+# Config
+BACKENDS = ("fp32", "int8", "onnx")
+MODEL_CACHE_DIR = os.path.join(CACHE_DIR, "models")
+_INT8_FILE = "model_int8.pt"
+_META_FILE = "artefact.json"
+
+
+def artefact_dir(model_name: str, backend: str, cache_dir: str = MODEL_CACHE_DIR) -> str:
+    return os.path.join(cache_dir, model_name.replace("/", "--"), backend)
+
+
+def _versions() -> dict:
+    import torch
+    import transformers
+
+    return {"torch": torch.__version__, "transformers": transformers.__version__}
+
+
+def _artefact_ok(path: str, model_name: str, backend: str) -> bool:
+    meta_path = os.path.join(path, _META_FILE)
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    # The int8 artefact is a pickled module: it is only loadable by the versions that wrote it.
+    return meta.get("model") == model_name and meta.get("backend") == backend and \
+        (backend != "int8" or meta.get("versions") == _versions())
+
+
+def convert(model_name: str, backend: str, cache_dir: str = MODEL_CACHE_DIR) -> str:
+    """Write the on-disk artefact for `backend` and return its directory.
+
+    int8: torch dynamic quantization of every nn.Linear (weights int8, activations quantized
+          on the fly), saved as a whole module so loading never materializes fp32 weights.
+    onnx: optimum export of the encoder and the decoder with past key/values, run by ONNX Runtime.
+    """
+    from transformers import AutoTokenizer
+
+    if backend not in ("int8", "onnx"):
+        raise ValueError(f"Nothing to convert for backend {backend!r}")
+    out_dir = artefact_dir(model_name, backend, cache_dir)
+    tmp_dir = f"{out_dir}.{os.getpid()}.tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+    start = time.perf_counter()
+
+    if backend == "int8":
+        import torch
+        from transformers import AutoModelForSeq2SeqLM
+
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_name, torch_dtype=torch.float32).eval()
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        torch.save(model, os.path.join(tmp_dir, _INT8_FILE))
+    else:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+        ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, use_cache=True).save_pretrained(tmp_dir)
+
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(tmp_dir)
+    with open(os.path.join(tmp_dir, _META_FILE), "w", encoding="utf-8") as f:
+        json.dump({"model": model_name, "backend": backend, "versions": _versions()}, f, indent=2)
+
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    os.replace(tmp_dir, out_dir)
+    print(f"[DONE] {backend} artefact for {model_name} written to {out_dir} in {time.perf_counter() - start:.0f}s")
+    return out_dir
+
+
+def ensure_artefact(model_name: str, backend: str, cache_dir: str = MODEL_CACHE_DIR) -> str:
+    path = artefact_dir(model_name, backend, cache_dir)
+    if not _artefact_ok(path, model_name, backend):
+        print(f"[INFO] No {backend} artefact for {model_name} yet, converting (one-time)...")
+        convert(model_name, backend, cache_dir)
+    return path
+
+
+def load_seq2seq(model_name: str, backend: str = "fp32", cache_dir: str = MODEL_CACHE_DIR) -> Tuple[object, object]:
+    """(tokenizer, model) for `backend`; quantized artefacts are converted once and then reused."""
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown generator backend {backend!r}; expected one of {BACKENDS}")
+    if backend == "fp32":
+        cuda = torch.cuda.is_available()
+        model = AutoModelForSeq2SeqLM.from_pretrained(
+            model_name,
+            torch_dtype=torch.float16 if cuda else torch.float32,
+            device_map="auto" if cuda else None
+        )
+        return AutoTokenizer.from_pretrained(model_name), model.eval()
+
+    path = ensure_artefact(model_name, backend, cache_dir)
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    if backend == "int8":
+        model = torch.load(os.path.join(path, _INT8_FILE), weights_only=False).eval()
+    else:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+        model = ORTModelForSeq2SeqLM.from_pretrained(path, use_cache=True)
+    return tokenizer, model
+
+
+def load_generator(model_name: str, backend: str = "fp32", cache_dir: str = MODEL_CACHE_DIR,
+                   draft_model: Optional[str] = None):
+    """text2text-generation pipeline on the chosen backend (quantized backends are CPU-only).
+
+    With `draft_model`, single-prompt generation is speculative (see ircc_rag/speculative.py); if the
+    draft cannot assist (ONNX backend, different vocabulary, failed load) the plain pipeline is returned.
+    """
+    import torch
+    from transformers import pipeline
+
+    tokenizer, model = load_seq2seq(model_name, backend, cache_dir)
+    if backend == "fp32":
+        device = 0 if torch.cuda.is_available() else -1
+        if getattr(model, "hf_device_map", None):
+            device = None  # Already placed by accelerate
+        pipe = pipeline("text2text-generation", model=model, tokenizer=tokenizer, device=device)
+    else:
+        pipe = pipeline("text2text-generation", model=model, tokenizer=tokenizer)
+    return _with_draft(pipe, draft_model, backend, cache_dir) if draft_model else pipe
+
+
+def _with_draft(pipe, draft_model: str, backend: str, cache_dir: str):
+    from ircc_rag.speculative import AssistedGenerator
+
+    if backend == "onnx":
+        print("[WARN] Speculative decoding needs a torch model (fp32 or int8 backend); decoding without a draft")
+        return pipe
+    try:
+        _, draft = load_seq2seq(draft_model, backend, cache_dir)
+    except Exception as e:
+        print(f"[WARN] Draft model {draft_model} failed to load ({e}); decoding without a draft")
+        return pipe
+    if draft.config.vocab_size != pipe.model.config.vocab_size:
+        print(f"[WARN] Draft model {draft_model} does not share the generator's vocabulary; decoding without a draft")
+        return pipe
+    if not getattr(draft, "hf_device_map", None):
+        draft = draft.to(pipe.model.device)
+    print(f"[INFO] Speculative decoding with draft model {draft_model}")
+    return AssistedGenerator(pipe, draft)
@@ -0,0 +1,110 @@
+import re
+import zlib
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+# Config
+SHINGLE_WORDS = 5         # Word n-grams compared between chunks
+NUM_PERM = 128            # MinHash signature length
+BANDS = 32                # LSH bands of NUM_PERM // BANDS rows: pairs above ~0.42 Jaccard become candidates
+NEAR_DUP_THRESHOLD = 0.8  # Estimated Jaccard similarity at which a chunk merges into an earlier one
+# Only merge a chunk whose numbers (fees, days, form and section numbers) all appear in the representative:
+# near-identical fee rows or regulation paragraphs differ in exactly the fact being asked about.
+SAME_NUMBERS = True
+
+_MASK = (1 << 32) - 1
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def shingle_hashes(text: str, k: int = SHINGLE_WORDS) -> np.ndarray:
+    """32-bit hashes of the lowercased word k-grams of `text` (the whole text when shorter)."""
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return np.zeros(1, dtype="uint32")
+    hashes = np.array([zlib.crc32(w.encode("utf-8")) for w in words], dtype="uint64")
+    if len(hashes) < k:
+        k = len(hashes)
+    shingles = np.zeros(len(hashes) - k + 1, dtype="uint64")
+    for j in range(k):
+        shingles = (shingles * np.uint64(1000003) + hashes[j:len(hashes) - k + 1 + j]) & np.uint64(_MASK)
+    return np.unique(shingles.astype("uint32"))
+
+
+class NearDuplicateFilter:
+    """Streaming MinHash-LSH near-duplicate detection.
+
+    Chunks are checked in arrival order against the representatives kept so far: only LSH bucket
+    mates are compared, so a build costs about one signature per chunk instead of all pairs. A
+    chunk whose estimated Jaccard similarity with a representative reaches `threshold` (and, with
+    `same_numbers`, whose numbers the representative all contains) is dropped and recorded in
+    `replaced` (its id -> the representative's id).
+    """
+
+    def __init__(self, threshold: float = NEAR_DUP_THRESHOLD, num_perm: int = NUM_PERM, bands: int = BANDS,
+                 same_numbers: bool = SAME_NUMBERS, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = np.random.default_rng(seed)
+        # x -> a*x + b mod 2**32 with odd `a` permutes 32-bit hashes; uint32 arithmetic wraps for free.
+        self._a = rng.integers(0, _MASK, num_perm, dtype="uint32") | np.uint32(1)
+        self._b = rng.integers(0, _MASK, num_perm, dtype="uint32")
+        self.threshold = threshold
+        self.same_numbers = same_numbers
+        self.bands, self.rows = bands, num_perm // bands
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._signatures: List[np.ndarray] = []
+        self._numbers: List[frozenset] = []
+        self._rep_ids: List[int] = []
+        self.replaced: Dict[int, int] = {}
+
+    def signature(self, text: str) -> np.ndarray:
+        shingles = shingle_hashes(text)
+        return (shingles[:, None] * self._a + self._b).min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _insert(self, chunk_id: int, signature: np.ndarray, numbers: frozenset, keys: List[bytes]):
+        rep = len(self._rep_ids)
+        self._rep_ids.append(chunk_id)
+        self._signatures.append(signature)
+        self._numbers.append(numbers)
+        for bucket, key in zip(self._buckets, keys):
+            bucket.setdefault(key, []).append(rep)
+
+    def _match(self, signature: np.ndarray, numbers: frozenset):
+        """(id of the representative the chunk nearly duplicates or None, its band keys)."""
+        keys = self._band_keys(signature)
+        candidates = sorted({rep for bucket, key in zip(self._buckets, keys) for rep in bucket.get(key, ())})
+        if self.same_numbers:
+            candidates = [c for c in candidates if numbers <= self._numbers[c]]
+        if not candidates:
+            return None, keys
+        similarity = (np.stack([self._signatures[c] for c in candidates]) == signature).mean(axis=1)
+        best = int(np.argmax(similarity))
+        return (self._rep_ids[candidates[best]] if similarity[best] >= self.threshold else None), keys
+
+    def seed(self, chunks: Iterable[Dict]):
+        """Register already-kept chunks (an existing store) as representatives without checking them."""
+        for chunk in chunks:
+            signature = self.signature(chunk["text"])
+            self._insert(chunk["id"], signature, frozenset(_NUMBER.findall(chunk["text"])),
+                         self._band_keys(signature))
+
+    def filter(self, chunks: Iterable[Dict]) -> List[Dict]:
+        """The chunks that are not near-duplicates of a representative; those become representatives."""
+        kept = []
+        for chunk in chunks:
+            signature = self.signature(chunk["text"])
+            numbers = frozenset(_NUMBER.findall(chunk["text"]))
+            rep_id, keys = self._match(signature, numbers)
+            if rep_id is None:
+                self._insert(chunk["id"], signature, numbers, keys)
+                kept.append(chunk)
+            else:
+                self.replaced[chunk["id"]] = rep_id
+        return kept
+
+    def stats(self) -> Dict[str, int]:
+        return {"kept": len(self._rep_ids), "merged": len(self.replaced)}
@@ -0,0 +1,61 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Config
+# Starting points for all-MiniLM-L6-v2 (cosine) and ms-marco-MiniLM-L-6-v2 (logits). Re-derive them
+# from the calibration table of `python benchmarks/eval_rag.py --rerank` after changing either model.
+MIN_DENSE_SCORE = 0.30   # Best dense hit below this -> out of domain, no generation
+MIN_RERANK_SCORE = -5.0  # Same for the best cross-encoder score; decides instead of the dense one when reranked
+DENSE_SCORE_GAP = 0.10   # Adaptive k: stop before a drop larger than this between neighbouring chunks
+RERANK_SCORE_GAP = 4.0
+MIN_TOP_K = 1
+
+
+def gate_reason(dense_top: Optional[float], rerank_top: Optional[float],
+                min_dense: float = MIN_DENSE_SCORE, min_rerank: float = MIN_RERANK_SCORE) -> Optional[str]:
+    """"rerank" or "dense" when that score says the question is out of domain, None to answer it.
+
+    The cross-encoder decides when it ran (it reads question and chunk together); the dense
+    cosine otherwise.
+    """
+    if rerank_top is not None:
+        return "rerank" if rerank_top < min_rerank else None
+    if dense_top is not None and dense_top < min_dense:
+        return "dense"
+    return None
+
+
+def adaptive_k(scores: Sequence[float], max_k: int, gap: float, floor: Optional[float] = None,
+               min_k: int = MIN_TOP_K) -> int:
+    """How many of the best-first `scores` to keep: at most `max_k`, stopping before the first drop
+    larger than `gap` or the first score under `floor`, and never fewer than `min_k`."""
+    k = min(len(scores), max_k)
+    for i in range(1, k):
+        if scores[i - 1] - scores[i] > gap or (floor is not None and scores[i] < floor):
+            return max(i, min(min_k, k))
+    return k
+
+
+def cut_by_score(retrieved: List[Dict], top_k: int, dense_top: Optional[float], ranked: Optional[Sequence[float]],
+                 reranked: bool, gating: bool = True, adaptive: bool = True) -> Tuple[List[Dict], Dict]:
+    """Gate and adaptive k over best-first `retrieved`, plus the scores record logged for calibration.
+
+    `ranked` holds the scores `retrieved` is ordered by: cross-encoder logits when `reranked`, dense
+    cosine otherwise, or None for a rank-fused (hybrid) order, which keeps k fixed.
+    """
+    retrieved = retrieved[:top_k]
+    scores = {
+        "dense_top": round(dense_top, 4) if dense_top is not None else None,
+        "rerank_top": round(ranked[0], 4) if reranked and ranked else None,
+        "ranked": [round(x, 4) for x in ranked[:top_k]] if ranked is not None else None,
+        "gate": None,
+        "k": len(retrieved),
+    }
+    if gating and retrieved:
+        scores["gate"] = gate_reason(scores["dense_top"], scores["rerank_top"])
+        if scores["gate"] is not None:
+            retrieved, scores["k"] = [], 0
+    if adaptive and retrieved and ranked is not None:
+        gap, floor = (RERANK_SCORE_GAP, MIN_RERANK_SCORE) if reranked else (DENSE_SCORE_GAP, MIN_DENSE_SCORE)
+        scores["k"] = adaptive_k(ranked[:len(retrieved)], top_k, gap, floor)
+        retrieved = retrieved[:scores["k"]]
+    return retrieved, scores
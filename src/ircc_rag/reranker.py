@@ -0,0 +1,63 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Config
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANK_CANDIDATES = 30   # Retrieved wide, then cut back to TOP_K_RETRIEVAL by the cross-encoder
+RERANK_BUDGET_MS = 300   # Over budget -> keep the first-stage order for this query
+MAX_PAIR_LENGTH = 256    # Tokens per (question, chunk) pair
+
+
+class Reranker:
+    """Cross-encoder reranking of retrieved chunks under a latency budget.
+
+    All pairs go through the model in one batched forward pass on a single background
+    thread; concurrent queries queue there, each waiting within its own budget. If the scores
+    are not ready within `budget_ms` the caller gets the first-stage order back (a pass that
+    had not started is cancelled); while a timed-out pass is still finishing, later queries
+    skip reranking instead of queueing behind it.
+    """
+
+    def __init__(self, model_name: str = RERANK_MODEL, budget_ms: float = RERANK_BUDGET_MS,
+                 max_length: int = MAX_PAIR_LENGTH):
+        from sentence_transformers import CrossEncoder
+
+        self.model = CrossEncoder(model_name, max_length=max_length)
+        self.budget_ms = budget_ms
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._overrun = None  # A pass that outlived its budget and still holds the thread
+        self.counters = {"reranked": 0, "over_budget": 0, "skipped_busy": 0}
+
+    def scores(self, query: str, texts: Sequence[str]) -> np.ndarray:
+        """Relevance logits, one batched forward pass (no budget)."""
+        pairs = [(query, t) for t in texts]
+        return np.asarray(self.model.predict(pairs, batch_size=max(len(pairs), 1), show_progress_bar=False))
+
+    def rerank(self, query: str, candidates: List[Dict], top_k: int,
+               budget_ms: Optional[float] = None) -> Tuple[List[Dict], Dict]:
+        """Best `top_k` of `candidates` plus {"reranked": bool, "rerank_ms": float}; when reranked, the
+        info also has "scores", the cross-encoder logits of the returned chunks."""
+        budget_ms = self.budget_ms if budget_ms is None else budget_ms
+        start = time.perf_counter()
+        if len(candidates) <= 1:
+            return candidates[:top_k], {"reranked": False, "rerank_ms": 0.0}
+        overrun = self._overrun
+        if overrun is not None and not overrun.done():
+            self.counters["skipped_busy"] += 1
+            return candidates[:top_k], {"reranked": False, "rerank_ms": 0.0}
+
+        future = self._executor.submit(self.scores, query, [c["text"] for c in candidates])
+        try:
+            scores = future.result(timeout=budget_ms / 1000)
+        except FutureTimeout:
+            if not future.cancel():  # Already running: later queries skip until it finishes
+                self._overrun = future
+            self.counters["over_budget"] += 1
+            return candidates[:top_k], {"reranked": False, "rerank_ms": (time.perf_counter() - start) * 1000}
+        order = np.argsort(-scores, kind="stable")[:top_k]
+        self.counters["reranked"] += 1
+        return [candidates[i] for i in order], {"reranked": True, "rerank_ms": (time.perf_counter() - start) * 1000,
+                                                "scores": [float(scores[i]) for i in order]}
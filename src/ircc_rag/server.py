@@ -0,0 +1,268 @@
+import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ircc_rag.engine import CONTEXT_TOKEN_BUDGET as MAX_INPUT_TOKENS
+from ircc_rag.engine import EMBED_MODEL, GENERATOR_BACKEND, LOCAL_LLM_MODEL
+from ircc_rag.llm_backend import BACKENDS, load_seq2seq
+
+# Config (models, backend and input window come from ircc_rag.engine, so both sides stay in step)
+MAX_BATCH_SIZE = 8
+MAX_WAIT_MS = 20
+# Requests whose prompt lengths differ by more than this ratio go in separate batches,
+# so a short question is not padded out to a long context-heavy prompt.
+MAX_LENGTH_RATIO = 1.5
+
+
+@dataclass
+class _Pending:
+    payload: object
+    group: object
+    future: asyncio.Future
+    length: int = 0
+    enqueued: float = field(default_factory=time.perf_counter)
+
+
+class MicroBatcher:
+    """Collects concurrent requests for up to `max_wait_ms` and runs them as padded batches.
+
+    `run_batch` receives a list of payloads and returns one result per payload; it runs on a
+    single worker thread so the model only ever sees one batch at a time. `length_fn` (prompt
+    tokenization) runs on that thread too, once per collected set, never on the event loop.
+    """
+
+    def __init__(self, run_batch: Callable[[List], List], length_fn: Callable[[object], int],
+                 max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS,
+                 max_length_ratio: float = MAX_LENGTH_RATIO, executor: Optional[ThreadPoolExecutor] = None):
+        self.run_batch = run_batch
+        self.length_fn = length_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_length_ratio = max_length_ratio
+        self.executor = executor or ThreadPoolExecutor(max_workers=1)
+        self.queue: Optional["asyncio.Queue[_Pending]"] = None
+        self.stats = {"requests": 0, "batches": 0, "padding_tokens": 0, "queue_ms": 0.0}
+        self._task = None
+
+    def start(self):
+        # Created here rather than in __init__ so the queue binds to the running loop (Python 3.9).
+        self.queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def submit(self, payload, group=None):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(_Pending(payload, group, future))
+        return await future
+
+    def _group(self, pending: List[_Pending]) -> List[List[_Pending]]:
+        """Sort by (group, length) and cut wherever the group changes, the batch is full
+        or the length spread would exceed `max_length_ratio`."""
+        pending = sorted(pending, key=lambda p: (str(p.group), p.length))
+        batches, current = [], []
+        for p in pending:
+            if current and (
+                p.group != current[0].group
+                or len(current) >= self.max_batch_size
+                or p.length > max(current[0].length, 1) * self.max_length_ratio
+            ):
+                batches.append(current)
+                current = []
+            current.append(p)
+        if current:
+            batches.append(current)
+        return batches
+
+    def _lengths(self, payloads: List) -> List[int]:
+        return [self.length_fn(payload) for payload in payloads]
+
+    @staticmethod
+    def _fail(pending: List[_Pending], error: Exception):
+        for p in pending:
+            if not p.future.done():
+                p.future.set_exception(error)
+
+    async def _loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(pending) < self.max_batch_size * 4:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                lengths = await loop.run_in_executor(self.executor, self._lengths, [p.payload for p in pending])
+            except Exception as e:
+                self._fail(pending, e)
+                continue
+            for p, length in zip(pending, lengths):
+                p.length = length
+            for batch in self._group(pending):
+                now = time.perf_counter()
+                longest = max(p.length for p in batch)
+                self.stats["requests"] += len(batch)
+                self.stats["batches"] += 1
+                self.stats["padding_tokens"] += sum(longest - p.length for p in batch)
+                self.stats["queue_ms"] += sum((now - p.enqueued) * 1000 for p in batch)
+                try:
+                    results = await loop.run_in_executor(self.executor, self.run_batch, [p.payload for p in batch])
+                except Exception as e:  # Fail the batch, keep serving
+                    self._fail(batch, e)
+                    continue
+                for p, result in zip(batch, results):
+                    if not p.future.done():
+                        p.future.set_result(result)
+
+
+class ModelWorker:
+    """Owns the seq2seq generator and the sentence embedder."""
+
+    def __init__(self, llm_model: str = LOCAL_LLM_MODEL, embed_model: str = EMBED_MODEL,
+                 backend: str = GENERATOR_BACKEND):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        self.torch = torch
+        self.device = "cuda" if torch.cuda.is_available() and backend == "fp32" else "cpu"
+        self.embedder = SentenceTransformer(embed_model, device=self.device)
+        self.tokenizer, self.model = load_seq2seq(llm_model, backend)
+
+    def prompt_length(self, payload: Tuple[str, int]) -> int:
+        return min(len(self.tokenizer(payload[0]).input_ids), MAX_INPUT_TOKENS)
+
+    def generate(self, payloads: List[Tuple[str, int]]) -> List[str]:
+        prompts = [p for p, _ in payloads]
+        max_new_tokens = max(n for _, n in payloads)
+        enc = self.tokenizer(prompts, padding=True, truncation=True, max_length=MAX_INPUT_TOKENS,
+                             return_tensors="pt").to(self.device)
+        with self.torch.inference_mode():
+            out = self.model.generate(**enc, max_new_tokens=max_new_tokens)
+        return [t.strip() for t in self.tokenizer.batch_decode(out, skip_special_tokens=True)]
+
+    def embed(self, batches: List[List[str]]) -> List[List[List[float]]]:
+        texts = [t for batch in batches for t in batch]
+        vectors = self.embedder.encode(texts, normalize_embeddings=True).tolist()
+        out, start = [], 0
+        for batch in batches:
+            out.append(vectors[start:start + len(batch)])
+            start += len(batch)
+        return out
+
+
+# ---------- HTTP ----------
+async def _read_request(reader: asyncio.StreamReader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return method, path, headers, body
+
+
+def _response(status: int, payload: Dict, keep_alive: bool) -> bytes:
+    body = json.dumps(payload).encode("utf-8")
+    reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}[status]
+    head = (
+        f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+class GenerationServer:
+    """JSON over HTTP/1.1: POST /generate, POST /embed, GET /health, GET /stats."""
+
+    def __init__(self, worker: ModelWorker, max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS):
+        # Each batcher has its own thread: the generator's tokenizer and model are only used from theirs,
+        # and millisecond query embeddings never queue behind multi-second generate batches.
+        self.generate_batcher = MicroBatcher(worker.generate, worker.prompt_length, max_batch_size, max_wait_ms)
+        self.embed_batcher = MicroBatcher(worker.embed, len, max_batch_size * 4, max_wait_ms,
+                                          max_length_ratio=float("inf"))
+
+    async def handle(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok"}
+        if method == "GET" and path == "/stats":
+            return 200, {"generate": self.generate_batcher.stats, "embed": self.embed_batcher.stats}
+        if method != "POST" or path not in ("/generate", "/embed"):
+            return 404, {"error": f"No route for {method} {path}"}
+        try:
+            data = json.loads(body or b"{}")
+        except json.JSONDecodeError as e:
+            return 400, {"error": f"Invalid JSON: {e}"}
+        if path == "/embed":
+            return 200, {"embeddings": await self.embed_batcher.submit(list(data["texts"]))}
+        max_new_tokens = int(data.get("max_new_tokens", 300))
+        text = await self.generate_batcher.submit((data["prompt"], max_new_tokens), group=max_new_tokens)
+        return 200, {"generated_text": text}
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    status, payload = await self.handle(method, path, body)
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, unix_socket: Optional[str] = None):
+        self.generate_batcher.start()
+        self.embed_batcher.start()
+        if unix_socket:
+            server = await asyncio.start_unix_server(self._serve_connection, path=unix_socket)
+            print(f"[INFO] Generation server listening on unix://{unix_socket}")
+        else:
+            server = await asyncio.start_server(self._serve_connection, host, port)
+            print(f"[INFO] Generation server listening on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local batched generation + embedding service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix-socket", help="Listen on a Unix socket instead of TCP.")
+    parser.add_argument("--llm-model", default=LOCAL_LLM_MODEL)
+    parser.add_argument("--embed-model", default=EMBED_MODEL)
+    parser.add_argument("--backend", default=GENERATOR_BACKEND, choices=BACKENDS,
+                        help="Generator backend; quantized artefacts are converted on first use.")
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    args = parser.parse_args(argv)
+
+    print("[INFO] Loading models...")
+    worker = ModelWorker(args.llm_model, args.embed_model, args.backend)
+    server = GenerationServer(worker, args.max_batch_size, args.max_wait_ms)
+    asyncio.run(server.serve(args.host, args.port, args.unix_socket))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import os
+import time
+import shutil
+import struct
+import zipfile
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Config
+SNAPSHOTS_DIR = "snapshots"
+CURRENT_FILE = "CURRENT"  # Name of the live snapshot, replaced atomically on publish
+KEEP_SNAPSHOTS = 3        # Published snapshots kept on disk, the live one included
+WATCH_INTERVAL_S = 2.0
+INDEX_FILE = "index.faiss"
+FLAT_FILE = "flat.npz"    # Flat indexes only: vectors + ids, memory-mapped instead of copied per process
+QUERY_BLOCK = 16          # Queries scored per matrix product in MmapFlatIndex.search
+_BUILD_PREFIX = ".build-"
+
+# Layout:
+#   vector_store/CURRENT                        one line: the live snapshot's name
+#   vector_store/snapshots/<name>/              index.faiss, chunks.bin, bm25.npz, build_manifest.json
+#                                               (+ flat.npz for flat indexes)
+# embed_documents.py builds into snapshots/.build-*/ and publishes with one rename plus one
+# os.replace of CURRENT, so readers only ever see complete snapshots. A vector_store/ without
+# CURRENT is the older flat layout and is read in place.
+
+
+# ---------- SNAPSHOTS ----------
+def current_snapshot(vector_dir: str) -> Optional[str]:
+    try:
+        with open(os.path.join(vector_dir, CURRENT_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def resolve_store(vector_dir) -> str:
+    """Directory holding the live store files: the current snapshot, or `vector_dir` itself."""
+    vector_dir = str(vector_dir)
+    name = current_snapshot(vector_dir)
+    return os.path.join(vector_dir, SNAPSHOTS_DIR, name) if name else vector_dir
+
+
+def new_build_dir(vector_dir: str) -> str:
+    root = os.path.join(vector_dir, SNAPSHOTS_DIR)
+    os.makedirs(root, exist_ok=True)
+    return tempfile.mkdtemp(dir=root, prefix=_BUILD_PREFIX)
+
+
+def published_snapshots(vector_dir: str) -> List[str]:
+    """Snapshot names, oldest first (names start with their UTC build time)."""
+    root = os.path.join(vector_dir, SNAPSHOTS_DIR)
+    if not os.path.isdir(root):
+        return []
+    return sorted(n for n in os.listdir(root) if not n.startswith(".") and os.path.isdir(os.path.join(root, n)))
+
+
+def publish(vector_dir: str, build_dir: str, keep: int = KEEP_SNAPSHOTS) -> str:
+    """Rename a finished build into place, point CURRENT at it and prune old snapshots."""
+    root = os.path.join(vector_dir, SNAPSHOTS_DIR)
+    stamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+    name, n = stamp, 1
+    while os.path.exists(os.path.join(root, name)):
+        n += 1
+        name = f"{stamp}-{n}"
+    os.rename(build_dir, os.path.join(root, name))
+    tmp_path = os.path.join(vector_dir, f".{CURRENT_FILE}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(name + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(vector_dir, CURRENT_FILE))
+    prune(vector_dir, keep)
+    return os.path.join(root, name)
+
+
+def prune(vector_dir: str, keep: int = KEEP_SNAPSHOTS):
+    """Delete all but the newest `keep` snapshots. Workers still reading an older one keep their
+    open and mapped files: on POSIX the data stays until they let go of it."""
+    live = current_snapshot(vector_dir)
+    names = [n for n in published_snapshots(vector_dir) if n != live]
+    for name in names[:max(0, len(names) - (keep - 1))]:
+        shutil.rmtree(os.path.join(vector_dir, SNAPSHOTS_DIR, name), ignore_errors=True)
+
+
+class SnapshotWatcher:
+    """Polls CURRENT from a daemon thread and calls `on_change(store_dir)` when it moves."""
+
+    def __init__(self, vector_dir: str, on_change: Callable[[str], None], interval_s: float = WATCH_INTERVAL_S):
+        self.vector_dir = str(vector_dir)
+        self.on_change = on_change
+        self.interval_s = interval_s
+        self.seen = current_snapshot(self.vector_dir)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> bool:
+        name = current_snapshot(self.vector_dir)
+        if name is None or name == self.seen:
+            return False
+        try:
+            self.on_change(resolve_store(self.vector_dir))
+        except Exception as e:  # Keep serving the old snapshot; retried on the next poll
+            print(f"[WARN] Could not switch to snapshot {name}: {type(e).__name__}: {e}")
+            return False
+        self.seen = name
+        return True
+
+    def start(self) -> "SnapshotWatcher":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="snapshot-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self.check()
+
+
+# ---------- MEMORY-MAPPED ARRAYS ----------
+def mmap_npz(path: str) -> Dict[str, np.ndarray]:
+    """Arrays of an uncompressed .npz (np.savez) mapped read-only in place, so every process
+    reading the file shares the page cache instead of holding a private copy."""
+    arrays = {}
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as f:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path}: {info.filename} is compressed, cannot be memory-mapped")
+            f.seek(info.header_offset + 26)
+            name_len, extra_len = struct.unpack("<HH", f.read(4))
+            f.seek(info.header_offset + 30 + name_len + extra_len)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.zeros(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                                         order="F" if fortran_order else "C")
+    return arrays
+
+
+# ---------- INDEXES ----------
+class MmapFlatIndex:
+    """Exact inner-product search over vectors mapped from flat.npz.
+
+    Same results and `search()` signature as the IndexIDMap2(IndexFlatIP) it stands in for, but
+    N worker processes share one physical copy of the vectors (faiss copies flat codes into
+    private memory on read).
+    """
+
+    def __init__(self, vectors: np.ndarray, ids: np.ndarray):
+        self.vectors = vectors
+        self.ids = ids
+        self.ntotal = len(ids)
+        self.d = vectors.shape[1]
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.ascontiguousarray(queries, dtype="float32")
+        D = np.full((len(queries), k), -np.inf, dtype="float32")
+        I = np.full((len(queries), k), -1, dtype="int64")
+        kk = min(k, self.ntotal)
+        if kk == 0:
+            return D, I
+        for start in range(0, len(queries), QUERY_BLOCK):
+            scores = queries[start:start + QUERY_BLOCK] @ self.vectors.T
+            top = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            rows = slice(start, start + len(scores))
+            D[rows, :kk] = np.take_along_axis(top_scores, order, axis=1)
+            I[rows, :kk] = self.ids[np.take_along_axis(top, order, axis=1)]
+        return D, I
+
+
+def write_flat_sidecar(index, store_dir: str) -> bool:
+    """Write flat.npz next to index.faiss when `index` is a flat index; no-op otherwise."""
+    import faiss
+
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if not isinstance(inner, faiss.IndexFlat):
+        return False
+    vectors = inner.reconstruct_n(0, inner.ntotal) if inner.ntotal else np.zeros((0, inner.d), dtype="float32")
+    if isinstance(index, faiss.IndexIDMap):
+        ids = faiss.vector_to_array(index.id_map).astype("int64")
+    else:
+        ids = np.arange(inner.ntotal, dtype="int64")
+    with open(os.path.join(store_dir, FLAT_FILE), "wb") as f:  # File object: no ".npz" appended
+        np.savez(f, vectors=np.ascontiguousarray(vectors, dtype="float32"), ids=ids)
+    return True
+
+
+def open_index(store_dir: str, mmap: bool = True):
+    """The store's index. With `mmap`, flat indexes are served from flat.npz and IVF inverted lists
+    are mapped by faiss (IO_FLAG_MMAP); HNSW graphs are always read into private memory."""
+    flat_path = os.path.join(store_dir, FLAT_FILE)
+    if mmap and os.path.exists(flat_path):
+        arrays = mmap_npz(flat_path)
+        return MmapFlatIndex(arrays["vectors"], arrays["ids"])
+    import faiss
+
+    return faiss.read_index(os.path.join(store_dir, INDEX_FILE), faiss.IO_FLAG_MMAP if mmap else 0)
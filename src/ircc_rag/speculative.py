@@ -0,0 +1,79 @@
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+# Config
+MIN_ACCEPTANCE_RATE = 0.5  # Rolling share of draft tokens the main model accepts; below it, plain decoding
+ACCEPTANCE_WINDOW = 16     # Generations in the rolling acceptance rate
+MIN_PROPOSED_TOKENS = 64   # Draft tokens seen before the rate is trusted enough to fall back
+
+
+class AssistedGenerator:
+    """A text2text pipeline whose single-prompt generations are assisted by a small draft model.
+
+    The draft (same tokenizer, e.g. flan-t5-small for flan-t5-xl) proposes a few tokens and the
+    main model checks them in one forward pass, keeping the agreeing prefix; greedy output is the
+    main model's own. Acceptance (accepted / proposed draft tokens) is estimated per generation
+    from forward-pass counts; when its rolling rate drops under `min_acceptance`, assistance is
+    switched off and generation continues plain. Batched calls always run plain.
+    """
+
+    def __init__(self, pipe, draft_model, min_acceptance: float = MIN_ACCEPTANCE_RATE,
+                 window: int = ACCEPTANCE_WINDOW, min_proposed: int = MIN_PROPOSED_TOKENS):
+        self.pipe = pipe
+        self.model = pipe.model
+        self.tokenizer = pipe.tokenizer
+        self.draft = draft_model
+        self.min_acceptance = min_acceptance
+        self.min_proposed = min_proposed
+        self.enabled = True
+        self._window = deque(maxlen=window)  # (accepted, proposed) per assisted generation
+        self._lock = threading.Lock()
+        self._calls = threading.local()  # Forward passes of the generation running on this thread
+        self.model.register_forward_hook(lambda *_: self._count("target"))
+        self.draft.register_forward_hook(lambda *_: self._count("draft"))
+
+    def _count(self, name: str):
+        counts = getattr(self._calls, "counts", None)
+        if counts is not None:
+            counts[name] += 1
+
+    def generate(self, **kwargs):
+        """model.generate() with the draft as assistant while enabled; records its acceptance."""
+        if not self.enabled or kwargs["input_ids"].shape[0] != 1:
+            return self.model.generate(**kwargs)
+        self._calls.counts = {"target": 0, "draft": 0}
+        try:
+            output = self.model.generate(assistant_model=self.draft, **kwargs)
+        finally:
+            counts, self._calls.counts = self._calls.counts, None
+        # Each verification pass keeps the accepted draft tokens plus one token of its own.
+        new_tokens = output.shape[1] - 1  # Minus the decoder start token
+        self._record(max(new_tokens - counts["target"], 0), counts["draft"])
+        return output
+
+    def _record(self, accepted: int, proposed: int):
+        with self._lock:
+            self._window.append((accepted, proposed))
+            rate, proposed_total = self._rate()
+            if self.enabled and proposed_total >= self.min_proposed and rate < self.min_acceptance:
+                self.enabled = False
+                print(f"[WARN] Draft model acceptance {rate:.0%} over the last {len(self._window)} answers is under "
+                      f"{self.min_acceptance:.0%}; falling back to plain decoding")
+
+    def _rate(self):
+        proposed = sum(p for _, p in self._window)
+        return (sum(a for a, _ in self._window) / proposed if proposed else 0.0), proposed
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            rate, proposed = self._rate()
+            return {"enabled": self.enabled, "acceptance_rate": rate if proposed else None,
+                    "generations": len(self._window), "proposed_tokens": proposed}
+
+    def __call__(self, inputs, max_new_tokens: int = 300, **kwargs):
+        if not isinstance(inputs, str):
+            return self.pipe(inputs, max_new_tokens=max_new_tokens, **kwargs)
+        encoded = self.tokenizer(inputs, return_tensors="pt").to(self.model.device)
+        output = self.generate(**encoded, max_new_tokens=max_new_tokens)
+        return [{"generated_text": self.tokenizer.decode(output[0], skip_special_tokens=True)}]
@@ -0,0 +1,90 @@
+import time
+from threading import Thread
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from ircc_rag.speculative import AssistedGenerator
+
+# Config
+TOKEN_TIMEOUT_S = 300.0  # Longest wait for the next piece before the stream gives up (a wedged generate())
+
+
+@dataclass
+class GenerationStats:
+    """Per-turn timing: time to first token and decode throughput."""
+    started: float = field(default_factory=time.perf_counter)
+    first_token_s: Optional[float] = None
+    total_s: Optional[float] = None
+    new_tokens: Optional[int] = None
+
+    @property
+    def tokens_per_s(self) -> Optional[float]:
+        if not self.new_tokens or self.first_token_s is None or self.total_s is None:
+            return None
+        decode_s = self.total_s - self.first_token_s
+        return (self.new_tokens - 1) / decode_s if decode_s > 0 and self.new_tokens > 1 else None
+
+    def as_dict(self):
+        return {
+            "first_token_s": self.first_token_s,
+            "total_s": self.total_s,
+            "new_tokens": self.new_tokens,
+            "tokens_per_s": self.tokens_per_s,
+        }
+
+
+def _counting_streamer(tokenizer, stats: GenerationStats):
+    from transformers import TextIteratorStreamer
+
+    class CountingStreamer(TextIteratorStreamer):
+        """Records when generated tokens arrive; the decoder start token counts as prompt."""
+
+        def put(self, value):
+            if not self.next_tokens_are_prompt:
+                if stats.first_token_s is None:
+                    stats.first_token_s = time.perf_counter() - stats.started
+                stats.new_tokens = (stats.new_tokens or 0) + value.numel()
+            super().put(value)
+
+    return CountingStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=TOKEN_TIMEOUT_S)
+
+
+def stream_generate(llm_pipe, prompt: str, max_new_tokens: int = 300,
+                    stats: Optional[GenerationStats] = None) -> Iterator[str]:
+    """Yield answer text pieces as they are decoded.
+
+    Local pipelines run `generate()` on a background thread feeding a TextIteratorStreamer.
+    A draft-assisted generator streams through its own generate(). Anything without
+    `.model`/`.tokenizer` (e.g. the generation server client) is called normally and yields the
+    whole answer at once.
+    """
+    stats = stats if stats is not None else GenerationStats()
+    model = getattr(llm_pipe, "model", None)
+    tokenizer = getattr(llm_pipe, "tokenizer", None)
+    if model is None or tokenizer is None:
+        text = llm_pipe(prompt, max_new_tokens=max_new_tokens)[0]["generated_text"].strip()
+        stats.first_token_s = stats.total_s = time.perf_counter() - stats.started
+        yield text
+        return
+
+    streamer = _counting_streamer(tokenizer, stats)
+    inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+    generate = llm_pipe.generate if isinstance(llm_pipe, AssistedGenerator) else model.generate
+    errors = []
+
+    def run():
+        try:
+            generate(**inputs, max_new_tokens=max_new_tokens, streamer=streamer)
+        except Exception as e:  # OOM, bad input: end the stream and re-raise in the consumer
+            errors.append(e)
+            streamer.end()
+
+    thread = Thread(target=run, daemon=True)
+    thread.start()
+    for piece in streamer:
+        if piece:
+            yield piece
+    thread.join()
+    if errors:
+        raise errors[0]
+    stats.total_s = time.perf_counter() - stats.started
@@ -0,0 +1,237 @@
+import os
+import re
+import json
+import datetime
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ircc_rag.bm25 import tokenize
+
+# Config
+PROCESSING_TIMES_FILE = "ircc_processing_times_selected.json"
+FEES_FILE = "ircc_fees.json"
+MAX_ANSWER_ROWS = 4  # More matching rows than this is too vague to answer without RAG
+
+FEE_WORDS = {"fee", "fees", "cost", "costs", "much", "price", "pay", "charge", "charged"}
+TIME_WORDS = {"long", "processing", "wait", "waiting", "take", "takes", "time", "times"}
+# Questions about validity, length of stay, refunds or what happens in some situation mention a fee or
+# "how long" without asking for the table value: "How long is a visitor visa valid?" is not a processing time.
+DECLINE_WORDS = {"valid", "validity", "expire", "expires", "expired", "expiry", "last", "lasts", "stay",
+                 "refund", "refunds", "refunded", "refundable", "reimburse", "reimbursed", "wrong", "mistake",
+                 "happens", "penalty", "overpaid", "underpaid"}
+SYNONYMS = {"tourist": ["visitor"], "pr": ["permanent", "resident"], "citizen": ["citizenship"],
+            "eta": ["electronic", "travel", "authorization"]}
+COUNTRY_ALIASES = {"uae": "United Arab Emirates", "emirates": "United Arab Emirates", "ksa": "Saudi Arabia"}
+
+
+def fix_mojibake(text: str) -> str:
+    """The fee scrape decoded UTF-8 as Latin-1 ("â\x80\x93" for an en dash); undo that where it applies."""
+    try:
+        return text.encode("latin-1").decode("utf-8")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return text
+
+
+def _stem(token: str) -> str:
+    if len(token) > 5 and token.endswith("ing"):
+        return token[:-3]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def terms(text: str) -> List[str]:
+    out = []
+    for token in tokenize(text):
+        for t in SYNONYMS.get(token, [token]):
+            if len(t) > 1:
+                out.append(_stem(t))
+    return out
+
+
+def split_name(name: str) -> Tuple[set, set]:
+    """(core, qualifier) terms: "Study permit (from outside Canada)" -> {study, permit}, {outside, canada}.
+
+    A question must mention every core term; qualifier terms only narrow down between rows
+    that share a core ("per person" / "per family", "from inside" / "from outside").
+    """
+    qualifiers = " ".join(re.findall(r"\(([^)]*)\)", name))
+    core, _, tail = re.sub(r"\([^)]*\)", " ", name).partition(" – ")
+    core, _, tail2 = core.partition(" - ")
+    return set(terms(core)), set(terms(f"{qualifiers} {tail} {tail2}"))
+
+
+_INTENT_TERMS = set(terms(" ".join(FEE_WORDS | TIME_WORDS)))
+
+
+@dataclass
+class LookupAnswer:
+    intent: str                      # "processing_time" or "fee"
+    answer: str
+    rows: List[Dict]
+    last_updated: Optional[str]
+    sources: List[Dict] = field(default_factory=list)
+
+
+class LookupTable:
+    """Scraped processing times and fees, indexed by category, subcategory, country and service."""
+
+    def __init__(self, times: Sequence[Dict], fees: Sequence[Dict], fees_as_of: Optional[str] = None):
+        self.times = list(times)
+        self.fees = list(fees)
+        self.fees_as_of = fees_as_of
+        self.by_key: Dict[Tuple[str, str, Optional[str]], Dict] = {}
+        self.by_subcategory: Dict[str, List[Dict]] = defaultdict(list)
+        self.by_category: Dict[str, List[Dict]] = defaultdict(list)
+        self.by_country: Dict[str, List[Dict]] = defaultdict(list)
+        self.by_service: Dict[str, List[Dict]] = defaultdict(list)
+        for row in self.times:
+            self.by_key[(row["category"], row["subcategory"], row["country"])] = row
+            self.by_subcategory[row["subcategory"]].append(row)
+            self.by_category[row["category"]].append(row)
+            if row["country"]:
+                self.by_country[row["country"]].append(row)
+        for row in self.fees:
+            self.by_service[row["service"]].append(row)
+        self.countries = sorted(self.by_country, key=len, reverse=True)  # "Saudi Arabia" before "Arabia"
+
+    @classmethod
+    def load(cls, data_dir: str) -> "LookupTable":
+        times, fees, fees_as_of = [], [], None
+        path = os.path.join(data_dir, PROCESSING_TIMES_FILE)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                times = json.load(f)
+        path = os.path.join(data_dir, FEES_FILE)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                items = [item for item in json.load(f) if "Fees" in item and "$CAN" in item]
+            fees = [parse_fee(item) for item in items]
+            # Scrapes from before the "retrieved" field carry no date; their answers then give none.
+            retrieved = max((item["retrieved"] for item in items if item.get("retrieved")), default=None)
+            if retrieved:
+                day = datetime.date.fromisoformat(retrieved)
+                fees_as_of = f"{day:%B} {day.day}, {day.year}"
+        return cls(times, fees, fees_as_of)
+
+    def processing_time(self, subcategory: str, country: Optional[str] = None,
+                        category: Optional[str] = None) -> Optional[Dict]:
+        for row in self.by_subcategory.get(subcategory, []):
+            if row["country"] == country and category in (None, row["category"]):
+                return row
+        return None
+
+    def fee(self, service: str) -> List[Dict]:
+        return self.by_service.get(service, [])
+
+
+def parse_fee(item: Dict) -> Dict:
+    """{"Fees": "Study permit ... – per personDetails...", "$CAN": "260.00(per child)"} -> a clean row."""
+    text = fix_mojibake(item["Fees"]).strip()
+    # The scrape glues the service name to its description: "...as a studentRestore your status ($239.75)..."
+    match = re.search(r"(?<=[a-z)])(?=[A-Z])", text)
+    service, detail = (text[:match.start()], text[match.start():]) if match else (text, "")
+    amount, note = re.match(r"\s*([\d,]*\.?\d*)\s*(.*)", item["$CAN"]).groups()
+    return {"service": service.strip(), "detail": detail.strip(), "amount": amount,
+            "note": note.strip("() "), "text": f"Service: {text}\nFee: ${item['$CAN']} CAD"}
+
+
+class IntentRouter:
+    """Answers fee and processing-time questions straight from the LookupTable.
+
+    A question is routed only when its intent is unambiguous (fee words or processing-time
+    words, not both, and no validity / stay / refund / "what happens" cue), every core term of a service/subcategory name appears in it, and the
+    match narrows down to at most MAX_ANSWER_ROWS rows. Anything else returns None and goes
+    through retrieval and generation as before.
+    """
+
+    def __init__(self, table: LookupTable):
+        self.table = table
+        self.time_groups = self._groups((row["subcategory"], row) for row in table.times)
+        # Service names the scrape repeats under different programs with different amounts
+        # ("Your application", "Include your spouse or partner") can't be told apart: never routed.
+        amounts = defaultdict(set)
+        for row in table.fees:
+            amounts[row["service"]].add(row["amount"])
+        self.fee_groups = self._groups((row["service"], row) for row in table.fees
+                                       if len(amounts[row["service"]]) == 1)
+
+    @staticmethod
+    def _groups(named_rows) -> Dict[frozenset, List[Tuple[str, set, Dict]]]:
+        groups = defaultdict(list)
+        for name, row in named_rows:
+            core, qualifiers = split_name(name)
+            if core:
+                # "per family (1 fee per family ...)": the intent word itself must not pick a row
+                groups[frozenset(core)].append((name, qualifiers - _INTENT_TERMS, row))
+        return groups
+
+    def detect_country(self, question: str) -> Optional[str]:
+        lowered = question.lower()
+        for country in self.table.countries:
+            if re.search(rf"\b{re.escape(country.lower())}\b", lowered):
+                return country
+        for alias, country in COUNTRY_ALIASES.items():
+            if re.search(rf"\b{alias}\b", lowered):
+                return country
+        return None
+
+    def intent(self, question: str) -> Optional[str]:
+        words = set(re.findall(r"[a-z]+", question.lower()))
+        if words & DECLINE_WORDS:
+            return None
+        fee, time = bool(words & FEE_WORDS) or "$" in question, bool(words & TIME_WORDS)
+        if fee == time:
+            return None
+        return "fee" if fee else "processing_time"
+
+    @staticmethod
+    def _match(question_terms: set, groups) -> List[Tuple[str, Dict]]:
+        """Rows of the most specific fully mentioned name(s), narrowed by any qualifiers mentioned."""
+        covered = [core for core in groups if core <= question_terms]
+        if not covered:
+            return []
+        best = max(len(core) for core in covered)
+        entries = [e for core in covered if len(core) == best for e in groups[core]]
+        most = max(len(e[1] & question_terms) for e in entries)
+        return [(name, row) for name, qualifiers, row in entries if len(qualifiers & question_terms) == most]
+
+    def route(self, question: str) -> Optional[LookupAnswer]:
+        intent = self.intent(question)
+        if intent is None:
+            return None
+        question_terms = set(terms(question))
+        if intent == "fee":
+            return self._fee_answer(self._match(question_terms, self.fee_groups))
+        return self._time_answer(self._match(question_terms, self.time_groups), self.detect_country(question))
+
+    def _fee_answer(self, matches: List[Tuple[str, Dict]]) -> Optional[LookupAnswer]:
+        rows = list({(row["service"], row["amount"]): row for _, row in matches}.values())
+        if not rows or len(rows) > MAX_ANSWER_ROWS:
+            return None
+        lines = [f"{row['service']}: ${row['amount']} CAD" + (f" ({row['note']})" if row["note"] else "")
+                 for row in rows]
+        as_of = self.table.fees_as_of
+        answer = "\n".join(lines) + (f"\n(IRCC fee list, retrieved {as_of})" if as_of else "")
+        return LookupAnswer("fee", answer, rows, as_of,
+                            [{"source": FEES_FILE, "text": row["text"]} for row in rows])
+
+    def _time_answer(self, matches: List[Tuple[str, Dict]], country: Optional[str]) -> Optional[LookupAnswer]:
+        if country is None and any(row["country"] for _, row in matches):
+            return None  # Varies by country and none (or none we have) was named
+        rows = [row for _, row in matches if row["country"] == country]  # "from India" -> the per-country rows
+        rows = rows or [row for _, row in matches if row["country"] is None]
+        if not rows or len(rows) > MAX_ANSWER_ROWS:
+            return None
+        lines = []
+        for row in rows:
+            where = f" ({row['country']})" if row["country"] else ""
+            lines.append(f"{row['subcategory']}{where}: {row['processing_time']} "
+                         f"(last updated {row['last_updated']})")
+        sources = [{"source": PROCESSING_TIMES_FILE,
+                    "text": f"Category: {r['category']}\nSubcategory: {r['subcategory']}\nCountry: {r['country']}\n"
+                            f"Processing Time: {r['processing_time']}\nLast Updated: {r['last_updated']}"}
+                   for r in rows]
+        return LookupAnswer("processing_time", "Current IRCC processing times:\n" + "\n".join(lines), rows,
+                            rows[0]["last_updated"], sources)
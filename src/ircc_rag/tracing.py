@@ -0,0 +1,266 @@
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Config
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 384, 512, 1024)
+FILE_EXPORT_INTERVAL_S = 1.0  # Metrics file is rewritten at most this often
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _render_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    """Fixed buckets; per-bucket counts are made cumulative only when rendered."""
+
+    __slots__ = ("bounds", "counts", "total", "count", "lock")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # Last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.total += value
+            self.count += 1
+
+
+class Metrics:
+    """Thread-safe counters, gauges and histograms rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._buckets: Dict[str, Sequence[float]] = {}
+        self._keys: Dict[tuple, LabelKey] = {}  # (name, *labels.items()) as passed -> sorted label key
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: Sequence[float] = SECONDS_BUCKETS):
+        self._help[name] = (kind, help_text)
+        {"counter": self._counters, "gauge": self._gauges, "histogram": self._histograms}[kind].setdefault(name, {})
+        if kind == "histogram":
+            self._buckets[name] = buckets
+
+    def _key(self, name: str, labels: Dict[str, object]) -> LabelKey:
+        raw = (name, *labels.items())
+        key = self._keys.get(raw)
+        if key is None:
+            key = self._keys[raw] = _labels(labels)
+        return key
+
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges.setdefault(name, {})[self._key(name, labels)] = value
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        """The series for `labels`; hot paths keep it and call observe() on it directly."""
+        key = self._key(name, labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = Histogram(self._buckets.get(name, SECONDS_BUCKETS))
+            return hist
+
+    def observe(self, name: str, value: float, **labels):
+        self.histogram(name, **labels).observe(value)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for kind, families in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(families.items()):
+                    self._header(lines, name, kind)
+                    for key, value in sorted(series.items()):
+                        value = int(value) if float(value).is_integer() else float(value)
+                        lines.append(f"{name}{_render_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                self._header(lines, name, "histogram")
+                for key, hist in sorted(series.items()):
+                    with hist.lock:
+                        counts, total, count = list(hist.counts), hist.total, hist.count
+                    cumulative = 0
+                    for bound, count_in_bucket in zip(hist.bounds + (float("inf"),), counts):
+                        cumulative += count_in_bucket
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"{name}_bucket{_render_labels(key, ('le', le))} {cumulative}")
+                    lines.append(f"{name}_sum{_render_labels(key)} {total:.6f}")
+                    lines.append(f"{name}_count{_render_labels(key)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: List[str], name: str, kind: str):
+        kind, help_text = self._help.get(name, (kind, ""))
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+class _Span:
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace: "Trace", name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duration = time.perf_counter() - self.start
+        trace = self.trace
+        trace.timings[self.name + "_ms"] = duration * 1000
+        trace.spans.append((self.name, self.start, duration))
+        if trace.tracer is not None:
+            trace.tracer.stage(self.name).observe(duration)
+        return False
+
+
+class Trace:
+    """One chat turn. `with trace.span("search"):` times a stage on the monotonic clock.
+
+    `timings` collects "<stage>_ms" plus any values passed to set(), and is what the UI shows
+    under each answer. Without a tracer nothing is exported, so callers can always pass one.
+    """
+
+    def __init__(self, name: str = "turn", tracer: Optional["Tracer"] = None):
+        self.name = name
+        self.tracer = tracer
+        self.started = time.perf_counter()
+        self.timings: Dict[str, object] = {}
+        self.spans: List[Tuple[str, float, float]] = []  # (stage, start, duration_s)
+
+    def span(self, name: str) -> _Span:
+        return _Span(self, name)
+
+    def set(self, **values):
+        self.timings.update(values)
+
+    def finish(self, **attrs) -> float:
+        total = time.perf_counter() - self.started
+        if self.tracer is not None:
+            self.tracer.finish(self, total, attrs)
+        return total
+
+
+class Tracer:
+    """Per-process metrics registry plus optional exports.
+
+    - `metrics_file`: Prometheus text file rewritten after turns (node_exporter textfile style);
+    - `trace_log`: one JSON line per turn with its spans;
+    - `serve(port)`: GET /metrics over HTTP from a daemon thread.
+    """
+
+    def __init__(self, metrics_file: Optional[str] = None, trace_log: Optional[str] = None):
+        self.metrics = Metrics()
+        self.metrics_file = metrics_file
+        self.trace_log = trace_log
+        self._log_lock = threading.Lock()
+        self._last_export = 0.0
+        self._stages: Dict[str, Histogram] = {}
+        self.metrics.describe("ircc_stage_seconds", "histogram", "Duration of each chat pipeline stage.")
+        self.metrics.describe("ircc_turn_seconds", "histogram", "Wall time of a chat turn, by route.")
+        self.metrics.describe("ircc_first_token_seconds", "histogram", "Time from Send to the first answer token.")
+        self.metrics.describe("ircc_prompt_tokens", "histogram", "Prompt tokens sent to the generator.",
+                              TOKEN_BUCKETS)
+        self.metrics.describe("ircc_generated_tokens", "histogram", "Tokens generated per answer.", TOKEN_BUCKETS)
+        self.metrics.describe("ircc_turns_total", "counter", "Chat turns, by route and answer cache result.")
+        self.metrics.describe("ircc_tokens_total", "counter", "Prompt (in) and generated (out) tokens.")
+        self.metrics.describe("ircc_cache", "gauge", "Embedding and answer cache counters, as reported by the caches.")
+
+    def start(self, name: str = "turn") -> Trace:
+        return Trace(name, self)
+
+    def stage(self, name: str) -> Histogram:
+        hist = self._stages.get(name)
+        if hist is None:
+            hist = self._stages[name] = self.metrics.histogram("ircc_stage_seconds", stage=name)
+        return hist
+
+    def finish(self, trace: Trace, total: float, attrs: Dict):
+        route = attrs.get("route", "rag")
+        self.metrics.observe("ircc_turn_seconds", total, route=route)
+        self.metrics.inc("ircc_turns_total", route=route, cache=attrs.get("cache", "none"))
+        if attrs.get("first_token_s") is not None:
+            self.metrics.observe("ircc_first_token_seconds", attrs["first_token_s"])
+        for direction, key, hist in (("in", "prompt_tokens", "ircc_prompt_tokens"),
+                                     ("out", "new_tokens", "ircc_generated_tokens")):
+            if attrs.get(key):
+                self.metrics.observe(hist, attrs[key])
+                self.metrics.inc("ircc_tokens_total", attrs[key], direction=direction)
+        if self.trace_log:
+            record = {"ts": time.time(), "name": trace.name, "total_ms": round(total * 1000, 3), **attrs,
+                      "spans": [{"stage": n, "offset_ms": round((s - trace.started) * 1000, 3),
+                                 "ms": round(d * 1000, 3)} for n, s, d in trace.spans]}
+            with self._log_lock, open(self.trace_log, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+        if self.metrics_file and time.monotonic() - self._last_export >= FILE_EXPORT_INTERVAL_S:
+            self.export()
+
+    def record_cache_stats(self, cache: str, stats: Dict[str, float]):
+        """Mirror a cache's own stats() (hits, misses, hit rate, ...) as gauges."""
+        for stat, value in stats.items():
+            if isinstance(value, (int, float)):
+                self.metrics.set("ircc_cache", value, cache=cache, stat=stat)
+
+    def export(self, path: Optional[str] = None):
+        path = path or self.metrics_file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.metrics.render())
+        os.replace(tmp_path, path)  # Scrapers never see a half-written file
+        self._last_export = time.monotonic()
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"[INFO] Metrics on http://{host}:{port}/metrics")
+        return server
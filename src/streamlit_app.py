@@ -1,78 +1,39 @@
-import streamlit as st
-import faiss
-import json
 import os
-import torch
-from sentence_transformers import SentenceTransformer
-from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
-from pathlib import Path
+import sys
 
-# -------------------
-# Config
-# -------------------
-#VECTOR_DIR = ".../vector_store"
-VECTOR_DIR = Path(__file__).resolve().parent.parent / "vector_store"
-EMBED_MODEL = "all-MiniLM-L6-v2"
-LOCAL_LLM_MODEL = "google/flan-t5-xl"
-MAX_HISTORY_TURNS = 5
-TOP_K_RETRIEVAL = 3
+import streamlit as st
 
-# -------------------
-# Load FAISS & Metadata
-# -------------------
-@st.cache_resource
-def load_index():
-    index = faiss.read_index(os.path.join(VECTOR_DIR, "index.faiss"))
-    with open(os.path.join(VECTOR_DIR, "chunks_metadata.json"), "r", encoding="utf-8") as f:
-        chunks = json.load(f)
-    return index, chunks
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))  # Also when started through chatbot_rag.py
+from ircc_rag.context_packer import source_label  # noqa: E402
+from ircc_rag.engine import COMPONENT_LABELS, RAGEngine  # noqa: E402
+
+# Pipeline config (vector store, models, retrieval, caches, metrics) lives in src/ircc_rag/engine.py.
+STATUS_POLL_S = 1.0  # Sidebar readiness refresh while models load
 
 # -------------------
-# Load Models
+# Engine
 # -------------------
 @st.cache_resource
-def load_models():
-    embedder = SentenceTransformer(EMBED_MODEL)
-    device = 0 if torch.cuda.is_available() else -1
-    tokenizer = AutoTokenizer.from_pretrained(LOCAL_LLM_MODEL)
-    model = AutoModelForSeq2SeqLM.from_pretrained(
-        LOCAL_LLM_MODEL,
-        torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-        device_map="auto" if torch.cuda.is_available() else None
-    )
-    llm_pipe = pipeline("text2text-generation", model=model, tokenizer=tokenizer, device=device)
-    return embedder, llm_pipe
+def load_engine():
+    # Models load on a background thread: the page renders at once, and fee / processing-time
+    # lookups answer while the rest warms up. A question that needs a model waits for it.
+    engine = RAGEngine()
+    engine.warm_up()
+    engine.watch()  # Swap to new vector store snapshots from embed_documents.py without a restart
+    return engine
 
-# -------------------
-# Retrieval
-# -------------------
-def retrieve_context(query, embedder, index, chunks, top_k=TOP_K_RETRIEVAL):
-    query_emb = embedder.encode([query])
-    faiss.normalize_L2(query_emb)
-    D, I = index.search(query_emb, top_k)
-    retrieved = [chunks[i] for i in I[0] if i < len(chunks)]
-    if not retrieved:
-        return None, []
-    context_text = "\n\n".join([f"Source: {c['source']}\n{c['text']}" for c in retrieved])
-    return context_text, retrieved
+STATUS_ICONS = {"pending": "⚪", "loading": "⏳", "ready": "✅", "error": "❌"}
 
-# -------------------
-# Answer Generation
-# -------------------
-def generate_answer(context, question, chat_history, llm_pipe):
-    if not context:
-        return "❌ I couldn't find any relevant information in my knowledge base."
-
-    history_text = "\n".join([f"User: {h['user']}\nBot: {h['bot']}" for h in chat_history[-MAX_HISTORY_TURNS:]])
-    prompt = (
-        "You are an AI assistant specializing in answering questions about IRCC guidelines. "
-        "Base your answers only on the provided context. If the context does not contain the answer, say so clearly.\n\n"
-        f"Context:\n{context}\n\n"
-        f"Conversation History:\n{history_text}\n\n"
-        f"User: {question}\nBot:"
-    )
-    output = llm_pipe(prompt, max_new_tokens=300)
-    return output[0]["generated_text"].strip()
+def show_status(engine, polling):
+    if polling and not engine.warming:
+        st.rerun()  # Warm-up finished: redraw the whole page once, without the timer
+    if engine.ready:
+        st.caption(f"✅ Ready · loaded in {sum(engine.load_s.values()):.1f}s · "
+                   f"store {os.path.basename(engine.store.path)}")
+        return
+    for name, state in engine.status().items():
+        error = f" — {engine.errors[name]}" if name in engine.errors else ""
+        st.caption(f"{STATUS_ICONS[state]} {COMPONENT_LABELS[name]}{error}")
 
 # -------------------
 # Streamlit UI Styling
@@ -115,9 +76,11 @@ st.markdown("""
 st.title("🤖 IRCC Immigration Chatbot")
 st.caption("💬 Ask about IRCC guidelines — I’ll answer based on my knowledge base.")
 
-# Load resources
-index, chunks = load_index()
-embedder, llm_pipe = load_models()
+engine = load_engine()
+with st.sidebar:
+    st.subheader("🚦 Models")
+    # Polls only while the warm-up thread is running.
+    st.fragment(show_status, run_every=STATUS_POLL_S if engine.warming else None)(engine, engine.warming)
 
 # Session state
 if "chat_history" not in st.session_state:
@@ -127,20 +90,77 @@ if "chat_history" not in st.session_state:
 user_input = st.text_input("Your question:", "", placeholder="Type your question and press Enter...")
 
 if st.button("Send") and user_input.strip():
-    with st.spinner("Thinking..."):
-        context, sources = retrieve_context(user_input, embedder, index, chunks)
-        answer = generate_answer(context, user_input, st.session_state.chat_history, llm_pipe)
+    # Render the turn in progress, then hand it to the history loop below once done.
+    live = st.empty()
+    with live.container():
+        st.markdown(f"<div class='user-bubble'>🧑 {user_input}</div>", unsafe_allow_html=True)
+        bot_box = st.empty()
+        bot_box.markdown("<div class='bot-bubble'>🤖 Thinking...</div>", unsafe_allow_html=True)
+
+    if not engine.ready:
+        bot_box.markdown("<div class='bot-bubble'>🤖 Thinking... (models are still loading, the first answer "
+                         "waits for them)</div>", unsafe_allow_html=True)
 
-        st.session_state.chat_history.append({"user": user_input, "bot": answer, "sources": sources})
+    answer = ""
+    turn = engine.chat(user_input, st.session_state.chat_history)
+    for piece in turn:
+        answer += piece
+        bot_box.markdown(f"<div class='bot-bubble'>🤖 {answer}▌</div>", unsafe_allow_html=True)
+    live.empty()
+    st.session_state.chat_history.append(turn.result())
 
 # Chat history display with bubbles
 for chat in st.session_state.chat_history:
     st.markdown(f"<div class='user-bubble'>🧑 {chat['user']}</div>", unsafe_allow_html=True)
     st.markdown(f"<div class='bot-bubble'>🤖 {chat['bot']}</div>", unsafe_allow_html=True)
+    timing = chat.get("timing")
+    if timing and timing["first_token_s"] is not None:
+        speed = f" · {timing['tokens_per_s']:.1f} tokens/s" if timing["tokens_per_s"] else ""
+        origin = "⚡ Cached answer · " if chat.get("cached") else ""
+        st.caption(f"{origin}⏱️ First token {timing['first_token_s']:.1f}s · total {timing['total_s']:.1f}s{speed}")
+    stages = chat.get("stages")
+    if stages and stages.get("route") == "lookup":
+        st.caption(f"📋 Answered from the fee / processing-time table in {stages['lookup_ms']:.1f} ms")
+    elif stages:
+        rerank = ""
+        if "rerank_ms" in stages:
+            kept = "" if stages["reranked"] else " (skipped, first-stage order kept)"
+            rerank = f" · rerank {stages['rerank_ms']:.0f} ms{kept}"
+        tokens = ""
+        if "prompt_tokens" in stages:
+            tokens = f" · prompt {stages['prompt_tokens']}/{stages['token_budget']} tokens"
+        relevance = ""
+        scores = stages.get("scores")
+        if scores and (scores["rerank_top"] is not None or scores["dense_top"] is not None):
+            best = scores["rerank_top"] if scores["rerank_top"] is not None else scores["dense_top"]
+            relevance = f" · best score {best:.2f}, {scores['k']} chunks"
+            if scores["gate"]:
+                relevance = f" · best score {best:.2f}, out of domain (not sent to the model)"
+        st.caption(f"🔎 Embed {stages['embed_ms']:.0f} ms · search {stages['search_ms']:.0f} ms{rerank}"
+                   f"{relevance}{tokens}")
     if chat["sources"]:
         with st.expander("📂 Sources"):
             for s in chat["sources"]:
-                st.markdown(f"<div class='source-box'>- {s['source']}</div>", unsafe_allow_html=True)
+                st.markdown(f"<div class='source-box'>- {source_label(s, all_sources=True)}</div>", unsafe_allow_html=True)
+
+# Cache stats (only once loaded, so the sidebar never waits on warm-up)
+with st.sidebar:
+    if engine.is_loaded("embed_cache"):
+        st.subheader("📊 Embedding cache")
+        cache_stats = engine.embed_cache.stats()
+        st.caption(
+            f"Hits: {cache_stats['lru_hits'] + cache_stats['disk_hits']} "
+            f"(memory {cache_stats['lru_hits']}, disk {cache_stats['disk_hits']}) · "
+            f"Misses: {cache_stats['misses']} · Hit rate: {cache_stats['hit_rate']:.0%}"
+        )
+    if engine.is_loaded("answer_cache"):
+        st.subheader("💬 Answer cache")
+        answer_stats = engine.answer_cache.stats()
+        st.caption(
+            f"Hits: {answer_stats['hits']} · Misses: {answer_stats['misses']} · "
+            f"Hit rate: {answer_stats['hit_rate']:.0%} · Entries: {answer_stats['entries']} · "
+            f"Generation time saved: {answer_stats['saved_s']:.1f}s"
+        )
 
 # Clear button
 if st.button("🗑️ Clear Conversation"):